@@ -0,0 +1,67 @@
+from .generators import SyntheticWARC, SHAPES
+
+import pytest
+
+
+# ============================================================================
+class SyntheticFile(object):
+    def __init__(self, shape, filename, size, num_records):
+        self.shape = shape
+        self.filename = filename
+        self.size = size
+        self.num_records = num_records
+
+
+# ============================================================================
+def make_synthetic_file(shape, tmp_path_factory):
+    params = SHAPES[shape]
+    if params.get('encoding') == 'br':
+        pytest.importorskip('brotli')
+
+    generator = SyntheticWARC(**params)
+
+    ext = '.arc' if generator.arc else '.warc'
+    if generator.gzip:
+        ext += '.gz'
+
+    filename = str(tmp_path_factory.mktemp('synthetic').joinpath(shape + ext))
+    size = generator.write(filename)
+
+    # warcinfo/filedesc + request and response, or response only for ARC
+    num_records = 1 + generator.num_records * (1 if generator.arc else 2)
+
+    return SyntheticFile(shape, filename, size, num_records)
+
+
+@pytest.fixture(scope='session', params=sorted(SHAPES))
+def synthetic(request, tmp_path_factory):
+    """ A synthetic WARC/ARC file of each shape
+    """
+    return make_synthetic_file(request.param, tmp_path_factory)
+
+
+@pytest.fixture(scope='session', params=['small', 'large'])
+def synthetic_warc(request, tmp_path_factory):
+    """ A synthetic compressed WARC of a few shapes
+    """
+    return make_synthetic_file(request.param, tmp_path_factory)
+
+
+# ============================================================================
+@pytest.fixture
+def measure(benchmark):
+    """ Run func with the benchmark fixture, and add throughput in
+    MB/s and records/s, from the mean time, to the results
+    """
+    def run(func, size, num_records):
+        result = benchmark(func)
+
+        # no stats if run with --benchmark-disable
+        if benchmark.stats:
+            mean = benchmark.stats.stats.mean
+            benchmark.extra_info['MB/s'] = round(size / mean / 1000000.0, 2)
+            benchmark.extra_info['records/s'] = round(num_records / mean, 1)
+
+        return result
+
+    return run
@@ -0,0 +1,134 @@
+from warcio.warcwriter import WARCWriter, GzippingWrapper
+from warcio.statusandheaders import StatusAndHeaders
+
+from io import BytesIO
+
+import os
+import random
+
+
+# ============================================================================
+class SyntheticWARC(object):
+    """ Generate synthetic WARC or ARC files of a given shape, for benchmarks.
+
+    ``num_records`` request/response pairs (response only for ARC) are written,
+    each response with a payload of ``record_size`` bytes, optionally sent with
+    chunked transfer-encoding and/or brotli content-encoding.
+    """
+    def __init__(self, num_records=1000, record_size=4096, gzip=True,
+                 chunked=False, encoding=None, arc=False, seed=0):
+        self.num_records = num_records
+        self.record_size = record_size
+        self.gzip = gzip
+        self.chunked = chunked
+        self.encoding = encoding
+        self.arc = arc
+        self.random = random.Random(seed)
+
+    def make_payload(self, size):
+        # compressible, but not trivially so, like typical html
+        words = [b'<div>', b'</div>', b'lorem', b'ipsum', b'dolor', b'sit', b'amet',
+                 b'<a href="http://example.com/">', b'</a>', b'\n']
+
+        buff = bytearray()
+        while len(buff) < size:
+            buff += self.random.choice(words)
+            buff += b' '
+
+        return bytes(buff[:size])
+
+    def encode_payload(self, payload):
+        headers = [('Content-Type', 'text/html; charset=utf-8')]
+
+        if self.encoding == 'br':
+            import brotli
+            payload = brotli.compress(payload)
+            headers.append(('Content-Encoding', 'br'))
+
+        if self.chunked:
+            headers.append(('Transfer-Encoding', 'chunked'))
+            payload = self.chunk(payload)
+        else:
+            headers.append(('Content-Length', str(len(payload))))
+
+        return payload, headers
+
+    @staticmethod
+    def chunk(payload, chunk_size=8192):
+        buff = BytesIO()
+        for i in range(0, len(payload), chunk_size):
+            chunk = payload[i:i + chunk_size]
+            buff.write(('%x\r\n' % len(chunk)).encode('ascii'))
+            buff.write(chunk)
+            buff.write(b'\r\n')
+
+        buff.write(b'0\r\n\r\n')
+        return buff.getvalue()
+
+    def write(self, filename):
+        """ Write the synthetic file to filename, return its size
+        """
+        with open(filename, 'wb') as out:
+            if self.arc:
+                self.write_arc(out)
+            else:
+                self.write_warc(out)
+
+        return os.path.getsize(filename)
+
+    def write_warc(self, out):
+        writer = WARCWriter(out, gzip=self.gzip)
+        writer.write_record(writer.create_warcinfo_record('synthetic.warc',
+                                                          {'software': 'warcio benchmarks'}))
+
+        for i in range(self.num_records):
+            uri = 'http://example.com/page/{0}'.format(i)
+            payload, headers = self.encode_payload(self.make_payload(self.record_size))
+
+            req_headers = StatusAndHeaders('GET /page/{0} HTTP/1.1'.format(i),
+                                           [('Host', 'example.com'), ('User-Agent', 'warcio')],
+                                           is_http_request=True)
+
+            req = writer.create_warc_record(uri, 'request', http_headers=req_headers)
+
+            http_headers = StatusAndHeaders('200 OK', headers, protocol='HTTP/1.1')
+            resp = writer.create_warc_record(uri, 'response',
+                                             payload=BytesIO(payload),
+                                             length=len(payload),
+                                             http_headers=http_headers)
+
+            writer.write_request_response_pair(req, resp)
+
+    def write_arc(self, out):
+        self._write_arc_record(out, b'filedesc://synthetic.arc 127.0.0.1 20200101000000 text/plain',
+                               b'1 0 warcio benchmarks\nURL IP-address Archive-date Content-type Archive-length\n')
+
+        for i in range(self.num_records):
+            payload, headers = self.encode_payload(self.make_payload(self.record_size))
+            http_headers = StatusAndHeaders('200 OK', headers, protocol='HTTP/1.1')
+
+            url = 'http://example.com/page/{0}'.format(i)
+            header = '{0} 127.0.0.1 20200101000000 text/html'.format(url).encode('ascii')
+            self._write_arc_record(out, header, http_headers.to_bytes() + payload)
+
+    def _write_arc_record(self, out, header, content):
+        if self.gzip:
+            out = GzippingWrapper(out)
+
+        out.write(header + b' ' + str(len(content)).encode('ascii') + b'\n')
+        out.write(content)
+        out.write(b'\n')
+        out.flush()
+
+
+# ============================================================================
+# shapes of synthetic files, scaled by the WARCIO_BENCH_SCALE env var
+SCALE = float(os.environ.get('WARCIO_BENCH_SCALE', '1'))
+
+SHAPES = {
+    'small': dict(num_records=int(2000 * SCALE), record_size=1024),
+    'large': dict(num_records=max(1, int(4 * SCALE)), record_size=8 * 1024 * 1024),
+    'chunked': dict(num_records=int(500 * SCALE), record_size=32 * 1024, chunked=True),
+    'brotli': dict(num_records=int(500 * SCALE), record_size=32 * 1024, encoding='br'),
+    'arc': dict(num_records=int(2000 * SCALE), record_size=1024, arc=True),
+}
@@ -0,0 +1,54 @@
+from warcio.archiveiterator import ArchiveIterator
+
+
+# ============================================================================
+def read_all(filename, **kwargs):
+    count = 0
+    with open(filename, 'rb') as fh:
+        for record in ArchiveIterator(fh, **kwargs):
+            stream = record.content_stream()
+            while stream.read(16384):
+                pass
+
+            count += 1
+
+    return count
+
+
+def read_headers(filename):
+    with open(filename, 'rb') as fh:
+        return sum(1 for record in ArchiveIterator(fh))
+
+
+# ============================================================================
+def test_read_records(measure, synthetic):
+    count = measure(lambda: read_all(synthetic.filename),
+                    synthetic.size, synthetic.num_records)
+
+    assert count == synthetic.num_records
+
+
+def test_read_headers_only(measure, synthetic):
+    count = measure(lambda: read_headers(synthetic.filename),
+                    synthetic.size, synthetic.num_records)
+
+    assert count == synthetic.num_records
+
+
+def test_read_check_digests(measure, synthetic_warc):
+    count = measure(lambda: read_all(synthetic_warc.filename, check_digests=True),
+                    synthetic_warc.size, synthetic_warc.num_records)
+
+    assert count == synthetic_warc.num_records
+
+
+def read_batches(filename):
+    with open(filename, 'rb') as fh:
+        return sum(len(batch) for batch in ArchiveIterator(fh).iter_batches(1000))
+
+
+def test_read_batches(measure, synthetic):
+    count = measure(lambda: read_batches(synthetic.filename),
+                    synthetic.size, synthetic.num_records)
+
+    assert count == synthetic.num_records
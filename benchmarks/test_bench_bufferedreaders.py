@@ -0,0 +1,32 @@
+from warcio.bufferedreaders import ChunkedDataReader
+from warcio.limitreader import LimitReader
+
+from .generators import SyntheticWARC
+
+from io import BytesIO
+
+import pytest
+
+
+# ============================================================================
+SIZE = 4 * 1024 * 1024
+
+
+@pytest.mark.parametrize('chunk_size', [10, 16, 1024, 65536])
+@pytest.mark.parametrize('bounded', [True, False], ids=['limit', 'unbounded'])
+def test_dechunk(measure, chunk_size, bounded):
+    data = SyntheticWARC.chunk(b'x' * SIZE, chunk_size)
+
+    # bounded to the record, as by content_stream(), or read exactly
+    def open_stream():
+        if bounded:
+            return LimitReader(BytesIO(data), len(data))
+
+        return BytesIO(data)
+
+    def dechunk():
+        reader = ChunkedDataReader(open_stream())
+        while reader.read(65536):
+            pass
+
+    measure(dechunk, len(data), SIZE // chunk_size)
@@ -0,0 +1,54 @@
+from warcio.statusandheaders import StatusAndHeadersParser
+
+from io import BytesIO
+
+
+# ============================================================================
+HTTP_HEADERS = b'\r\n'.join([
+    b'HTTP/1.1 200 OK',
+    b'Accept-Ranges: bytes',
+    b'Cache-Control: max-age=604800',
+    b'Content-Type: text/html; charset=UTF-8',
+    b'Date: Mon, 06 Mar 2017 04:02:06 GMT',
+    b'Etag: "359670651+gzip"',
+    b'Expires: Mon, 13 Mar 2017 04:02:06 GMT',
+    b'Last-Modified: Fri, 09 Aug 2013 23:54:35 GMT',
+    b'Server: ECS (iad/182A)',
+    b'Vary: Accept-Encoding',
+    b'X-Cache: HIT',
+    b'Content-Length: 1270',
+    b'Connection: close',
+    b'', b''])
+
+WARC_HEADERS = b'\r\n'.join([
+    b'WARC/1.0',
+    b'WARC-Type: response',
+    b'WARC-Record-ID: <urn:uuid:a9c51e3e-0221-11e7-bf66-0242ac120005>',
+    b'WARC-Target-URI: http://example.com/',
+    b'WARC-Date: 2017-03-06T04:02:06Z',
+    b'WARC-Payload-Digest: sha1:G7HRM7BGOKSKMSXZAHMUQTTV53QOFSMK',
+    b'WARC-Block-Digest: sha1:OS3OKGCWQIJOAOC3PKXQOQFD52NECQ74',
+    b'Content-Type: application/http; msgtype=response',
+    b'Content-Length: 975',
+    b'', b''])
+
+COUNT = 10000
+
+
+# ============================================================================
+def parse_all(parser, data):
+    stream = BytesIO(data * COUNT)
+    for i in range(COUNT):
+        parser.parse(stream)
+
+
+def test_parse_http_headers(measure):
+    parser = StatusAndHeadersParser([], verify=False)
+    measure(lambda: parse_all(parser, HTTP_HEADERS),
+            len(HTTP_HEADERS) * COUNT, COUNT)
+
+
+def test_parse_warc_headers(measure):
+    parser = StatusAndHeadersParser(['WARC/1.0', 'WARC/1.1'])
+    measure(lambda: parse_all(parser, WARC_HEADERS),
+            len(WARC_HEADERS) * COUNT, COUNT)
@@ -0,0 +1,36 @@
+from warcio.checker import Checker
+from warcio.indexer import Indexer
+from warcio.recompressor import Recompressor
+
+from argparse import Namespace
+
+import os
+
+
+# ============================================================================
+def test_checker(measure, synthetic_warc):
+    def check():
+        checker = Checker(Namespace(inputs=[synthetic_warc.filename], verbose=False))
+        return checker.process_all()
+
+    assert measure(check, synthetic_warc.size, synthetic_warc.num_records) == 0
+
+
+def test_indexer(measure, synthetic):
+    def index():
+        indexer = Indexer('offset,length,warc-type,warc-target-uri,http:status',
+                          [synthetic.filename], os.devnull)
+        indexer.process_all()
+
+    measure(index, synthetic.size, synthetic.num_records)
+
+
+def test_recompressor(measure, synthetic, tmp_path):
+    output = str(tmp_path.joinpath('recompressed.warc.gz'))
+    recompressor = Recompressor(synthetic.filename, output)
+
+    def recompress():
+        with open(synthetic.filename, 'rb') as stream:
+            return recompressor.load_and_write(stream, output)
+
+    assert measure(recompress, synthetic.size, synthetic.num_records) == synthetic.num_records
@@ -0,0 +1,34 @@
+from warcio.warcwriter import WARCWriter
+from warcio.statusandheaders import StatusAndHeaders
+
+from .generators import SyntheticWARC
+
+from io import BytesIO
+
+import pytest
+
+
+# ============================================================================
+@pytest.mark.parametrize('num_records, record_size', [(2000, 1024), (4, 8 * 1024 * 1024)],
+                         ids=['small', 'large'])
+@pytest.mark.parametrize('gzip', [True, False], ids=['gzip', 'plain'])
+def test_write_records(measure, num_records, record_size, gzip):
+    payload = SyntheticWARC().make_payload(record_size)
+    headers = [('Content-Type', 'text/html'), ('Content-Length', str(record_size))]
+
+    def write_all():
+        out = BytesIO()
+        writer = WARCWriter(out, gzip=gzip)
+
+        for i in range(num_records):
+            http_headers = StatusAndHeaders('200 OK', headers, protocol='HTTP/1.1')
+            record = writer.create_warc_record('http://example.com/page/{0}'.format(i),
+                                               'response',
+                                               payload=BytesIO(payload),
+                                               length=record_size,
+                                               http_headers=http_headers)
+            writer.write_record(record)
+
+        return out.tell()
+
+    assert measure(write_all, num_records * record_size, num_records) > 0
@@ -12,7 +12,7 @@ setup(
     author='Ilya Kreymer',
     author_email='ikreymer@gmail.com',
     license='Apache 2.0',
-    packages=find_packages(exclude=['test']),
+    packages=find_packages(exclude=['test', 'benchmarks']),
     url='https://github.com/webrecorder/warcio',
     description='Streaming WARC (and ARC) IO library',
     long_description=open('README.rst').read(),
@@ -44,11 +44,25 @@ setup(
             'flask',
             'flask_cors',
             'botocore',
+            'pyarrow',
+            'zstandard',
         ],
         'all': [
-            'brotlipy',
+            'brotli',
+            'zstandard',
             'warcio[s3]',
         ],
+        'arrow': [
+            'pyarrow',
+        ],
+        'zstd': [
+            'zstandard',
+        ],
+        'benchmark': [
+            'pytest',
+            'pytest-benchmark',
+            'brotli',
+        ],
         's3': [
             'fsspec',
             's3fs',
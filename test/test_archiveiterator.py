@@ -254,6 +254,61 @@ Content-Length: 1303\r\n'
         assert buff.startswith('<!doctype html>')
         assert 'Internet Assigned Numbers Authority' in buff
 
+    @pytest.mark.parametrize('filename', ['example.warc.gz', 'example.warc', 'example.arc.gz',
+                                          'example-iana.org-chunked.warc'])
+    def test_lazy_http_headers(self, filename):
+        def read_records(**kwargs):
+            with open(get_test_file(filename), 'rb') as fh:
+                it = ArchiveIterator(fh, arc2warc=True, **kwargs)
+                return [(record.rec_type, str(record.http_headers), record.payload_length,
+                         record.content_stream().read(), it.get_record_offset(), it.get_record_length())
+                        for record in it]
+
+        assert read_records(lazy_http_headers=True) == read_records()
+
+    def test_lazy_http_headers_skipped(self):
+        with open(get_test_file('example.warc.gz'), 'rb') as fh:
+            it = ArchiveIterator(fh, lazy_http_headers=True)
+            offsets = []
+            for record in it:
+                assert record._http_headers is None
+                assert record.http_headers_loader
+
+                # http headers not parsed, and included in raw stream
+                if record.rec_type == 'request':
+                    assert record.raw_stream.read().startswith(b'GET / HTTP/1.0\r\n')
+                    offsets.append(it.get_record_offset())
+
+                elif record.rec_type == 'response':
+                    assert record.http_headers.get_statuscode() == '200'
+                    assert record.payload_length == 606
+                    assert record.http_headers_loader is None
+
+        assert offsets == [2012, 3207]
+
+    def test_lazy_http_headers_after_read(self):
+        with self._find_first_by_type('example.warc', 'response', lazy_http_headers=True) as record:
+            record.raw_stream.read(10)
+            with pytest.raises(Exception) as e:
+                record.http_headers
+
+            assert 'record stream already read' in str(e.value)
+
+    def test_lazy_http_headers_ensure(self):
+        with self._find_first_by_type('example-resource.warc.gz', 'resource',
+                                      lazy_http_headers=True, ensure_http_headers=True) as record:
+            assert record.http_headers.get_header('Content-Type') == record.content_type
+
+    def test_lazy_http_headers_check_digests(self):
+        # parsed at once, to check payload digest
+        with self._find_first_by_type('example.warc.gz', 'response',
+                                      lazy_http_headers=True, check_digests=True) as record:
+            assert record.http_headers_loader is None
+            assert record.http_headers.get_statuscode() == '200'
+
+            record.content_stream().read()
+            assert record.digest_checker.passed is True
+
     def test_bad_warc(self):
         with pytest.raises(ArchiveLoadFailed):
             self._load_archive('example-bad.warc.gz.bad')
@@ -0,0 +1,111 @@
+from warcio.bloomfilter import BloomFilter
+from warcio.dedup import DedupWARCWriter, LRUDigestStore
+from warcio.archiveiterator import ArchiveIterator
+from warcio.cli import main
+
+from . import get_test_file
+from .test_dedup import make_response, load_records
+
+from io import BytesIO
+
+import pytest
+
+
+# ============================================================================
+class TestBloomFilter(object):
+    def test_add_contains(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        assert bloom.num_hashes == 7
+
+        keys = ['sha1:{0:032d}'.format(i) for i in range(1000)]
+        for key in keys:
+            assert not bloom.add(key) or key in bloom
+
+        assert all(key in bloom for key in keys)
+        assert bloom.add(keys[0])
+
+        false_positives = sum(1 for i in range(1000) if 'sha1:other-{0}'.format(i) in bloom)
+        assert false_positives < 50
+
+    @pytest.mark.parametrize('use_mmap', [True, False])
+    def test_save_load(self, tmpdir, use_mmap):
+        filename = str(tmpdir.join('digests.bloom'))
+
+        bloom = BloomFilter(capacity=100)
+        bloom.add('sha1:A')
+        bloom.add('sha1:B')
+        bloom.save(filename)
+
+        loaded = BloomFilter.load(filename, use_mmap=use_mmap)
+        assert (loaded.num_bits, loaded.num_hashes, len(loaded)) == (bloom.num_bits, bloom.num_hashes, 2)
+        assert 'sha1:A' in loaded
+        assert 'sha1:C' not in loaded
+
+        # added in memory only
+        loaded.add('sha1:C')
+        assert 'sha1:C' in loaded
+        loaded.close()
+
+        assert 'sha1:C' not in BloomFilter.load(filename)
+
+    def test_load_invalid(self, tmpdir):
+        filename = tmpdir.join('invalid.bloom')
+        filename.write('not a bloom filter, but long enough')
+
+        with pytest.raises(Exception):
+            BloomFilter.load(str(filename))
+
+
+    @pytest.mark.parametrize('kwargs', [{'capacity': 0},
+                                        {'capacity': -1},
+                                        {'error_rate': 0},
+                                        {'error_rate': 1}])
+    def test_invalid_params(self, kwargs):
+        with pytest.raises(ValueError):
+            BloomFilter(**kwargs)
+
+    def test_keyword_only(self):
+        # extra positional args still passed to WARCWriter, eg. gzip
+        writer = DedupWARCWriter(BytesIO(), False)
+        assert writer.gzip is False
+        assert isinstance(writer.digest_store, LRUDigestStore)
+        assert writer.bloom_filter is None
+
+
+# ============================================================================
+def test_cli_bloom_invalid_capacity(tmpdir):
+    with pytest.raises(SystemExit) as e:
+        main(args=['bloom', '-o', str(tmpdir.join('digests.bloom')), '--capacity', '0',
+                   get_test_file('example.warc.gz')])
+
+    assert 'capacity' in str(e.value)
+
+
+def test_cli_bloom_dedup(tmpdir, capsys):
+    filename = str(tmpdir.join('digests.bloom'))
+    main(args=['bloom', '-o', filename, '--capacity', '100',
+               get_test_file('example.warc.gz'), get_test_file('example.arc')])
+
+    assert capsys.readouterr().out.startswith('2 digests added to bloom filter')
+
+    bloom = BloomFilter.load(filename)
+    assert 'sha1:G7HRM7BGOKSKMSXZAHMUQTTV53QOFSMK' in bloom
+
+    store = LRUDigestStore()
+    store.add('sha1:G7HRM7BGOKSKMSXZAHMUQTTV53QOFSMK', 'http://example.com/', '2017-03-06T04:02:06Z')
+
+    buff = BytesIO()
+    writer = DedupWARCWriter(buff, digest_store=store, bloom_filter=bloom, gzip=False)
+
+    with open(get_test_file('example.warc.gz'), 'rb') as fh:
+        it = ArchiveIterator(fh)
+        for record in it:
+            if record.rec_type == 'response':
+                writer.copy_record(it)
+
+    writer.write_record(make_response(writer, 'http://example.com/new', b'new'))
+    writer.write_record(make_response(writer, 'http://example.com/new2', b'new'))
+
+    assert [record.rec_type for record in load_records(buff)] == ['revisit', 'response', 'revisit']
+    assert writer.get_stats()['filter_skips'] == 1
+    assert (writer.hits, writer.misses) == (2, 1)
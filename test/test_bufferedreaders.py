@@ -98,6 +98,8 @@ from io import BytesIO
 from warcio.bufferedreaders import ChunkedDataReader, ChunkedDataException
 from warcio.bufferedreaders import DecompressingBufferedReader
 from warcio.limitreader import LimitReader
+from warcio.recordloader import ArcWarcRecord
+from warcio.statusandheaders import StatusAndHeaders
 
 from contextlib import closing
 
@@ -176,6 +178,182 @@ def test_err_chunk_cut_off():
 
 
 
+def chunk(payload, chunk_size):
+    return b''.join(b'%x\r\n%s\r\n' % (len(payload[i:i + chunk_size]), payload[i:i + chunk_size])
+                    for i in range(0, len(payload), chunk_size)) + b'0\r\n\r\n'
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 100, 50000])
+@pytest.mark.parametrize('block_size', [16, 1024, 16384])
+def test_chunked_sizes(chunk_size, block_size):
+    payload = b''.join(b'%d,' % i for i in range(2000))
+
+    c = ChunkedDataReader(BytesIO(chunk(payload, chunk_size) + b'extra'), block_size=block_size)
+    assert c.read() == payload
+
+    c = ChunkedDataReader(BytesIO(chunk(payload, chunk_size)), block_size=block_size)
+    assert b''.join(iter(lambda: c.read(7), b'')) == payload
+
+
+class NonEOFStream(BytesIO):
+    """ Stream with more data to come, eg. a keep-alive connection,
+    failing if asked for more than is available
+    """
+    def read(self, size=-1):
+        assert 0 < size <= len(self.getvalue()) - self.tell(), 'would block'
+        return BytesIO.read(self, size)
+
+    def readline(self, size=-1):
+        line = BytesIO.readline(self, size)
+        assert line, 'would block'
+        return line
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 100])
+def test_chunked_non_eof_stream(chunk_size):
+    payload = b'ABCDEFGHIJ' * 100
+    stream = NonEOFStream(chunk(payload, chunk_size) + b'NEXT')
+
+    c = ChunkedDataReader(stream)
+    assert c.read() == payload
+
+    # data after the chunked body not read
+    assert stream.read(4) == b'NEXT'
+
+
+@pytest.mark.parametrize('chunk_size', [1, 10, 10000])
+def test_chunked_bounded_block_reads(chunk_size):
+    payload = b'ABCDEFGHIJ' * 1000
+    data = chunk(payload, chunk_size)
+
+    reads = []
+
+    class CountingStream(BytesIO):
+        def read(self, size=-1):
+            reads.append(size)
+            return BytesIO.read(self, size)
+
+    # bounded to the record: read in blocks, not per chunk
+    c = ChunkedDataReader(LimitReader(CountingStream(data), len(data)), block_size=1024)
+    assert c.bounded
+    assert c.read() == payload
+    assert len(reads) <= len(data) // 1024 + 2
+
+    assert not ChunkedDataReader(BytesIO(data)).bounded
+
+
+def test_chunked_negative_size():
+    # empty chunk, then as before, terminator expected after the header
+    assert ChunkedDataReader(BytesIO(b'-7\r\n\r\n3\r\nabc\r\n0\r\n\r\n')).read() == b'abc'
+    assert ChunkedDataReader(BytesIO(b'-7\r\nabcdefg\r\n0\r\n\r\n')).read() == b'-7\r\ncdefg\r\n0\r\n\r\n'
+
+
+def test_chunked_error_after_chunks():
+    data = b'2\r\nAB\r\n3\r\nCDE\r\nXYZ\r\n1\r\nF\r\n'
+
+    # chunks before the error are returned, the rest as is
+    c = ChunkedDataReader(BytesIO(data))
+    assert c.read() == b'ABCDEXYZ\r\n1\r\nF\r\n'
+    assert c.not_chunked
+
+    c = ChunkedDataReader(BytesIO(data), raise_exceptions=True)
+    assert c.read(5) == b'ABCDE'
+    with pytest.raises(ChunkedDataException):
+        c.read()
+
+    # chunk terminator missing, terminator dropped as before
+    c = ChunkedDataReader(BytesIO(b'2\r\nAB\r\n3\r\nCDEFG4\r\n1234\r\n'))
+    assert c.read() == b'AB3\r\nCDE4\r\n1234\r\n'
+
+
+# Content-Encoding
+def make_record(payload, content_encoding=None, chunked=False):
+    headers = [('Content-Type', 'text/plain')]
+    if content_encoding:
+        headers.append(('Content-Encoding', content_encoding))
+
+    if chunked:
+        headers.append(('Transfer-Encoding', 'chunked'))
+        payload = b''.join(b'%x\r\n%s\r\n' % (len(payload[i:i + 7]), payload[i:i + 7])
+                           for i in range(0, len(payload), 7)) + b'0\r\n\r\n'
+
+    http_headers = StatusAndHeaders('200 OK', headers, protocol='HTTP/1.1')
+    return ArcWarcRecord('warc', 'response', None, BytesIO(payload), http_headers, None, len(payload))
+
+
+def brotli_compress(buff):
+    try:
+        import brotli
+    except ImportError:
+        import brotlicffi as brotli
+
+    return brotli.compress(buff)
+
+
+@pytest.mark.parametrize('chunked', [False, True])
+def test_content_encoding_multi(chunked):
+    payload = b'The quick brown fox jumps over the lazy dog\n' * 100
+    encoded = zlib.compress(compress(payload.decode('utf-8')))
+
+    # gzip applied first, then deflate
+    record = make_record(encoded, 'gzip, deflate', chunked)
+    assert record.get_content_encodings() == ['gzip', 'deflate']
+    assert record.content_stream().read() == payload
+
+
+@pytest.mark.skipif('br' not in DecompressingBufferedReader.DECOMPRESSORS, reason='brotli not available')
+@pytest.mark.parametrize('chunked', [False, True])
+def test_content_encoding_gzip_br(chunked):
+    payload = b'The quick brown fox jumps over the lazy dog\n' * 100
+
+    record = make_record(brotli_compress(compress(payload.decode('utf-8'))), 'x-gzip, identity, BR', chunked)
+    assert record.get_content_encodings() == ['gzip', 'br']
+    assert record.content_stream().read() == payload
+
+
+@pytest.mark.skipif('zstd' not in DecompressingBufferedReader.DECOMPRESSORS, reason='zstandard not available')
+@pytest.mark.parametrize('chunked', [False, True])
+def test_content_encoding_zstd(chunked):
+    import zstandard
+    payload = b'The quick brown fox jumps over the lazy dog\n' * 100
+
+    record = make_record(zstandard.ZstdCompressor().compress(payload), 'zstd', chunked)
+    assert record.content_stream().read() == payload
+
+
+@pytest.mark.skipif('zstd' not in DecompressingBufferedReader.DECOMPRESSORS, reason='zstandard not available')
+@pytest.mark.parametrize('chunked', [False, True])
+def test_content_encoding_zstd_frames(chunked):
+    import zstandard
+    compressor = zstandard.ZstdCompressor()
+    payload = b'The quick brown fox jumps over the lazy dog\n' * 100
+
+    # each part in its own frame, all decoded
+    encoded = b''.join(compressor.compress(payload[i:i + 1000]) for i in range(0, len(payload), 1000))
+
+    record = make_record(encoded, 'zstd', chunked)
+    assert record.get_content_encodings() == ['zstd']
+    assert record.content_stream().read() == payload
+
+
+def test_content_encoding_unsupported():
+    encoded = compress('ABC')
+
+    # one encoding not supported, not decoded
+    record = make_record(encoded, 'gzip, x-unknown')
+    assert record.get_content_encodings() == []
+    assert record.content_stream().read() == encoded
+
+    record = make_record(encoded, 'gzip, x-unknown', chunked=True)
+    assert record.content_stream().read() == encoded
+
+    # internal decompression types are not http content-codings
+    for encoding in ('deflate_alt', 'zstd_frames'):
+        record = make_record(encoded, encoding)
+        assert record.get_content_encodings() == []
+        assert record.content_stream().read() == encoded
+
+
 def print_str(string):
     return string.decode('utf-8') if six.PY3 else string
 
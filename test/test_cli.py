@@ -6,8 +6,10 @@ from contextlib import contextmanager
 from io import BytesIO
 
 from warcio.exceptions import ArchiveLoadFailed
+from warcio.recompressor import Recompressor
 
 import pytest
+import subprocess
 import sys
 import tempfile
 import os
@@ -188,6 +190,48 @@ def test_recompress_arc2warc_verbose(capsys):
         assert '2 records read' in out
 
 
+def test_recompress_parallel_with_index(capsys, tmpdir):
+    test_file = get_test_file('example-bad-non-chunked.warc.gz')
+
+    serial = str(tmpdir.join('serial.warc.gz'))
+    main(args=['recompress', test_file, serial])
+
+    parallel = str(tmpdir.join('parallel.warc.gz'))
+    index = str(tmpdir.join('parallel.cdxj'))
+    main(args=['recompress', '-w', '3', '--index', index, test_file, parallel])
+    assert 'Compression Errors Found and Fixed!' in capsys.readouterr().out
+
+    # same output, with record ids and dates preserved
+    with open(serial, 'rb') as fh:
+        serial_contents = fh.read()
+
+    with open(parallel, 'rb') as fh:
+        assert fh.read() == serial_contents
+
+    main(args=['index', '-f', Recompressor.INDEX_FIELDS, parallel])
+    expected = capsys.readouterr().out
+
+    with open(index) as fh:
+        assert fh.read() == expected
+
+    assert expected.count('\n') == 6
+
+
+def test_recompress_index_fields(capsys, tmpdir):
+    output = str(tmpdir.join('output.warc.gz'))
+    index = str(tmpdir.join('output.jsonl'))
+    main(args=['recompress', '--index', index, '--index-fields', 'offset,filename,http:status',
+               get_test_file('example.arc.gz'), output])
+    assert 'No Errors Found!' in capsys.readouterr().out
+
+    main(args=['index', '-f', 'offset,filename,http:status', output])
+    expected = capsys.readouterr().out
+    assert '"filename": "output.warc.gz", "http:status": "200"' in expected
+
+    with open(index) as fh:
+        assert fh.read() == expected
+
+
 def test_recompress_bad_file():
     with named_temp() as temp:
         temp.write(b'abcdefg-not-a-warc\n')
@@ -222,6 +266,9 @@ def test_extract_warc_response(capsysbinary):
     res = main(args=['extract', '--headers', get_test_file('example.warc.gz'), '784'])
     assert capsysbinary.readouterr().out == b'WARC/1.0\r\nWARC-Target-URI: http://example.com/\r\nWARC-Date: 2017-03-06T04:02:06Z\r\nWARC-Type: response\r\nWARC-Record-ID: <urn:uuid:a9c51e3e-0221-11e7-bf66-0242ac120005>\r\nWARC-IP-Address: 93.184.216.34\r\nWARC-Block-Digest: sha1:DR5MBP7OD3OPA7RFKWJUD4CTNUQUGFC5\r\nWARC-Payload-Digest: sha1:G7HRM7BGOKSKMSXZAHMUQTTV53QOFSMK\r\nContent-Type: application/http; msgtype=response\r\nContent-Length: 975\r\n\r\nHTTP/1.1 200 OK\r\nContent-Encoding: gzip\r\nAccept-Ranges: bytes\r\nCache-Control: max-age=604800\r\nContent-Type: text/html\r\nDate: Mon, 06 Mar 2017 04:02:06 GMT\r\nEtag: "359670651+gzip"\r\nExpires: Mon, 13 Mar 2017 04:02:06 GMT\r\nLast-Modified: Fri, 09 Aug 2013 23:54:35 GMT\r\nServer: ECS (iad/182A)\r\nVary: Accept-Encoding\r\nX-Cache: HIT\r\nContent-Length: 606\r\nConnection: close\r\n\r\n'
 
+    res = main(args=['extract', '--headers', '--length', '1228', get_test_file('example.warc.gz'), '784'])
+    assert capsysbinary.readouterr().out.startswith(b'WARC/1.0\r\nWARC-Target-URI: http://example.com/\r\n')
+
     res = main(args=['extract', '--payload', get_test_file('example.warc.gz'), '784'])
     assert capsysbinary.readouterr().out == b'<!doctype html>\n<html>\n<head>\n    <title>Example Domain</title>\n\n    <meta charset="utf-8" />\n    <meta http-equiv="Content-type" content="text/html; charset=utf-8" />\n    <meta name="viewport" content="width=device-width, initial-scale=1" />\n    <style type="text/css">\n    body {\n        background-color: #f0f0f2;\n        margin: 0;\n        padding: 0;\n        font-family: "Open Sans", "Helvetica Neue", Helvetica, Arial, sans-serif;\n        \n    }\n    div {\n        width: 600px;\n        margin: 5em auto;\n        padding: 50px;\n        background-color: #fff;\n        border-radius: 1em;\n    }\n    a:link, a:visited {\n        color: #38488f;\n        text-decoration: none;\n    }\n    @media (max-width: 700px) {\n        body {\n            background-color: #fff;\n        }\n        div {\n            width: auto;\n            margin: 0 auto;\n            border-radius: 0;\n            padding: 1em;\n        }\n    }\n    </style>    \n</head>\n\n<body>\n<div>\n    <h1>Example Domain</h1>\n    <p>This domain is established to be used for illustrative examples in documents. You may use this\n    domain in examples without prior coordination or asking for permission.</p>\n    <p><a href="http://www.iana.org/domains/example">More information...</a></p>\n</div>\n</body>\n</html>\n'
 
@@ -240,6 +287,75 @@ def test_extract_arc(capsysbinary):
     #     res = main(args=['extract', get_test_file('example.arc'), '151'])
     #     assert buff.getvalue() == b'http://example.com/ 93.184.216.119 20140216050221 text/html 1591\nHTTP/1.1 200 OK\r\nAccept-Ranges: bytes\r\nCache-Control: max-age=604800\r\nContent-Type: text/html\r\nDate: Sun, 16 Feb 2014 05:02:20 GMT\r\nEtag: "359670651"\r\nExpires: Sun, 23 Feb 2014 05:02:20 GMT\r\nLast-Modified: Fri, 09 Aug 2013 23:54:35 GMT\r\nServer: ECS (sjc/4FCE)\r\nX-Cache: HIT\r\nx-ec-custom-error: 1\r\nContent-Length: 1270\r\n\r\n<!doctype html>\n<html>\n<head>\n    <title>Example Domain</title>\n\n    <meta charset="utf-8" />\n    <meta http-equiv="Content-type" content="text/html; charset=utf-8" />\n    <meta name="viewport" content="width=device-width, initial-scale=1" />\n    <style type="text/css">\n    body {\n        background-color: #f0f0f2;\n        margin: 0;\n        padding: 0;\n        font-family: "Open Sans", "Helvetica Neue", Helvetica, Arial, sans-serif;\n        \n    }\n    div {\n        width: 600px;\n        margin: 5em auto;\n        padding: 50px;\n        background-color: #fff;\n        border-radius: 1em;\n    }\n    a:link, a:visited {\n        color: #38488f;\n        text-decoration: none;\n    }\n    @media (max-width: 700px) {\n        body {\n            background-color: #fff;\n        }\n        div {\n            width: auto;\n            margin: 0 auto;\n            border-radius: 0;\n            padding: 1em;\n        }\n    }\n    </style>    \n</head>\n\n<body>\n<div>\n    <h1>Example Domain</h1>\n    <p>This domain is established to be used for illustrative examples in documents. You may use this\n    domain in examples without prior coordination or asking for permission.</p>\n    <p><a href="http://www.iana.org/domains/example">More information...</a></p>\n</div>\n</body>\n</html>\n'
 
+def get_import_times(code):
+    """ Run code with ``python -X importtime``, return the cumulative
+    import time, in seconds, of each imported module
+    """
+    res = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                         universal_newlines=True, check=True)
+
+    times = {}
+    for line in res.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+
+        _, cumulative, name = line.split('|')
+        try:
+            times[name.strip()] = int(cumulative) / 1000000.0
+        except ValueError:
+            pass
+
+    return times
+
+
+# heavy modules, which only some commands need
+LAZY_MODULES = ('fsspec', 'pyarrow', 'warcio.archiveiterator', 'warcio.indexer',
+                'warcio.extractor', 'warcio.recompressor', 'warcio.warcwriter')
+
+# generous, to allow for slow CI machines
+IMPORT_TIME_BUDGET = 0.1
+
+
+def test_cli_import_time():
+    times = get_import_times('import warcio.cli')
+
+    assert not any(name in times for name in LAZY_MODULES)
+    assert times['warcio.cli'] < IMPORT_TIME_BUDGET
+
+
+def test_cli_extract_local_no_fsspec(capsys):
+    code = 'from warcio.cli import main; main(["extract", "--headers", {0!r}, "0"])'
+    times = get_import_times(code.format(get_test_file('example.warc.gz')))
+
+    assert 'warcio.extractor' in times
+    assert 'fsspec' not in times
+    assert 'pyarrow' not in times
+    assert 'warcio.warcwriter' not in times
+
+
+def test_cli_index_json_no_pyarrow(capsys):
+    code = 'from warcio.cli import main; main(["index", {0!r}])'
+    times = get_import_times(code.format(get_test_file('example.warc.gz')))
+
+    assert 'warcio.indexer' in times
+    assert 'pyarrow' not in times
+    assert 'warcio.columnarindexer' not in times
+    assert 'warcio.incrementalindexer' not in times
+
+
+def test_lazy_package_imports():
+    times = get_import_times('import warcio')
+    assert 'warcio.archiveiterator' not in times
+
+    import warcio
+    from warcio.archiveiterator import ArchiveIterator
+    assert warcio.ArchiveIterator is ArchiveIterator
+
+    with pytest.raises(AttributeError):
+        warcio.NoSuchName
+
+
 # due to NamedTemporaryFile issue on Windows
 # see: https://bugs.python.org/issue14243#msg157925
 @contextmanager
@@ -0,0 +1,75 @@
+from warcio.collectionstats import CollectionStats
+from warcio.cli import main
+
+from . import get_test_file
+
+import json
+
+
+# ============================================================================
+def get_stats(capsys, *args):
+    main(args=['stats'] + list(args))
+    return json.loads(capsys.readouterr().out)
+
+
+# ============================================================================
+def test_file_stats(capsys):
+    filename = get_test_file('example.warc.gz')
+    result = get_stats(capsys, filename)
+
+    stats = result['files'][filename]
+    assert stats['records'] == 6
+    assert stats['types'] == {'warcinfo': 2, 'request': 2, 'response': 1, 'revisit': 1}
+    assert stats['mime'] == {'text/html': {'records': 1, 'bytes': 606}}
+    assert stats['status'] == {'200': {'records': 1, 'bytes': 606}}
+    assert stats['first_date'] == '2017-03-06T04:02:06Z'
+    assert stats['last_date'] == '2017-03-06T04:03:53Z'
+    assert stats['digests_passed'] == 3
+    assert stats['digests_failed'] == 0
+    assert stats['compressed_bytes'] == 3816
+    assert stats['uncompressed_bytes'] == 5332
+    assert stats['compression_ratio'] > 1
+    assert stats['errors'] == []
+
+    assert result['collection'] == stats
+
+
+def test_collection_stats(capsys):
+    inputs = [get_test_file(filename) for filename in
+              ('example.warc.gz', 'example.arc', 'example-digest.warc', 'example-trunc.warc')]
+
+    result = get_stats(capsys, *inputs)
+
+    assert list(result['files']) == inputs
+    assert result['files'][inputs[2]]['digests_failed'] == 1
+
+    collection = result['collection']
+    assert collection['records'] == sum(stats['records'] for stats in result['files'].values())
+    assert collection['types']['request'] == 7
+    assert collection['mime']['text/html']['records'] == 3
+    assert collection['first_date'] == '2014-02-16T05:02:21Z'
+    assert collection['last_date'] == '2017-03-06T04:03:53Z'
+    assert collection['digests_failed'] == 2
+
+    # same result processed in parallel
+    assert get_stats(capsys, '-j', '2', *inputs) == result
+
+
+def test_stats_errors(capsys):
+    filename = get_test_file('example-bad-non-chunked.warc.gz')
+    stats = get_stats(capsys, filename)['files'][filename]
+
+    assert stats['records'] == 1
+    assert stats['compressed_bytes'] >= 0
+    assert 'non-chunked gzip file detected' in stats['errors'][0]
+
+
+def test_stats_output(tmpdir, capsys):
+    output = str(tmpdir.join('stats.json'))
+    filename = get_test_file('example.arc.gz')
+
+    result = CollectionStats([filename], output).process_all()
+    assert capsys.readouterr().out == ''
+
+    assert json.loads(tmpdir.join('stats.json').read()) == json.loads(json.dumps(result))
+    assert result['files'][filename]['types'] == {'warcinfo': 1, 'response': 1}
@@ -0,0 +1,77 @@
+from warcio.cli import main
+from warcio.columnarindexer import ColumnarIndexer
+
+from . import get_test_file
+from .test_cli import named_temp
+
+from datetime import datetime, timezone
+
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+
+FIELDS = 'offset,length,warc-type,warc-target-uri,warc-date,http:status,http:content-type'
+
+
+def test_index_parquet():
+    with named_temp() as temp:
+        temp.close()
+        main(args=['index', '--format', 'parquet', '-f', FIELDS,
+                   '-o', temp.name, get_test_file('example.warc.gz')])
+
+        table = pq.read_table(temp.name)
+
+    assert table.num_rows == 6
+    assert table.schema.field('offset').type == pa.int64()
+    assert table.schema.field('length').type == pa.int64()
+    assert table.schema.field('warc-date').type == pa.timestamp('us', tz='UTC')
+    assert pa.types.is_dictionary(table.schema.field('http:status').type)
+    assert pa.types.is_dictionary(table.schema.field('http:content-type').type)
+
+    rows = table.to_pylist()
+    assert [row['offset'] for row in rows] == [0, 353, 784, 2012, 2621, 3207]
+    assert [row['length'] for row in rows] == [353, 431, 1228, 609, 586, 609]
+    assert [row['warc-type'] for row in rows] == ['warcinfo', 'warcinfo', 'response',
+                                                   'request', 'revisit', 'request']
+    assert [row['http:status'] for row in rows] == [None, None, '200', None, '200', None]
+
+    assert rows[2]['warc-target-uri'] == 'http://example.com/'
+    assert rows[2]['http:content-type'] == 'text/html'
+    assert rows[2]['warc-date'] == datetime(2017, 3, 6, 4, 2, 6, tzinfo=timezone.utc)
+
+
+def test_index_arrow_small_batches():
+    inputs = [get_test_file('example.warc.gz'), get_test_file('example.arc.gz')]
+    with named_temp() as temp:
+        temp.close()
+        indexer = ColumnarIndexer('offset,warc-type,warc-target-uri', inputs, temp.name,
+                                  format='arrow', batch_size=4)
+        indexer.process_all()
+
+        with pa.memory_map(temp.name) as source:
+            batches = list(pa.ipc.open_stream(source))
+            assert [batch.num_rows for batch in batches] == [4, 4]
+            table = pa.Table.from_batches(batches)
+
+    assert table.num_rows == 8
+    assert table.column('offset').to_pylist() == [0, 353, 784, 2012, 2621, 3207, 0, 171]
+    assert table.column('warc-type').to_pylist()[-2:] == ['warcinfo', 'response']
+
+
+def test_index_parquet_empty_input():
+    with named_temp() as empty:
+        empty.close()
+        with named_temp() as temp:
+            temp.close()
+            main(args=['index', '--format', 'parquet', '-o', temp.name, empty.name])
+            table = pq.read_table(temp.name)
+
+    assert table.num_rows == 0
+    assert table.column_names == ['offset', 'warc-type', 'warc-target-uri']
+
+
+def test_index_format_not_supported():
+    with pytest.raises(Exception):
+        ColumnarIndexer('offset', [], None, format='csv')
@@ -0,0 +1,126 @@
+from warcio.archiveiterator import ArchiveIterator
+from warcio.dedup import DedupWARCWriter, LRUDigestStore, SQLiteDigestStore, CDXJDigestStore
+from warcio.statusandheaders import StatusAndHeaders
+
+from . import get_test_file
+
+from io import BytesIO, StringIO
+
+
+# ============================================================================
+def make_response(writer, uri, payload, **warc_headers):
+    http_headers = StatusAndHeaders('200 OK', [('Content-Type', 'text/plain')], protocol='HTTP/1.0')
+
+    return writer.create_warc_record(uri, 'response',
+                                     payload=BytesIO(payload),
+                                     length=len(payload),
+                                     http_headers=http_headers,
+                                     warc_headers_dict=warc_headers)
+
+
+def load_records(buff):
+    return [record for record in ArchiveIterator(BytesIO(buff.getvalue()))
+            if record.raw_stream.read() is not None]
+
+
+# ============================================================================
+class TestDedupWriter(object):
+    def test_dedup_revisit(self):
+        buff = BytesIO()
+        writer = DedupWARCWriter(buff, gzip=False)
+
+        first = make_response(writer, 'http://example.com/', b'some text',
+                              **{'WARC-Date': '2020-01-01T00:00:00Z'})
+        first_id = first.rec_headers.get_header('WARC-Record-ID')
+        writer.write_record(first)
+
+        second = make_response(writer, 'http://example.com/b', b'some text',
+                               **{'WARC-Date': '2020-01-02T00:00:00Z',
+                                  'WARC-IP-Address': '127.0.0.1'})
+        second_id = second.rec_headers.get_header('WARC-Record-ID')
+        writer.write_record(second)
+
+        writer.write_record(make_response(writer, 'http://example.com/', b'other text'))
+
+        records = load_records(buff)
+        assert [record.rec_type for record in records] == ['response', 'revisit', 'response']
+
+        revisit = records[1].rec_headers
+        assert revisit.get_header('WARC-Record-ID') == second_id
+        assert revisit.get_header('WARC-Date') == '2020-01-02T00:00:00Z'
+        assert revisit.get_header('WARC-IP-Address') == '127.0.0.1'
+        assert revisit.get_header('WARC-Target-URI') == 'http://example.com/b'
+        assert revisit.get_header('WARC-Refers-To-Target-URI') == 'http://example.com/'
+        assert revisit.get_header('WARC-Refers-To-Date') == '2020-01-01T00:00:00Z'
+        assert revisit.get_header('WARC-Refers-To') == first_id
+        assert revisit.get_header('WARC-Payload-Digest') == records[0].rec_headers.get_header('WARC-Payload-Digest')
+        assert revisit.get_header('WARC-Profile').endswith('/revisit/identical-payload-digest')
+
+        assert records[1].http_headers.get_statuscode() == '200'
+
+        assert writer.get_stats() == {'hits': 1, 'misses': 2, 'hit_rate': 1 / 3.0, 'bytes_saved': 9}
+
+    def test_dedup_copy_from_iterator(self):
+        buff = BytesIO()
+        writer = DedupWARCWriter(buff, gzip=True)
+
+        for filename in ('example.warc.gz', 'example.warc.gz'):
+            with open(get_test_file(filename), 'rb') as fh:
+                it = ArchiveIterator(fh)
+                for record in it:
+                    writer.copy_record(it)
+
+        types = [record.rec_type for record in load_records(buff)]
+        assert types == ['warcinfo', 'warcinfo', 'response', 'request', 'revisit', 'request',
+                         'warcinfo', 'warcinfo', 'revisit', 'request', 'revisit', 'request']
+        assert (writer.hits, writer.misses) == (1, 1)
+
+    def test_lru_store(self):
+        store = LRUDigestStore(max_size=2)
+        store.add('sha1:A', 'http://example.com/a', '2020-01-01T00:00:00Z')
+        store.add('sha1:B', 'http://example.com/b', '2020-01-01T00:00:00Z')
+
+        assert store.lookup('sha1:A') == ('http://example.com/a', '2020-01-01T00:00:00Z', None)
+
+        store.add('sha1:C', 'http://example.com/c', '2020-01-01T00:00:00Z')
+        assert len(store) == 2
+        assert store.lookup('sha1:B') is None
+        assert store.lookup('sha1:A')
+
+    def test_sqlite_store(self, tmpdir):
+        filename = str(tmpdir.join('digests.sqlite'))
+
+        store = SQLiteDigestStore(filename)
+        buff = BytesIO()
+        writer = DedupWARCWriter(buff, digest_store=store, gzip=False)
+        writer.write_record(make_response(writer, 'http://example.com/', b'some text'))
+        store.close()
+
+        # second crawl, same store
+        store = SQLiteDigestStore(filename)
+        buff = BytesIO()
+        writer = DedupWARCWriter(buff, digest_store=store, gzip=False)
+        writer.write_record(make_response(writer, 'http://example.com/', b'some text'))
+        store.close()
+
+        assert [record.rec_type for record in load_records(buff)] == ['revisit']
+        assert (writer.hits, writer.misses) == (1, 0)
+
+    def test_cdxj_store(self, tmpdir):
+        cdxj = tmpdir.join('index.cdxj')
+        cdxj.write('''\
+com,example)/ 20170306040206 {"url": "http://example.com/", "mime": "text/html", "digest": "G7HRM7BGOKSKMSXZAHMUQTTV53QOFSMK"}
+com,example)/ 20170306040348 {"url": "http://example.com/", "mime": "warc/revisit", "digest": "sha1:ABC"}
+invalid line
+''')
+
+        store = CDXJDigestStore(str(cdxj))
+        assert store.lookup('sha1:G7HRM7BGOKSKMSXZAHMUQTTV53QOFSMK') == ('http://example.com/', '2017-03-06T04:02:06Z', None)
+        assert store.lookup('sha1:ABC') is None
+
+        store.load(StringIO('com,example)/a 20200101000000 {"url": "http://example.com/a", "digest": "sha1:DEF"}\n'))
+        assert store.lookup('sha1:DEF') == ('http://example.com/a', '2020-01-01T00:00:00Z', None)
+
+        # digests added are kept in memory
+        store.add('sha1:XYZ', 'http://example.com/x', '2020-01-01T00:00:00Z')
+        assert store.lookup('sha1:XYZ')
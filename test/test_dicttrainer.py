@@ -0,0 +1,109 @@
+from warcio.archiveiterator import ArchiveIterator
+from warcio.dicttrainer import DictTrainer
+from warcio.recompressor import Recompressor
+from warcio.statusandheaders import StatusAndHeaders
+from warcio.warcwriter import WARCWriter
+from warcio.cli import main
+
+from io import BytesIO, StringIO
+
+import pytest
+
+zstandard = pytest.importorskip('zstandard')
+
+
+# ============================================================================
+def write_warc(filename, num=300):
+    with open(filename, 'wb') as fh:
+        writer = WARCWriter(fh, gzip=True)
+
+        for i in range(num):
+            if i % 3 == 0:
+                content_type = 'image/png'
+                payload = b'\x89PNG' + bytes(bytearray(range(256))) * (i % 5)
+            else:
+                content_type = 'text/html'
+                payload = ('<!doctype html><html><head><title>Page {0}</title></head>'
+                           '<body><p>Some text on page {0}</p></body></html>'.format(i)).encode('utf-8')
+
+            http_headers = StatusAndHeaders('200 OK', [('Content-Type', content_type),
+                                                       ('Content-Length', str(len(payload)))],
+                                            protocol='HTTP/1.0')
+
+            record = writer.create_warc_record('http://example.com/page/{0}'.format(i), 'response',
+                                               payload=BytesIO(payload),
+                                               http_headers=http_headers)
+            writer.write_record(record)
+
+
+# ============================================================================
+class TestDictTrainer(object):
+    def test_train(self, tmpdir):
+        warc = str(tmpdir.join('input.warc.gz'))
+        write_warc(warc)
+
+        output = str(tmpdir.join('warc.dict'))
+        out = StringIO()
+        report = DictTrainer([warc], output, dict_size=8192, holdout=0.2).train(out=out)
+
+        assert report['mime'] == {'image/png': 100, 'text/html': 200}
+        assert report['samples'] + report['holdout_samples'] == 300
+        assert report['holdout_samples'] == 60
+
+        with open(output, 'rb') as fh:
+            data = fh.read()
+
+        assert len(data) == report['dict_size'] <= 8192
+
+        # dictionary improves compression of small records
+        assert report['zstd_dict']['ratio'] > report['zstd']['ratio']
+        assert report['zstd_dict']['bytes'] == report['gzip']['bytes']
+
+        assert 'zstd -3 + dict' in out.getvalue()
+
+        # records compressed with the dictionary
+        recompressed = str(tmpdir.join('output.warc.zst'))
+        Recompressor(warc, recompressed, compression='zstd', zstd_dict=data).recompress()
+
+        with open(recompressed, 'rb') as fh:
+            assert len(list(ArchiveIterator(fh))) == 300
+
+    def test_samples_per_mime(self, tmpdir):
+        warc = str(tmpdir.join('input.warc.gz'))
+        write_warc(warc)
+
+        trainer = DictTrainer([warc], str(tmpdir.join('warc.dict')), samples_per_mime=20)
+        with open(warc, 'rb') as fh:
+            for record in ArchiveIterator(fh):
+                trainer.add_record(record)
+
+        assert trainer.buckets['text/html'][0] == 200
+        assert len(trainer.buckets['text/html'][1]) == 20
+        assert len(trainer.buckets['image/png'][1]) == 20
+
+        # payload of compressed type not included
+        assert all(sample.endswith(b'\r\n\r\n') for sample in trainer.buckets['image/png'][1])
+        assert all(sample.endswith(b'</html>') for sample in trainer.buckets['text/html'][1])
+
+    def test_cli(self, tmpdir, capsys):
+        warc = str(tmpdir.join('input.warc.gz'))
+        write_warc(warc)
+
+        output = str(tmpdir.join('warc.dict'))
+        main(['train-dict', warc, '-o', output, '-s', '8K'])
+
+        out = capsys.readouterr().out
+        assert 'Dictionary of ' in out
+        assert 'gzip -9' in out
+
+        main(['recompress', '--to', 'zstd', '--dict', output, warc, str(tmpdir.join('output.warc.zst'))])
+
+    def test_cli_no_records(self, tmpdir):
+        empty = str(tmpdir.join('empty.warc'))
+        open(empty, 'wb').close()
+
+        with pytest.raises(SystemExit) as e:
+            main(['train-dict', empty, '-o', str(tmpdir.join('warc.dict'))])
+
+        assert 'No records' in str(e.value)
+
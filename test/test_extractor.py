@@ -0,0 +1,192 @@
+from warcio.extractor import BatchExtractor
+from warcio.cli import main
+from warcio.utils import HAS_FSSPEC, fsspec_open
+
+from . import get_test_file
+
+from io import StringIO
+
+import os
+import shutil
+import tarfile
+import zipfile
+
+import pytest
+
+
+# ============================================================================
+@pytest.fixture
+def memory_warc():
+    if not HAS_FSSPEC:
+        pytest.skip('requires fsspec')
+
+    from fsspec.implementations.memory import MemoryFileSystem
+
+    with open(get_test_file('example.warc.gz'), 'rb') as fh:
+        with fsspec_open('memory://warcio-test/example.warc.gz', 'wb') as out:
+            out.write(fh.read())
+
+    yield 'memory://warcio-test/example.warc.gz'
+
+    MemoryFileSystem.store.pop('/warcio-test/example.warc.gz', None)
+
+
+# ============================================================================
+class TestBatchExtractor(object):
+    def test_load_entries(self):
+        lines = StringIO("""\
+{"offset": "784", "length": "1228", "filename": "a.warc.gz"}
+
+a.warc.gz 0
+b.warc.gz 10 20
+""")
+        assert BatchExtractor.load_entries(lines) == [('a.warc.gz', '784', '1228'),
+                                                      ('a.warc.gz', '0'),
+                                                      ('b.warc.gz', '10', '20')]
+
+    def test_group_by_file(self):
+        entries = [('b', '10'), ('a', 784, 1228), ('a', '0', '353'), ('a', 784, 1228)]
+        extractor = BatchExtractor(entries, None)
+        groups = extractor.group_by_file()
+        assert list(groups.items()) == [('b', [(10, None)]),
+                                        ('a', [(0, 353), (784, 1228)])]
+
+    def test_coalesce_local(self):
+        extractor = BatchExtractor([], None)
+        entries = [(0, 353), (784, 1228)]
+        assert extractor.coalesce('/path/to/a.warc.gz', entries) == [(0, None, entries)]
+
+    def test_coalesce_remote(self):
+        extractor = BatchExtractor([], None, max_gap=100)
+        entries = [(0, 353), (353, 431), (784, 1228), (2200, 100), (5000, None)]
+
+        assert extractor.coalesce('s3://bucket/a.warc.gz', entries) == [
+            (0, 2012, [(0, 353), (353, 431), (784, 1228)]),
+            (2200, 100, [(2200, 100)]),
+            (5000, None, [(5000, None)]),
+        ]
+
+    def test_extract_remote_coalesced(self, memory_warc, tmpdir, monkeypatch):
+        from fsspec.implementations.memory import MemoryFileSystem
+
+        ranges = []
+        orig_cat_file = MemoryFileSystem.cat_file
+
+        def cat_file(self, path, start=None, end=None, **kwargs):
+            ranges.append((start, end))
+            return orig_cat_file(self, path, start=start, end=end, **kwargs)
+
+        monkeypatch.setattr(MemoryFileSystem, 'cat_file', cat_file)
+
+        entries = [(memory_warc, 2621, 586), (memory_warc, 784, 1228), (memory_warc, 2012, 609)]
+        output = str(tmpdir.join('out'))
+
+        assert BatchExtractor(entries, output).extract(False, True) == 3
+
+        # adjacent records fetched with one request
+        assert ranges == [(784, 3207)]
+
+        assert sorted(os.listdir(output)) == ['example.warc.gz-2012.headers',
+                                              'example.warc.gz-2621.headers',
+                                              'example.warc.gz-784.headers']
+
+        with open(os.path.join(output, 'example.warc.gz-2621.headers'), 'rb') as fh:
+            assert b'WARC-Type: revisit\r\n' in fh.read()
+
+
+# ============================================================================
+def test_cli_extract_batch_dir(tmpdir, capsys):
+    warc = get_test_file('example.warc.gz')
+    arc = get_test_file('example.arc')
+
+    batch = tmpdir.join('batch.txt')
+    batch.write('{0} 784\n{1} 151\n{0} 0 353\n'.format(warc, arc))
+
+    output = str(tmpdir.join('out'))
+    main(args=['extract', '--payload', '--batch', str(batch), '-o', output])
+
+    assert sorted(os.listdir(output)) == ['example.arc-151.payload',
+                                          'example.warc.gz-0.payload',
+                                          'example.warc.gz-784.payload']
+
+    with open(os.path.join(output, 'example.warc.gz-784.payload'), 'rb') as fh:
+        warc_payload = fh.read()
+
+    with open(os.path.join(output, 'example.arc-151.payload'), 'rb') as fh:
+        arc_payload = fh.read()
+
+    assert warc_payload.startswith(b'<!doctype html>')
+    assert warc_payload == arc_payload
+
+    with open(os.path.join(output, 'example.warc.gz-0.payload'), 'rb') as fh:
+        assert fh.read().startswith(b'software: Webrecorder Platform v3.7\r\n')
+
+
+def test_extract_batch_same_basename(tmpdir):
+    warc = get_test_file('example.warc.gz')
+    other_dir = tmpdir.mkdir('other')
+    other = str(other_dir.join('example.warc.gz'))
+    shutil.copy(get_test_file('example.warc'), other)
+
+    # same basename and offset, different files
+    entries = [(warc, 0), (other, 0), (other, 1197), (get_test_file('example.arc'), 151)]
+    extractor = BatchExtractor(entries, str(tmpdir.join('out')))
+    assert extractor.extract(True, False) == 4
+
+    prefixes = extractor.get_name_prefixes()
+    assert prefixes[get_test_file('example.arc')] == 'example.arc'
+    assert prefixes[warc].startswith('example.warc.gz-')
+    assert prefixes[other].startswith('example.warc.gz-')
+    assert prefixes[warc] != prefixes[other]
+
+    names = sorted(os.listdir(str(tmpdir.join('out'))))
+    assert names == sorted(['example.arc-151.payload',
+                            prefixes[warc] + '-0.payload',
+                            prefixes[other] + '-0.payload',
+                            prefixes[other] + '-1197.payload'])
+
+    with open(str(tmpdir.join('out', prefixes[other] + '-1197.payload')), 'rb') as fh:
+        assert fh.read().startswith(b'<!doctype html>')
+
+
+def test_cli_extract_batch_index(tmpdir, capsysbinary):
+    warc = get_test_file('example.warc.gz')
+
+    index = tmpdir.join('index.jsonl')
+    main(args=['index', '-f', 'offset,length', '-o', str(index), warc])
+
+    # add full path to each index line
+    lines = index.read().splitlines()
+    index.write(''.join(line[:-1] + ', "filename": "{0}"}}\n'.format(warc) for line in lines))
+
+    output = str(tmpdir.join('out.tar.gz'))
+    main(args=['extract', '--batch', str(index), '-o', output])
+
+    main(args=['extract', warc, '784'])
+    expected = capsysbinary.readouterr().out
+
+    with tarfile.open(output) as tar:
+        assert len(tar.getnames()) == 6
+        assert tar.extractfile('example.warc.gz-784.warc').read() == expected
+
+
+def test_cli_extract_batch_zip(tmpdir):
+    warc = get_test_file('example.warc')
+
+    batch = tmpdir.join('batch.txt')
+    batch.write('{0} 1197\n{0} 2566\n'.format(warc))
+
+    output = str(tmpdir.join('out.zip'))
+    main(args=['extract', '--headers', '--batch', str(batch), '-o', output])
+
+    with zipfile.ZipFile(output) as zf:
+        assert zf.namelist() == ['example.warc-1197.headers', 'example.warc-2566.headers']
+        assert b'WARC-Type: request\r\n' in zf.read('example.warc-2566.headers')
+
+
+def test_cli_extract_errors():
+    with pytest.raises(SystemExit):
+        main(args=['extract', get_test_file('example.warc')])
+
+    with pytest.raises(SystemExit):
+        main(args=['extract', '--batch', '-'])
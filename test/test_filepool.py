@@ -0,0 +1,217 @@
+from warcio.filepool import WARCFilePool
+from warcio.extractor import Extractor
+from warcio.archiveiterator import ArchiveIterator
+
+from . import get_test_file
+from .test_extractor import memory_warc
+
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import shutil
+
+import pytest
+
+
+# ============================================================================
+def read_uri(pool, filename, offset):
+    with pool.open(get_test_file(filename), offset) as fh:
+        record = next(iter(ArchiveIterator(fh)))
+        return record.rec_headers.get_header('WARC-Target-URI')
+
+
+# ============================================================================
+class TestFilePool(object):
+    def test_reuse(self):
+        pool = WARCFilePool()
+
+        assert read_uri(pool, 'example.warc.gz', 784) == 'http://example.com/'
+        assert read_uri(pool, 'example.warc.gz', 0) is None
+        assert read_uri(pool, 'example.warc', 1197) == 'http://example.com/'
+
+        stats = pool.get_stats()
+        assert (stats['hits'], stats['misses'], stats['open']) == (1, 2, 2)
+        assert stats['hit_rate'] == 1 / 3.0
+
+        pool.close()
+        assert pool.get_stats()['open'] == 0
+
+    def test_nested_opens(self):
+        pool = WARCFilePool()
+        filename = get_test_file('example.warc.gz')
+
+        with pool.open(filename, 784) as fh:
+            with pool.open(filename, 2012) as fh2:
+                assert fh is not fh2
+
+        assert pool.get_stats()['open'] == 2
+
+        # both reused
+        with pool.open(filename) as fh:
+            with pool.open(filename) as fh2:
+                pass
+
+        assert pool.get_stats()['hits'] == 2
+        pool.close()
+
+    def test_evict_max_open(self):
+        pool = WARCFilePool(max_open=2)
+
+        for filename in ('example.warc.gz', 'example.warc', 'example.arc', 'example.warc.gz'):
+            read_uri(pool, filename, 0)
+
+        stats = pool.get_stats()
+        assert stats['open'] == 2
+        assert stats['evictions'] == 2
+        assert stats['hits'] == 0
+
+        # most recently used kept
+        assert list(pool.idle) == [get_test_file('example.arc'), get_test_file('example.warc.gz')]
+        pool.close()
+
+    def test_evict_max_bytes(self):
+        pool = WARCFilePool(max_bytes=1)
+        read_uri(pool, 'example.warc.gz', 0)
+
+        assert pool.get_stats()['open'] == 0
+        assert pool.get_stats()['evictions'] == 1
+
+    def test_error_not_reused(self):
+        pool = WARCFilePool()
+
+        with pytest.raises(ValueError):
+            with pool.open(get_test_file('example.warc.gz')) as fh:
+                raise ValueError()
+
+        assert fh.closed
+        assert pool.get_stats()['open'] == 0
+
+    def test_invalidate(self):
+        pool = WARCFilePool()
+        read_uri(pool, 'example.warc.gz', 0)
+        read_uri(pool, 'example.warc', 0)
+
+        pool.invalidate(get_test_file('example.warc.gz'))
+        assert pool.get_stats()['open'] == 1
+        assert list(pool.idle) == [get_test_file('example.warc')]
+        pool.close()
+
+    def test_file_changed(self, tmpdir):
+        pool = WARCFilePool(revalidate=0)
+        filename = str(tmpdir.join('example.warc.gz'))
+        shutil.copy(get_test_file('example.warc.gz'), filename)
+
+        with pool.open(filename, 784) as fh:
+            old_fh = fh
+
+        with open(filename, 'ab') as fh:
+            fh.write(b'\n')
+
+        # changed since opened, not reused
+        with pool.open(filename, 784) as fh:
+            assert fh is not old_fh
+
+        assert old_fh.closed
+        stats = pool.get_stats()
+        assert (stats['hits'], stats['misses'], stats['open']) == (0, 2, 1)
+
+        with pool.open(filename, 784) as fh:
+            pass
+
+        assert pool.get_stats()['hits'] == 1
+        pool.close()
+
+    def test_revalidate(self, tmpdir, monkeypatch):
+        import warcio.filepool
+
+        stats = []
+        orig_get_file_version = warcio.filepool.get_file_version
+
+        def get_file_version(filename):
+            stats.append(filename)
+            return orig_get_file_version(filename)
+
+        now = [1000.0]
+        monkeypatch.setattr(warcio.filepool, 'get_file_version', get_file_version)
+        monkeypatch.setattr(warcio.filepool.time, 'monotonic', lambda: now[0])
+
+        pool = WARCFilePool(revalidate=5)
+        filename = str(tmpdir.join('example.warc.gz'))
+        shutil.copy(get_test_file('example.warc.gz'), filename)
+
+        for i in range(3):
+            with pool.open(filename, 784) as fh:
+                pass
+
+        # checked once, handle reused
+        assert len(stats) == 1
+        assert pool.get_stats()['hits'] == 2
+
+        with open(filename, 'ab') as fh:
+            fh.write(b'\n')
+
+        # change not seen until revalidated
+        with pool.open(filename, 784) as fh:
+            pass
+
+        assert pool.get_stats()['hits'] == 3
+
+        now[0] += 5
+        with pool.open(filename, 784) as fh:
+            pass
+
+        assert len(stats) == 2
+        assert pool.get_stats()['misses'] == 2
+        pool.close()
+
+    def test_concurrent(self):
+        pool = WARCFilePool(max_open=4)
+        offsets = [0, 353, 784, 2012, 2621, 3207] * 10
+
+        def get_type(offset):
+            with pool.open(get_test_file('example.warc.gz'), offset) as fh:
+                return next(iter(ArchiveIterator(fh))).rec_type
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            types = list(executor.map(get_type, offsets))
+
+        assert types == ['warcinfo', 'warcinfo', 'response', 'request', 'revisit', 'request'] * 10
+
+        stats = pool.get_stats()
+        assert stats['hits'] + stats['misses'] == 60
+        assert stats['open'] <= 4
+        pool.close()
+
+    def test_extractor_pool(self, capsysbinary):
+        pool = WARCFilePool()
+        filename = get_test_file('example.warc.gz')
+
+        for i in range(3):
+            out = BytesIO()
+            Extractor(filename, 784, pool=pool).extract(True, False, out=out)
+            assert out.getvalue().startswith(b'<!doctype html>')
+
+        assert pool.get_stats()['hits'] == 2
+        pool.close()
+
+    def test_extractor_pool_remote_length(self, memory_warc, monkeypatch):
+        from fsspec.implementations.memory import MemoryFileSystem
+
+        ranges = []
+        orig_cat_file = MemoryFileSystem.cat_file
+
+        def cat_file(self, path, start=None, end=None, **kwargs):
+            ranges.append((start, end))
+            return orig_cat_file(self, path, start=start, end=end, **kwargs)
+
+        monkeypatch.setattr(MemoryFileSystem, 'cat_file', cat_file)
+
+        pool = WARCFilePool()
+        out = BytesIO()
+        Extractor(memory_warc, 784, length=1228, pool=pool).extract(True, False, out=out)
+        assert out.getvalue().startswith(b'<!doctype html>')
+
+        # single range fetched, not pooled
+        assert ranges == [(784, 2012)]
+        assert pool.get_stats()['open'] == 0
+        pool.close()
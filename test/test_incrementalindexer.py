@@ -0,0 +1,142 @@
+from warcio.incrementalindexer import IncrementalIndexer
+from warcio.cli import main
+
+from . import get_test_file
+
+import json
+import os
+import threading
+import time
+
+import pytest
+
+
+FIELDS = 'offset,length,warc-type'
+
+
+# ============================================================================
+def full_index(filename, capsys):
+    main(args=['index', '-f', FIELDS, get_test_file(filename)])
+    return capsys.readouterr().out
+
+
+def write_partial(tmpdir, filename, size):
+    with open(get_test_file(filename), 'rb') as fh:
+        data = fh.read()
+
+    partial = tmpdir.join(filename)
+    partial.write_binary(data[:size] if size else data)
+    return str(partial), data
+
+
+# ============================================================================
+@pytest.mark.parametrize('filename, size, last_offset', [
+    ('example.warc.gz', 2500, 2012),
+    ('example.warc', 2600, 2566),
+])
+def test_checkpoint_resume(tmpdir, capsys, filename, size, last_offset):
+    expected = full_index(filename, capsys)
+
+    partial, data = write_partial(tmpdir, filename, size)
+    output = str(tmpdir.join('index.jsonl'))
+    checkpoint = str(tmpdir.join('checkpoint.json'))
+
+    main(args=['index', '-f', FIELDS, '--checkpoint', checkpoint, '-o', output, partial])
+
+    # only complete records indexed
+    index = tmpdir.join('index.jsonl').read()
+    assert index == ''.join(expected.splitlines(True)[:3])
+
+    # bytes written, with no newline translation
+    assert tmpdir.join('index.jsonl').read_binary() == index.encode('utf-8')
+
+    state = json.loads(tmpdir.join('checkpoint.json').read())
+    assert state == {'offsets': {partial: last_offset}, 'output_offset': os.path.getsize(output)}
+
+    # simulate output written after last checkpoint
+    with open(output, 'at') as fh:
+        fh.write('{"partial": ')
+
+    # file completed, resume
+    tmpdir.join(filename).write_binary(data)
+    main(args=['index', '-f', FIELDS, '--checkpoint', checkpoint, '--resume', '-o', output, partial])
+
+    assert tmpdir.join('index.jsonl').read() == expected
+
+
+def test_checkpoint_no_resume(tmpdir, capsys):
+    expected = full_index('example.warc.gz', capsys)
+
+    partial, data = write_partial(tmpdir, 'example.warc.gz', None)
+    checkpoint = str(tmpdir.join('checkpoint.json'))
+
+    main(args=['index', '-f', FIELDS, '--checkpoint', checkpoint, partial])
+    assert capsys.readouterr().out == expected
+
+    # resume, already complete
+    main(args=['index', '-f', FIELDS, '--checkpoint', checkpoint, '--resume', partial])
+    assert capsys.readouterr().out == ''
+
+
+def test_follow(tmpdir, capsys):
+    expected = full_index('example.warc.gz', capsys)
+
+    partial, data = write_partial(tmpdir, 'example.warc.gz', 1000)
+
+    def append():
+        for end in (2100, 2700, len(data)):
+            time.sleep(0.1)
+            with open(partial, 'ab') as fh:
+                fh.write(data[fh.tell():end])
+
+    thread = threading.Thread(target=append)
+    thread.start()
+
+    output = str(tmpdir.join('index.jsonl'))
+    indexer = IncrementalIndexer(FIELDS, [partial], output, follow=True,
+                                 interval=0.02, timeout=0.5)
+    indexer.process_all()
+    thread.join()
+
+    assert tmpdir.join('index.jsonl').read() == expected
+
+
+def test_follow_timeout_no_data(tmpdir):
+    partial, data = write_partial(tmpdir, 'example.warc.gz', 500)
+
+    output = str(tmpdir.join('index.jsonl'))
+    indexer = IncrementalIndexer('offset', [partial], output, follow=True,
+                                 interval=0.01, timeout=0.05)
+    indexer.process_all()
+
+    assert tmpdir.join('index.jsonl').read() == '{"offset": "0"}\n'
+    assert indexer.offsets == {partial: 353}
+
+
+def test_follow_corrupt_record(tmpdir):
+    with open(get_test_file('example.warc.gz'), 'rb') as fh:
+        data = fh.read()
+
+    # corrupt member well before the end of the file
+    data = data[:784] + b'X' * 100 + data[884:] + data * 20
+
+    filename = tmpdir.join('corrupt.warc.gz')
+    filename.write_binary(data)
+
+    output = str(tmpdir.join('index.jsonl'))
+    indexer = IncrementalIndexer('offset', [str(filename)], output, follow=True,
+                                 interval=0.01, timeout=0.05)
+
+    # not taken for a record still being written
+    with pytest.raises(Exception):
+        indexer.process_all()
+
+    assert indexer.offsets == {str(filename): 784}
+
+
+def test_cli_errors():
+    with pytest.raises(SystemExit):
+        main(args=['index', '--resume', get_test_file('example.warc.gz')])
+
+    with pytest.raises(SystemExit):
+        main(args=['index', '--follow', '--format', 'parquet', get_test_file('example.warc.gz')])
@@ -0,0 +1,150 @@
+from warcio.archiveiterator import ArchiveIterator
+from warcio.pipelinestats import PipelineStats, InstrumentedStream, collect_stats
+from warcio.statusandheaders import StatusAndHeaders
+from warcio.warcwriter import WARCWriter
+from warcio.cli import main
+
+from . import get_test_file
+
+from io import BytesIO, StringIO
+import os
+import time
+
+
+# ============================================================================
+def read_all(filename, **kwargs):
+    with open(get_test_file(filename), 'rb') as fh:
+        it = ArchiveIterator(fh, **kwargs)
+        for record in it:
+            record.content_stream().read()
+
+    return it
+
+
+class UnknownLengthStream(object):
+    def __init__(self, data):
+        self.stream = BytesIO(data)
+
+    def read(self, *args):
+        return self.stream.read(*args)
+
+
+# ============================================================================
+class TestPipelineStats(object):
+    def test_read_gzip(self):
+        stats = PipelineStats()
+        read_all('example.warc.gz', check_digests=True, stats=stats)
+
+        assert stats.counters == {'records': 6, 'members': 6,
+                                  'bytes_read': 3816, 'bytes_inflated': 5356}
+
+        assert set(stats.timers) == {'read', 'inflate', 'parse_headers', 'digest', 'user'}
+        assert all(value >= 0 for value in stats.timers.values())
+
+    def test_read_uncompressed(self):
+        stats = PipelineStats()
+        read_all('example.warc', stats=stats)
+
+        assert stats.counters == {'records': 6, 'bytes_read': os.path.getsize(get_test_file('example.warc'))}
+        assert 'inflate' not in stats.timers
+        assert 'digest' not in stats.timers
+
+    def test_disabled(self):
+        it = read_all('example.warc.gz')
+        assert it.stats is None
+        assert it.reader is None
+
+    def test_collect_stats(self):
+        with collect_stats() as stats:
+            read_all('example.warc.gz')
+            read_all('example.arc.gz')
+
+        assert stats.counters['records'] == 8
+        assert stats.counters['members'] == 8
+
+        # no longer collected
+        read_all('example.warc.gz')
+        assert stats.counters['records'] == 8
+
+    def test_write(self):
+        stats = PipelineStats()
+        buff = BytesIO()
+        writer = WARCWriter(buff, gzip=True, stats=stats)
+
+        http_headers = StatusAndHeaders('200 OK', [('Content-Type', 'text/plain')], protocol='HTTP/1.0')
+
+        # payload of unknown length, buffered to disk
+        payload = b'some text\n' * 100000
+        record = writer.create_warc_record('http://example.com/', 'response',
+                                           payload=UnknownLengthStream(payload),
+                                           http_headers=http_headers)
+        writer.write_record(record)
+
+        writer.write_record(writer.create_warc_record('http://example.com/', 'resource',
+                                                      payload=BytesIO(b'text'), length=4))
+
+        assert stats.counters == {'records_written': 2, 'spills': 1, 'bytes_written': len(buff.getvalue())}
+        assert set(stats.timers) == {'digest', 'compress', 'write', 'serialize'}
+
+    def test_write_digest_nested_read(self):
+        stats = PipelineStats()
+        writer = WARCWriter(BytesIO(), gzip=False, stats=stats)
+
+        class SlowStream(UnknownLengthStream):
+            def read(self, *args):
+                time.sleep(0.01)
+                return self.stream.read(*args)
+
+        payload = b'some text\n' * 10
+        record = writer.create_warc_record('http://example.com/', 'resource',
+                                           payload=BytesIO(payload), length=len(payload))
+
+        # payload read while computing the block digest, timed as 'read'
+        record.raw_stream = InstrumentedStream(SlowStream(payload), stats)
+        writer.write_record(record)
+
+        assert stats.timers['read'] >= 0.02
+
+        # read time not counted again as digest time
+        assert stats.timers['digest'] < stats.timers['read']
+        assert sum(stats.timers.values()) < stats.timers['read'] * 2
+
+    def test_copy_record(self):
+        stats = PipelineStats()
+        buff = BytesIO()
+        writer = WARCWriter(buff, gzip=True, stats=stats)
+
+        with open(get_test_file('example.warc.gz'), 'rb') as fh:
+            it = ArchiveIterator(fh, stats=stats)
+            for record in it:
+                writer.copy_record(it)
+
+        assert stats.counters['records'] == 6
+        assert stats.counters['records_copied'] == 6
+        assert 'records_written' not in stats.counters
+        assert buff.getvalue() == open(get_test_file('example.warc.gz'), 'rb').read()
+
+    def test_merge_and_report(self):
+        stats = PipelineStats()
+        read_all('example.warc.gz', stats=stats)
+
+        total = PipelineStats()
+        total.merge(stats)
+        total.merge(stats)
+
+        assert total.counters['records'] == 12
+        assert total.to_dict()['counters'] == dict(total.counters)
+
+        out = StringIO()
+        total.print_report(out)
+        assert 'records' in out.getvalue()
+        assert 'parse_headers' in out.getvalue()
+
+    def test_cli_stats(self, capsys):
+        main(args=['index', '--stats', get_test_file('example.warc.gz')])
+
+        res = capsys.readouterr()
+        assert len(res.out.splitlines()) == 6
+        assert 'Counters:' in res.err
+        assert 'members' in res.err
+        assert 'Time (s):' in res.err
@@ -0,0 +1,128 @@
+from warcio.rangefetcher import RangeFetcher
+from warcio.extractor import BatchExtractor
+from warcio.archiveiterator import ArchiveIterator
+from warcio.cli import main
+
+from .test_extractor import memory_warc
+
+import os
+import threading
+import time
+
+
+# ============================================================================
+def slow_cat_file(monkeypatch, delays):
+    """ Make MemoryFileSystem.cat_file slower for earlier ranges, tracking
+    the max number of concurrent requests
+    """
+    from fsspec.implementations.memory import MemoryFileSystem
+
+    orig_cat_file = MemoryFileSystem.cat_file
+    stats = {'active': 0, 'max_active': 0, 'ranges': []}
+    lock = threading.Lock()
+
+    def cat_file(self, path, start=None, end=None, **kwargs):
+        with lock:
+            stats['active'] += 1
+            stats['max_active'] = max(stats['max_active'], stats['active'])
+            stats['ranges'].append((start, end))
+
+        time.sleep(delays.get(start, 0))
+
+        with lock:
+            stats['active'] -= 1
+
+        return orig_cat_file(self, path, start=start, end=end, **kwargs)
+
+    monkeypatch.setattr(MemoryFileSystem, 'cat_file', cat_file)
+    return stats
+
+
+# ============================================================================
+class TestRangeFetcher(object):
+    def test_fetch(self, memory_warc):
+        fh = RangeFetcher().fetch(memory_warc, 784, 1228)
+        assert fh.tell() == 784
+
+        record = next(iter(ArchiveIterator(fh)))
+        assert record.rec_type == 'response'
+        assert fh.tell() == 784 + 1228
+
+    def test_fetch_unknown_length(self, memory_warc):
+        fh = RangeFetcher().fetch(memory_warc, 2621)
+        assert fh.tell() == 2621
+        assert len(fh.getvalue()) == 586
+
+        record = next(iter(ArchiveIterator(fh)))
+        assert record.rec_type == 'revisit'
+
+    def test_fetch_all_ordered(self, memory_warc, monkeypatch):
+        stats = slow_cat_file(monkeypatch, {0: 0.2, 353: 0.1})
+
+        ranges = [(memory_warc, 0, 353), (memory_warc, 353, 431),
+                  (memory_warc, 784, 1228), (memory_warc, 2012, 609)]
+
+        fetcher = RangeFetcher(max_workers=4)
+        results = [(fh.tell(), next(iter(ArchiveIterator(fh))).rec_type)
+                   for fh in fetcher.fetch_all(ranges)]
+
+        assert results == [(0, 'warcinfo'), (353, 'warcinfo'),
+                           (784, 'response'), (2012, 'request')]
+
+        assert stats['max_active'] > 1
+
+    def test_fetch_all_max_per_host(self, memory_warc, monkeypatch):
+        stats = slow_cat_file(monkeypatch, {0: 0.05, 353: 0.05, 784: 0.05})
+
+        ranges = [(memory_warc, 0, 353), (memory_warc, 353, 431),
+                  (memory_warc, 784, 1228), (memory_warc, 2012, 609)]
+
+        fetcher = RangeFetcher(max_workers=4, max_per_host=1)
+        assert len(list(fetcher.fetch_all(ranges))) == 4
+
+        assert stats['max_active'] == 1
+
+    def test_fetch_all_max_pending(self, memory_warc):
+        ranges = [(memory_warc, 0, 353)] * 10
+
+        fetcher = RangeFetcher(max_workers=2, max_pending=2)
+        it = fetcher.fetch_all(ranges)
+        assert next(it).tell() == 0
+
+        # close early, pending fetches cancelled
+        it.close()
+
+
+# ============================================================================
+def test_batch_extract_concurrent(memory_warc, tmpdir, monkeypatch):
+    stats = slow_cat_file(monkeypatch, {0: 0.1})
+
+    # gaps larger than max_gap, each fetched separately
+    entries = [(memory_warc, 2621, 586), (memory_warc, 0, 353), (memory_warc, 784, 1228)]
+    output = str(tmpdir.join('out'))
+
+    fetcher = RangeFetcher(max_workers=3)
+    extractor = BatchExtractor(entries, output, max_gap=0, fetcher=fetcher)
+
+    assert extractor.extract(False, True) == 3
+
+    assert sorted(stats['ranges']) == [(0, 353), (784, 2012), (2621, 3207)]
+    assert stats['max_active'] > 1
+
+    assert sorted(os.listdir(output)) == ['example.warc.gz-0.headers',
+                                          'example.warc.gz-2621.headers',
+                                          'example.warc.gz-784.headers']
+
+
+def test_cli_extract_batch_workers(memory_warc, tmpdir):
+    batch = tmpdir.join('batch.txt')
+    batch.write('{0} 784 1228\n{0} 2621 586\n{0} 0\n'.format(memory_warc))
+
+    output = str(tmpdir.join('out'))
+    main(args=['extract', '--batch', str(batch), '-o', output,
+               '--workers', '4', '--max-per-host', '2'])
+
+    with open(os.path.join(output, 'example.warc.gz-2621.warc'), 'rb') as fh:
+        assert b'WARC-Type: revisit\r\n' in fh.read()
+
+    assert len(os.listdir(output)) == 3
@@ -0,0 +1,99 @@
+from warcio.archiveiterator import ArchiveIterator
+from warcio.indexer import Indexer
+from warcio.recordbatch import RecordBatchBuilder
+
+from . import get_test_file
+
+from io import StringIO
+
+import json
+
+import pytest
+
+
+# ============================================================================
+def get_batches(filename, *args, **kwargs):
+    with open(get_test_file(filename), 'rb') as fh:
+        return list(ArchiveIterator(fh, arc2warc=True).iter_batches(*args, **kwargs))
+
+
+def get_index(filename, fields):
+    out = StringIO()
+    indexer = Indexer(fields, [], None)
+    with open(get_test_file(filename), 'rb') as fh:
+        indexer.process_one(fh, out, filename)
+
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+# ============================================================================
+class TestRecordBatch(object):
+    @pytest.mark.parametrize('filename', ['example.warc.gz', 'example.warc',
+                                          'example.arc.gz', 'example.arc'])
+    def test_same_as_index(self, filename):
+        fields = 'offset,length,warc-type,WARC-Target-URI,http:status,http:content-type'
+
+        batches = get_batches(filename, 4, fields)
+        assert all(len(batch) <= 4 for batch in batches)
+
+        rows = []
+        for batch in batches:
+            columns = batch.to_pydict()
+            for i in range(len(batch)):
+                rows.append(dict((name, str(column[i])) for name, column in columns.items()
+                                 if column[i] is not None))
+
+        assert rows == get_index(filename, fields)
+
+    def test_default_fields(self):
+        batch, = get_batches('example.warc.gz')
+
+        assert batch.fields == list(RecordBatchBuilder.DEFAULT_FIELDS)
+        assert len(batch) == 6
+        assert list(batch['offset']) == [0, 353, 784, 2012, 2621, 3207]
+        assert list(batch['length']) == [353, 431, 1228, 609, 586, 609]
+        assert batch['warc-type'] == ['warcinfo', 'warcinfo', 'response', 'request', 'revisit', 'request']
+        assert batch['content-type'][2] == 'application/http; msgtype=response'
+
+    def test_payload(self):
+        batch, = get_batches('example.warc.gz', 10, 'warc-type', payload=True)
+
+        assert batch.fields == ['warc-type', 'payload']
+        assert batch['payload'][2].startswith(b'<!doctype html>')
+        assert batch['payload'][3] == b''
+
+    def test_arrow(self):
+        pa = pytest.importorskip('pyarrow')
+
+        batch, = get_batches('example.warc.gz', 10, 'offset,length,warc-type,http:status', payload=True)
+        arrow_batch = batch.to_arrow()
+
+        assert arrow_batch.num_rows == 6
+        assert arrow_batch.schema.field('offset').type == pa.int64()
+        assert arrow_batch.schema.field('payload').type == pa.binary()
+        assert arrow_batch.column(0).to_pylist() == [0, 353, 784, 2012, 2621, 3207]
+        assert arrow_batch.column(3).to_pylist() == [None, None, '200', None, '200', None]
+
+    def test_after_iteration(self):
+        with open(get_test_file('example.warc.gz'), 'rb') as fh:
+            it = ArchiveIterator(fh)
+            record = next(it)
+            assert record.rec_type == 'warcinfo'
+
+            # remaining records
+            batches = list(it.iter_batches(2, 'offset,warc-type'))
+
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert batches[0]['offset'][0] == 353
+
+    @pytest.mark.parametrize('check_digests', [True, 'raise'])
+    def test_check_digests(self, check_digests):
+        with open(get_test_file('example.warc.gz'), 'rb') as fh:
+            it = ArchiveIterator(fh, check_digests=check_digests)
+            batches = list(it.iter_batches(4, 'offset,warc-type'))
+
+            # iterator settings restored
+            assert it.no_record_parse is False
+
+        assert sum(len(batch) for batch in batches) == 6
+        assert list(batches[0]['offset']) == [0, 353, 784, 2012]
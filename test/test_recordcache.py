@@ -0,0 +1,188 @@
+from warcio.recordcache import CachedRecord, CachedRecordLoader, LRURecordCache, SQLiteRecordCache
+from warcio.archiveiterator import ArchiveIterator
+from warcio.filepool import WARCFilePool
+from warcio.extractor import Extractor
+
+from . import get_test_file
+
+from io import BytesIO
+
+import os
+import shutil
+import sqlite3
+import pytest
+
+
+# ============================================================================
+def extract(filename, offset, payload_only=False):
+    out = BytesIO()
+    Extractor(get_test_file(filename), offset).extract(payload_only, False, out=out)
+    return out.getvalue()
+
+
+def load(loader, filename, offset, payload_only=False):
+    out = BytesIO()
+    with loader.load(get_test_file(filename), offset) as record:
+        Extractor(None, None).write_record(record, out, payload_only, False)
+
+    return out.getvalue()
+
+
+RECORDS = [('example.warc.gz', 784), ('example.warc.gz', 2012),
+           ('example.warc', 1197), ('example.arc', 151), ('example.arc.gz', 171)]
+
+
+# ============================================================================
+class TestRecordCache(object):
+    @pytest.mark.parametrize('filename, offset', RECORDS)
+    def test_cached_payload(self, filename, offset):
+        loader = CachedRecordLoader()
+
+        for payload_only in (False, True, False):
+            assert load(loader, filename, offset, payload_only) == extract(filename, offset, payload_only)
+
+        assert loader.cache.get_stats()['hits'] == 2
+        assert loader.cache.get_stats()['misses'] == 1
+
+    @pytest.mark.parametrize('filename, offset', [RECORDS[0], RECORDS[2]])
+    def test_positioned_payload(self, filename, offset):
+        loader = CachedRecordLoader(max_payload=10)
+
+        for payload_only in (False, True):
+            assert load(loader, filename, offset, payload_only) == extract(filename, offset, payload_only)
+
+        path = get_test_file(filename)
+        cached = loader.cache.get((path, offset, (os.stat(path).st_mtime, os.stat(path).st_size)))
+        assert cached.payload is None
+        assert cached.payload_start > 0
+
+    def test_positioned_arc_not_cached(self):
+        loader = CachedRecordLoader(max_payload=10)
+
+        assert load(loader, 'example.arc', 151) == extract('example.arc', 151)
+        assert len(loader.cache) == 0
+
+    def test_headers_only(self):
+        loader = CachedRecordLoader(max_payload=10)
+
+        with loader.load(get_test_file('example.warc.gz'), 784) as record:
+            pass
+
+        with loader.load(get_test_file('example.warc.gz'), 784) as record:
+            assert record.rec_headers.get_header('WARC-Target-URI') == 'http://example.com/'
+            assert record.http_headers.get_statuscode() == '200'
+            assert record.content_stream().read().startswith(b'<!doctype html>')
+
+    def test_lru_evict(self):
+        cache = LRURecordCache(max_bytes=10)
+        cache.put('a', 'A', 4)
+        cache.put('b', 'B', 4)
+        assert cache.get('a') == 'A'
+
+        cache.put('c', 'C', 4)
+        assert cache.get('b') is None
+        assert cache.get('a') == 'A'
+        assert cache.get('c') == 'C'
+
+        # too large to cache
+        cache.put('d', 'D', 11)
+        assert cache.get('d') is None
+
+        assert cache.get_stats()['bytes'] == 8
+
+    def test_sqlite_shared(self, tmpdir):
+        filename = str(tmpdir.join('records.sqlite'))
+
+        loader = CachedRecordLoader(SQLiteRecordCache(filename), pool=WARCFilePool())
+        expected = load(loader, 'example.warc.gz', 784)
+
+        # second worker, sharing the cache
+        cache = SQLiteRecordCache(filename)
+        assert len(cache) == 1
+        assert load(CachedRecordLoader(cache), 'example.warc.gz', 784) == expected
+
+        loader.pool.close()
+
+    def test_sqlite_evict(self, tmpdir):
+        def cached_record(payload):
+            with open(get_test_file('example.warc.gz'), 'rb') as fh:
+                return CachedRecord(next(ArchiveIterator(fh)), payload=payload)
+
+        cache = SQLiteRecordCache(str(tmpdir.join('records.sqlite')), max_bytes=10)
+        cache.put(('a.warc', 0, None), cached_record(b'A'), 4)
+        cache.put(('a.warc', 10, None), cached_record(b'B'), 4)
+        assert cache.get(('a.warc', 0, None)).payload == b'A'
+
+        cache.put(('b.warc', 0, None), cached_record(b'C'), 4)
+        assert cache.get(('a.warc', 10, None)) is None
+        assert cache.get(('a.warc', 0, None)).payload == b'A'
+        assert len(cache) == 2
+        cache.close()
+
+    def test_sqlite_json(self, tmpdir):
+        filename = str(tmpdir.join('records.sqlite'))
+
+        loader = CachedRecordLoader(SQLiteRecordCache(filename), max_payload=10)
+        for offset in (784, 2012):
+            load(loader, 'example.warc.gz', offset)
+
+        conn = sqlite3.connect(filename)
+        values = [value for value, in conn.execute('SELECT value FROM cached_records')]
+        conn.close()
+
+        # headers stored as json, not pickled
+        assert len(values) == 2
+        assert all(isinstance(value, str) and value.startswith('["warc"') for value in values)
+
+        loader = CachedRecordLoader(SQLiteRecordCache(filename), max_payload=10)
+        for offset in (784, 2012):
+            assert load(loader, 'example.warc.gz', offset) == extract('example.warc.gz', offset)
+
+    def test_file_changed(self, tmpdir):
+        filename = str(tmpdir.join('example.warc.gz'))
+        shutil.copy(get_test_file('example.warc.gz'), filename)
+
+        loader = CachedRecordLoader()
+        with loader.load(filename, 0) as record:
+            assert record.rec_type == 'warcinfo'
+
+        # replace with another file, with a different record at offset 0
+        shutil.copy(get_test_file('example.arc'), filename)
+        with loader.load(filename, 0) as record:
+            assert record.rec_type == 'arc_header'
+
+        assert loader.cache.get_stats()['hits'] == 0
+
+    def test_pool_file_version(self, monkeypatch):
+        import warcio.filepool
+        import warcio.recordcache
+
+        stats = []
+        orig_get_file_version = warcio.filepool.get_file_version
+
+        def get_file_version(filename):
+            stats.append(filename)
+            return orig_get_file_version(filename)
+
+        monkeypatch.setattr(warcio.filepool, 'get_file_version', get_file_version)
+        monkeypatch.setattr(warcio.recordcache, 'get_file_version', get_file_version)
+
+        # file version checked by the pool, not for each load
+        loader = CachedRecordLoader(pool=WARCFilePool(revalidate=60), max_payload=10)
+        for i in range(3):
+            assert load(loader, 'example.warc.gz', 784) == extract('example.warc.gz', 784)
+
+        assert len(stats) == 1
+        loader.pool.close()
+
+    def test_headers_copied(self):
+        loader = CachedRecordLoader()
+        filename = get_test_file('example.warc.gz')
+
+        with loader.load(filename, 784) as record:
+            record.rec_headers.replace_header('WARC-Target-URI', 'http://example.com/changed')
+            record.http_headers.remove_header('Content-Type')
+
+        with loader.load(filename, 784) as record:
+            assert record.rec_headers.get_header('WARC-Target-URI') == 'http://example.com/'
+            assert record.http_headers.get_header('Content-Type') == 'text/html'
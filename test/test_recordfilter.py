@@ -0,0 +1,200 @@
+from warcio.archiveiterator import ArchiveIterator
+from warcio.recordfilter import RecordFilter
+from warcio.statusandheaders import StatusAndHeaders
+from warcio.cli import main
+
+from . import get_test_file
+from .test_cli import named_temp
+
+import pytest
+
+
+# ============================================================================
+def load_filtered(filename, record_filter, **kwargs):
+    with open(get_test_file(filename), 'rb') as fh:
+        it = ArchiveIterator(fh, filter=record_filter, **kwargs)
+        return [(record.rec_type, it.get_record_offset()) for record in it]
+
+
+def warc_headers(**headers):
+    return StatusAndHeaders('', list(headers.items()), protocol='WARC/1.0')
+
+
+# ============================================================================
+class TestRecordFilter(object):
+    def test_rec_types(self):
+        f = RecordFilter(rec_types=['response', 'revisit'])
+        assert f.match_warc_headers('response', None, warc_headers())
+        assert not f.match_warc_headers('request', None, warc_headers())
+        assert not f.needs_http_headers
+
+    def test_uri(self):
+        f = RecordFilter(uri_prefix='http://example.com/')
+        assert f.match_warc_headers('response', 'http://example.com/a', warc_headers())
+        assert not f.match_warc_headers('response', 'https://example.com/a', warc_headers())
+        assert not f.match_warc_headers('warcinfo', None, warc_headers())
+
+        f = RecordFilter(uri_prefix=['http://a.example/', 'http://b.example/'])
+        assert f.match_warc_headers('response', 'http://b.example/x', warc_headers())
+
+        f = RecordFilter(uri_regex=r'\.(css|js)$')
+        assert f.match_warc_headers('response', 'http://example.com/a.css', warc_headers())
+        assert not f.match_warc_headers('response', 'http://example.com/a.html', warc_headers())
+
+    def test_date_range(self):
+        f = RecordFilter(from_date='2017-03-06T04:02:06Z', to_date='20170306')
+        headers = warc_headers(**{'WARC-Date': '2017-03-06T04:02:06Z'})
+        assert f.match_warc_headers('response', None, headers)
+
+        headers = warc_headers(**{'WARC-Date': '2017-03-06T04:02:05Z'})
+        assert not f.match_warc_headers('response', None, headers)
+
+        headers = warc_headers(**{'WARC-Date': '2017-03-07T00:00:00Z'})
+        assert not f.match_warc_headers('response', None, headers)
+
+        # arc headers
+        headers = warc_headers(**{'archive-date': '20170306120000'})
+        assert f.match_warc_headers('response', None, headers)
+
+        assert not f.match_warc_headers('response', None, warc_headers())
+
+    def test_date_range_partial_iso(self):
+        def match(f, date):
+            return f.match_warc_headers('response', None, warc_headers(**{'WARC-Date': date}))
+
+        # day only
+        f = RecordFilter(from_date='2017-03-06', to_date='2017-03-06')
+        assert match(f, '2017-03-06T00:00:00Z')
+        assert match(f, '2017-03-06T23:59:59Z')
+        assert not match(f, '2017-03-05T23:59:59Z')
+        assert not match(f, '2017-03-07T00:00:00Z')
+
+        # month only
+        f = RecordFilter(from_date='2017-03', to_date='2017-03')
+        assert match(f, '2017-03-01T00:00:00Z')
+        assert match(f, '2017-03-31T23:59:59Z')
+        assert not match(f, '2017-02-28T23:59:59Z')
+        assert not match(f, '2017-04-01T00:00:00Z')
+
+        # hour and minute
+        f = RecordFilter(from_date='2017-03-06T04:02', to_date='2017-03-06T04')
+        assert match(f, '2017-03-06T04:02:00Z')
+        assert match(f, '2017-03-06T04:59:59Z')
+        assert not match(f, '2017-03-06T04:01:59Z')
+
+        with pytest.raises(ValueError):
+            RecordFilter(from_date='March-2017')
+
+    def test_http(self):
+        f = RecordFilter(mime=['text/'], status=[200, 404])
+        assert f.needs_http_headers
+
+        http_headers = StatusAndHeaders('200 OK', [('Content-Type', 'text/html; charset=utf-8')],
+                                        protocol='HTTP/1.1')
+        assert f.match_http_headers(warc_headers(), http_headers)
+
+        http_headers = StatusAndHeaders('301 Moved', [('Content-Type', 'text/html')],
+                                        protocol='HTTP/1.1')
+        assert not f.match_http_headers(warc_headers(), http_headers)
+
+        http_headers = StatusAndHeaders('200 OK', [('Content-Type', 'image/png')],
+                                        protocol='HTTP/1.1')
+        assert not f.match_http_headers(warc_headers(), http_headers)
+
+        assert not f.match_http_headers(warc_headers(), None)
+
+        # non-http record, use warc content-type
+        f = RecordFilter(mime='application/warc-fields')
+        assert f.match_http_headers(warc_headers(**{'Content-Type': 'application/warc-fields'}), None)
+
+
+# ============================================================================
+class TestFilteredIterator(object):
+    def test_filter_type(self):
+        f = RecordFilter(rec_types=['response', 'revisit'])
+        expected = [('response', 784), ('revisit', 2621)]
+        assert load_filtered('example.warc.gz', f) == expected
+
+    def test_filter_type_uncompressed(self):
+        f = RecordFilter(rec_types='request')
+        records = load_filtered('example.warc', f)
+        assert [rec_type for rec_type, _ in records] == ['request', 'request']
+
+    def test_filter_skips_http_parsing(self):
+        f = RecordFilter(rec_types=['revisit'])
+        with open(get_test_file('example.warc.gz'), 'rb') as fh:
+            records = list(ArchiveIterator(fh, filter=f))
+
+        assert len(records) == 1
+        assert records[0].http_headers.get_statuscode() == '200'
+
+    def test_filter_status_no_record_parse(self):
+        # http headers parsed for status filter, even if no_record_parse is set
+        f = RecordFilter(status='200', rec_types=['response'])
+        with open(get_test_file('example.warc.gz'), 'rb') as fh:
+            records = [record.http_headers.get_statuscode()
+                       for record in ArchiveIterator(fh, filter=f, no_record_parse=True)]
+
+        assert records == ['200']
+
+    def test_filter_mime_arc(self):
+        f = RecordFilter(mime='text/html')
+        assert load_filtered('example.arc.gz', f, arc2warc=True) == [('response', 171)]
+
+    def test_filter_check_digests(self):
+        f = RecordFilter(rec_types='response')
+        with open(get_test_file('example.warc'), 'rb') as fh:
+            records = [record for record in ArchiveIterator(fh, filter=f, check_digests=True)
+                       if record.content_stream().read() is not None]
+
+        assert len(records) == 1
+        assert records[0].digest_checker.passed is True
+
+    def test_filter_none_match(self):
+        f = RecordFilter(uri_prefix='http://no-such-host.example/')
+        assert load_filtered('example-iana.org-chunked.warc', f) == []
+
+
+# ============================================================================
+def test_cli_filter(capsys):
+    with named_temp() as temp:
+        temp.close()
+        main(args=['filter', '-t', 'response,request', '--status', '200',
+                   '-o', temp.name, get_test_file('example.warc.gz'),
+                   get_test_file('example.arc.gz')])
+
+        main(args=['index', '-f', 'warc-type,warc-target-uri', temp.name])
+
+    expected = """\
+{"warc-type": "response", "warc-target-uri": "http://example.com/"}
+{"warc-type": "response", "warc-target-uri": "http://example.com/"}
+"""
+    assert capsys.readouterr().out == expected
+
+
+def test_cli_filter_iso_day(capsys):
+    with named_temp() as temp:
+        temp.close()
+        main(args=['filter', '--to', '2017-03-06', '-o', temp.name, get_test_file('example.warc.gz')])
+
+        main(args=['index', '-f', 'warc-type', temp.name])
+        assert len(capsys.readouterr().out.splitlines()) == 6
+
+
+def test_cli_filter_check(capsys):
+    with named_temp() as temp:
+        temp.close()
+        main(args=['filter', '--uri-prefix', 'http://example.com/', '--from', '2017',
+                   '-o', temp.name, get_test_file('example.warc')])
+
+        main(args=['index', '-f', 'warc-type', temp.name])
+        assert capsys.readouterr().out == """\
+{"warc-type": "response"}
+{"warc-type": "request"}
+{"warc-type": "revisit"}
+{"warc-type": "request"}
+"""
+
+        with pytest.raises(SystemExit) as e:
+            main(args=['check', temp.name])
+        assert e.value.code == 0
@@ -124,6 +124,12 @@ def _test_copy_to_s3_and_check_extract(s3_path, capsys):
     extract_output = check_helper(['extract', output_file, '0'], capsys, None)
     assert 'WARC-Filename: temp-20170306040353.warc.gz' in extract_output
 
+    # extract with known length, single range request
+    extract_output = check_helper(['extract', '--headers', '--length', '1228', output_file, '784'],
+                                  capsys, None)
+    assert 'WARC-Target-URI: http://example.com/' in extract_output
+    assert 'HTTP/1.1 200 OK' in extract_output
+
 
 @requires_aws_s3
 def test_recompress_warc_verbose_live(capsys, s3_tmpdir):
@@ -150,3 +156,21 @@ def test_write_and_read_s3_mocked(mock_s3_tmpdir):
 
 def test_copy_to_s3_and_check_extract_mocked(mock_s3_tmpdir, capsys):
     _test_copy_to_s3_and_check_extract(mock_s3_tmpdir, capsys)
+
+
+def test_batch_extract_concurrent_mocked(mock_s3_tmpdir, tmpdir):
+    output_file = mock_s3_tmpdir + '/example.warc.gz'
+
+    with open(get_test_file('example.warc.gz'), 'rb') as input_f:
+        with fsspec_open(output_file, 'wb') as output_f:
+            output_f.write(input_f.read())
+
+    batch = tmpdir.join('batch.txt')
+    batch.write('{0} 0 353\n{0} 784 1228\n{0} 2621 586\n'.format(output_file))
+
+    output = str(tmpdir.join('out'))
+    main(args=['extract', '--headers', '--batch', str(batch), '-o', output,
+               '--workers', '3', '--max-per-host', '2'])
+
+    assert len(tmpdir.join('out').listdir()) == 3
+    assert b'WARC-Type: revisit' in tmpdir.join('out', 'example.warc.gz-2621.headers').read_binary()
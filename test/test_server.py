@@ -0,0 +1,235 @@
+from warcio.server import WARCServer, WARCClient
+from warcio.cli import main
+
+from . import get_test_file
+
+from concurrent.futures import ThreadPoolExecutor
+
+import os
+import socket
+import threading
+
+import pytest
+
+
+DATA_DIR = os.path.dirname(get_test_file('example.warc.gz'))
+
+
+# ============================================================================
+@pytest.fixture
+def server():
+    _server = WARCServer('127.0.0.1', 0, workers=4, root=DATA_DIR, quiet=True)
+    thread = threading.Thread(target=_server.serve_forever)
+    thread.start()
+
+    yield _server
+
+    _server.shutdown()
+    thread.join()
+
+
+@pytest.fixture
+def client(server):
+    _client = WARCClient('http://127.0.0.1:{0}'.format(server.address[1]))
+    yield _client
+    _client.close()
+
+
+def cli_output(capsysbinary, *args):
+    main(args=list(args))
+    return capsysbinary.readouterr().out
+
+
+# ============================================================================
+class TestServer(object):
+    def test_extract(self, client, capsysbinary):
+        filename = get_test_file('example.warc.gz')
+
+        for args in ([], ['--payload'], ['--headers']):
+            expected = cli_output(capsysbinary, 'extract', filename, '784', *args)
+            assert client.extract('example.warc.gz', 784,
+                                  payload='--payload' in args,
+                                  headers='--headers' in args) == expected
+
+        assert client.extract('example.warc.gz', 784, length=1228) == cli_output(capsysbinary, 'extract', filename, '784')
+
+    def test_index(self, client, capsysbinary):
+        filenames = ['example.warc.gz', 'example.arc']
+        fields = 'offset,length,warc-type,http:status'
+
+        expected = cli_output(capsysbinary, 'index', '-f', fields, *map(get_test_file, filenames))
+        assert client.index(filenames, fields) == expected.decode('utf-8')
+
+    def test_check(self, client):
+        exit_value, output = client.check(['example.warc.gz'])
+        assert (exit_value, output) == (0, '')
+
+        exit_value, output = client.check(['example-digest.warc'], verbose=True)
+        assert exit_value == 1
+        assert output.count('payload digest failed') == 1
+        assert output.count('digest pass') == 3
+
+    def test_lookup_cached(self, server, client):
+        filename = 'example.warc.gz'
+        path = os.path.realpath(get_test_file(filename))
+
+        entries = client.lookup(filename, 'http://example.com/')
+        assert [(entry['offset'], entry['warc-type']) for entry in entries] == [
+            ('784', 'response'), ('2012', 'request'), ('2621', 'revisit'), ('3207', 'request')]
+
+        assert entries[0]['length'] == '1228'
+
+        assert client.lookup(filename, 'http://example.com/none') == []
+
+        assert list(server.index_cache) == [path]
+        url_index = server.index_cache[path][1]
+
+        client.lookup(filename, 'http://example.com/')
+        assert server.index_cache[path][1] is url_index
+
+    def test_status(self, client):
+        filename = 'example.warc.gz'
+        client.extract(filename, 0)
+        client.extract(filename, 784)
+        client.lookup(filename, 'http://example.com/')
+
+        status = client.status()
+        assert status['cached_indexes'] == 1
+        assert status['cached_index_urls'] == 1
+        assert status['file_pool']['hits'] == 1
+        assert status['file_pool']['misses'] == 1
+        assert status['file_pool']['open'] == 1
+
+    def test_index_cache_evicted(self, server, client):
+        server.max_indexes = 2
+
+        for filename in ('example.warc.gz', 'example.warc', 'example.warc.gz', 'example.arc'):
+            client.lookup(filename, 'http://example.com/')
+
+        # least recently used evicted
+        assert list(server.index_cache) == [os.path.join(server.root, 'example.warc.gz'),
+                                            os.path.join(server.root, 'example.arc')]
+        assert client.status()['cached_indexes'] == 2
+
+    def test_concurrent(self, server, client):
+        filename = 'example.warc.gz'
+        expected = client.extract(filename, 784, payload=True)
+
+        def extract(offset):
+            _client = WARCClient('http://127.0.0.1:{0}'.format(server.address[1]))
+            try:
+                return _client.extract(filename, offset, payload=True)
+            finally:
+                _client.close()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(extract, [784] * 16))
+
+        assert results == [expected] * 16
+
+    def test_errors(self, client):
+        with pytest.raises(Exception) as e:
+            client.extract('no-such-file.warc.gz', 0)
+        assert '404' in str(e.value)
+
+        with pytest.raises(Exception) as e:
+            client.request('/extract', [('filename', 'example.warc.gz')])
+        assert 'Missing parameter: offset' in str(e.value)
+
+        with pytest.raises(Exception) as e:
+            client.request('/unknown', [])
+        assert '404' in str(e.value)
+
+        # connection still usable
+        assert client.extract('example.warc.gz', 0, headers=True).startswith(b'WARC/1.0')
+
+    def test_root(self, client, tmpdir):
+        outside = tmpdir.join('outside.warc')
+        outside.write('')
+
+        for filename in (str(outside), get_test_file('example.warc.gz'), '../data/example.warc.gz',
+                         'http://example.com/example.warc.gz'):
+            with pytest.raises(Exception) as e:
+                client.extract(filename, 0)
+            assert '403' in str(e.value)
+
+    def test_root_symlink(self, tmpdir):
+        tmpdir.join('outside.warc.gz').write('')
+        root = tmpdir.mkdir('root')
+        os.symlink(str(tmpdir.join('outside.warc.gz')), str(root.join('link.warc.gz')))
+
+        with pytest.raises(Exception) as e:
+            WARCServer('127.0.0.1', 0, root=str(root), quiet=True).resolve('link.warc.gz')
+        assert 'not under server root' in str(e.value)
+
+    def test_allow_remote(self):
+        _server = WARCServer('127.0.0.1', 0, root=DATA_DIR, quiet=True, allow_remote=True)
+        try:
+            assert _server.resolve('s3://bucket/example.warc.gz') == 's3://bucket/example.warc.gz'
+        finally:
+            _server.close()
+
+    def test_idle_timeout(self):
+        _server = WARCServer('127.0.0.1', 0, workers=2, root=DATA_DIR, quiet=True, timeout=0.2)
+        thread = threading.Thread(target=_server.serve_forever)
+        thread.start()
+
+        url = 'http://127.0.0.1:{0}'.format(_server.address[1])
+        idle = [WARCClient(url) for i in range(2)]
+        _client = WARCClient(url, timeout=10)
+
+        try:
+            # keep-alive connections holding all the workers
+            for idle_client in idle:
+                idle_client.status()
+
+            assert _client.extract('example.warc.gz', 0, headers=True).startswith(b'WARC/1.0')
+
+        finally:
+            for idle_client in idle + [_client]:
+                idle_client.close()
+
+            _server.shutdown()
+            thread.join()
+
+    def test_cli_client(self, server, capsysbinary):
+        url = 'http://127.0.0.1:{0}'.format(server.address[1])
+        filename = 'example.warc.gz'
+
+        expected = cli_output(capsysbinary, 'extract', '--payload', get_test_file(filename), '784')
+        assert cli_output(capsysbinary, 'client', '--server', url, 'extract', '--payload', filename, '784') == expected
+
+        output = cli_output(capsysbinary, 'client', '--server', url, 'lookup', filename, 'http://example.com/')
+        assert len(output.splitlines()) == 4
+
+        with pytest.raises(SystemExit) as e:
+            main(args=['client', '--server', url, 'check', 'example-digest.warc'])
+        assert e.value.code == 1
+
+        with pytest.raises(SystemExit) as e:
+            main(args=['client', '--server', url, 'extract', 'no-such-file.warc.gz', '0'])
+        assert '404' in str(e.value.code)
+
+
+# ============================================================================
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='requires unix sockets')
+def test_unix_socket(tmpdir):
+    path = str(tmpdir.join('warcio.sock'))
+
+    _server = WARCServer(unix_socket=path, root=DATA_DIR, quiet=True)
+    thread = threading.Thread(target=_server.serve_forever)
+    thread.start()
+
+    _client = WARCClient(unix_socket=path)
+
+    try:
+        filename = 'example.warc.gz'
+        assert _client.extract(filename, 0, headers=True).startswith(b'WARC/1.0')
+        assert len(_client.lookup(filename, 'http://example.com/')) == 4
+
+    finally:
+        _client.close()
+        _server.shutdown()
+        thread.join()
+
+    assert not os.path.exists(path)
@@ -0,0 +1,135 @@
+from warcio.archiveiterator import ArchiveIterator
+from warcio.splitmerge import WARCSplitter, RecordGroup
+from warcio.statusandheaders import StatusAndHeaders
+from warcio.cli import main
+
+from . import get_test_file
+
+import os
+
+import pytest
+
+
+# ============================================================================
+def load_types(filename):
+    with open(filename, 'rb') as fh:
+        return [record.rec_type for record in ArchiveIterator(fh)]
+
+
+class MockRecord(object):
+    def __init__(self, rec_type, uri, rec_id, *links):
+        headers = [('WARC-Type', rec_type), ('WARC-Record-ID', rec_id)]
+        if uri:
+            headers.append(('WARC-Target-URI', uri))
+
+        headers.extend(('WARC-Concurrent-To', link) for link in links)
+
+        self.rec_type = rec_type
+        self.rec_headers = StatusAndHeaders('', headers, protocol='WARC/1.0')
+
+
+# ============================================================================
+class TestSplitMerge(object):
+    def test_record_group(self):
+        group = RecordGroup(MockRecord('response', 'http://example.com/', '<a>'))
+        assert group.add(MockRecord('request', 'http://example.com/', '<b>', '<a>'))
+        assert group.add(MockRecord('metadata', 'http://example.com/', '<c>', '<a>'))
+        assert not group.add(MockRecord('response', 'http://example.com/', '<d>'))
+
+        # no links, adjacent pair with same uri
+        group = RecordGroup(MockRecord('request', 'http://example.com/', '<a>'))
+        assert group.add(MockRecord('response', 'http://example.com/', '<b>'))
+        assert not group.add(MockRecord('request', 'http://example.com/', '<c>'))
+
+        group = RecordGroup(MockRecord('request', 'http://example.com/', '<a>'))
+        assert not group.add(MockRecord('response', 'http://example.com/other', '<b>'))
+
+    def test_split(self, tmpdir, capsys):
+        prefix = str(tmpdir.join('split'))
+        main(args=['split', '-s', '3K', '-o', prefix, get_test_file('example.warc.gz')])
+
+        outputs = capsys.readouterr().out.split()
+        assert outputs == [prefix + '-00000.warc.gz', prefix + '-00001.warc.gz']
+
+        # request/response pairs kept together
+        assert load_types(outputs[0]) == ['warcinfo', 'warcinfo', 'response', 'request']
+        assert load_types(outputs[1]) == ['revisit', 'request']
+
+        # members copied verbatim
+        with open(get_test_file('example.warc.gz'), 'rb') as fh:
+            orig = fh.read()
+
+        with open(outputs[0], 'rb') as fh:
+            assert fh.read() == orig[:2621]
+
+        with open(outputs[1], 'rb') as fh:
+            assert fh.read() == orig[2621:]
+
+    def test_split_check_copy_once(self, tmpdir, monkeypatch):
+        import warcio.splitmerge
+        import warcio.warcwriter
+
+        calls = []
+        orig_can_copy_raw = warcio.warcwriter.can_copy_raw
+
+        def can_copy_raw(it):
+            calls.append(it.offset)
+            return orig_can_copy_raw(it)
+
+        monkeypatch.setattr(warcio.splitmerge, 'can_copy_raw', can_copy_raw)
+        monkeypatch.setattr(warcio.warcwriter, 'can_copy_raw', can_copy_raw)
+
+        prefix = str(tmpdir.join('split'))
+        outputs = WARCSplitter([get_test_file('example.warc.gz')], prefix, 3072).process_all()
+        assert len(outputs) == 2
+
+        assert calls == [0, 353, 784, 2012, 2621, 3207]
+
+    def test_split_warcinfo_index(self, tmpdir, capsys):
+        prefix = str(tmpdir.join('split'))
+        main(args=['split', '-s', '500', '--warcinfo', '--index', '-o', prefix,
+                   get_test_file('example.warc.gz'), get_test_file('example.arc')])
+
+        outputs = capsys.readouterr().out.split()
+        assert len(outputs) == 3
+
+        assert load_types(outputs[0]) == ['warcinfo', 'response', 'request']
+        assert load_types(outputs[1]) == ['warcinfo', 'revisit', 'request']
+        assert load_types(outputs[2]) == ['warcinfo', 'response']
+
+        for output in outputs:
+            main(args=['index', '-f', 'offset,length,warc-type,warc-target-uri', output])
+            expected = capsys.readouterr().out
+
+            with open(output + '.jsonl') as fh:
+                assert fh.read() == expected
+
+        with open(outputs[2], 'rb') as fh:
+            record = next(iter(ArchiveIterator(fh)))
+            assert record.rec_headers.get_header('WARC-Filename') == os.path.basename(outputs[2])
+            assert record.raw_stream.read().startswith(b'software: warcio/')
+
+    def test_merge(self, tmpdir, capsys):
+        output = str(tmpdir.join('merged.warc.gz'))
+        main(args=['merge', '-o', output, get_test_file('example.warc.gz'),
+                   get_test_file('example.arc.gz'), get_test_file('example.warc')])
+
+        assert capsys.readouterr().out.strip() == '14 records merged to file: ' + output
+
+        types = load_types(output)
+        assert len(types) == 14
+        assert types.count('warcinfo') == 5
+
+        with pytest.raises(SystemExit) as e:
+            main(args=['check', output])
+        assert e.value.code == 0
+
+    def test_merge_warcinfo(self, tmpdir, capsys):
+        output = str(tmpdir.join('merged.warc.gz'))
+        main(args=['merge', '--warcinfo', '--index', '-o', output,
+                   get_test_file('example.warc.gz'), get_test_file('example.warc.gz')])
+
+        assert load_types(output) == ['warcinfo'] + ['response', 'request', 'revisit', 'request'] * 2
+
+        with open(output + '.jsonl') as fh:
+            assert len(fh.readlines()) == 9
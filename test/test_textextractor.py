@@ -0,0 +1,108 @@
+from warcio.textextractor import TextExtractor, get_charset, decode_payload, html_to_text, extract_texts
+from warcio.cli import main
+
+from . import get_test_file
+
+import json
+import pytest
+
+
+# ============================================================================
+def get_texts(capsys, *args):
+    main(args=['text'] + list(args))
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+# ============================================================================
+def test_get_charset():
+    assert get_charset('text/html; charset="ISO-8859-1"', b'<html>') == 'iso8859-1'
+    assert get_charset('text/html', b'<html><meta charset="utf-8">') == 'utf-8'
+    assert get_charset('text/html', b'<meta http-equiv="Content-Type" '
+                                    b'content="text/html; charset=windows-1251">') == 'cp1251'
+    assert get_charset('text/html', b'\xef\xbb\xbf<html>') == 'utf-8'
+    assert get_charset('text/html; charset=unknown', b'<html>') is None
+    assert get_charset(None, b'<html>') is None
+
+    # not text encodings
+    assert get_charset('text/html; charset=hex', b'<html>') is None
+    assert get_charset('text/html', b'<meta charset="base64">') is None
+    assert get_charset('text/html; charset=zlib', b'<html>') is None
+    assert get_charset('text/html; charset=rot13', b'<html>') is None
+
+
+def test_decode_payload():
+    assert decode_payload('café'.encode('utf-8')) == 'café'
+    assert decode_payload('café'.encode('cp1252')) == 'café'
+    assert decode_payload('мир'.encode('cp1251'), 'cp1251') == 'мир'
+
+
+def test_html_to_text():
+    html = ('<html><head><title>Title</title><style>p {}</style></head>'
+            '<body><h1>Some  Heading</h1><script>var x = "<p>";</script>'
+            '<p>First &amp; <b>bold</b>\n text</p><p>Second<br>line</p></body></html>')
+
+    assert html_to_text(html) == 'Some Heading\nFirst & bold text\nSecond\nline'
+
+
+@pytest.mark.parametrize('filename', ['example.warc.gz', 'example.warc'])
+def test_text_gzip_encoded(capsys, filename):
+    results = get_texts(capsys, get_test_file(filename))
+
+    assert len(results) == 1
+    result = results[0]
+    assert result['uri'] == 'http://example.com/'
+    assert result['date'] == '2017-03-06T04:02:06Z'
+    assert result['digest'] == 'sha1:G7HRM7BGOKSKMSXZAHMUQTTV53QOFSMK'
+    assert result['text'].startswith('Example Domain\nThis domain is established')
+
+
+def test_text_charset_chunked(capsys):
+    results = get_texts(capsys, get_test_file('example-iana.org-chunked.warc'))
+
+    assert len(results) == 1
+    assert 'Internet Assigned Numbers Authority' in results[0]['text']
+    assert '<' not in results[0]['text']
+
+
+def test_text_mime(capsys):
+    assert get_texts(capsys, '--mime', 'application/json', get_test_file('example.warc.gz')) == []
+
+    results = get_texts(capsys, '--mime', 'application/json', get_test_file('post-test.warc.gz'))
+    assert len(results) == 3
+
+
+def test_text_jobs(tmpdir):
+    inputs = [get_test_file(filename) for filename in
+              ('example.warc.gz', 'example-iana.org-chunked.warc', 'example.warc',
+               'example-wget-bad-target-uri.warc.gz', 'example.arc.gz')]
+
+    serial = str(tmpdir.join('serial.jsonl'))
+    parallel = str(tmpdir.join('parallel.jsonl'))
+
+    assert TextExtractor(inputs, serial).process_all() == 5
+    assert TextExtractor(inputs, parallel, jobs=2, batch_size=1).process_all() == 5
+
+    with open(serial) as fh:
+        expected = fh.read()
+
+    with open(parallel) as fh:
+        assert fh.read() == expected
+
+
+def test_extract_texts_errors(capsys):
+    items = [('http://example.com/a', None, None, 'text/html', 'text/html; charset=hex', b'<p>A</p>'),
+             ('http://example.com/b', None, None, 'text/html', 'text/html', b'<p>B</p>')]
+
+    results = extract_texts(items)
+    assert [result['text'] for result in results] == ['A', 'B']
+
+    # decoding error of one record doesn't stop the others
+    items.insert(0, ('http://example.com/c', None, None, 'text/html', None, None))
+    results = extract_texts(items)
+    assert [result['text'] for result in results] == ['A', 'B']
+    assert 'http://example.com/c: AttributeError' in capsys.readouterr().err
+
+
+def test_text_max_size(capsys):
+    results = get_texts(capsys, '--max-size', '1000', get_test_file('example.warc.gz'))
+    assert results[0]['text'] == 'Example Domain\nThis doma'
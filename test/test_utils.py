@@ -61,6 +61,67 @@ class TestUtils(object):
         with utils.fsspec_open(default_fh, 'rb', None) as fh:
             assert fh.readline().decode('utf-8') == 'NOTWARC/1.0\r\n'
 
+    def test_fsspec_open_range_local(self):
+        with utils.fsspec_open_range(get_test_file('example.warc'), 488) as fh:
+            assert fh.readline() == b'WARC/1.0\r\n'
+
+        with utils.fsspec_open_range(get_test_file('example.warc'), 488, 705) as fh:
+            assert fh.readline() == b'WARC/1.0\r\n'
+
+    @pytest.mark.skipif(not utils.HAS_FSSPEC, reason='requires fsspec')
+    def test_fsspec_open_range_remote(self, monkeypatch):
+        from fsspec.implementations.memory import MemoryFileSystem
+
+        with open(get_test_file('example.warc.gz'), 'rb') as fh:
+            buff = fh.read()
+
+        with utils.fsspec_open('memory://warcio-test/example.warc.gz', 'wb') as fh:
+            fh.write(buff)
+
+        ranges = []
+        orig_cat_file = MemoryFileSystem.cat_file
+
+        def cat_file(self, path, start=None, end=None, **kwargs):
+            ranges.append((start, end))
+            return orig_cat_file(self, path, start=start, end=end, **kwargs)
+
+        monkeypatch.setattr(MemoryFileSystem, 'cat_file', cat_file)
+
+        try:
+            # known length: single range read
+            with utils.fsspec_open_range('memory://warcio-test/example.warc.gz', 784, 1228) as fh:
+                assert fh.tell() == 784
+                assert fh.read() == buff[784:784 + 1228]
+                assert fh.tell() == 784 + 1228
+                assert fh.seek(800) == 800
+                assert fh.read(10) == buff[800:810]
+
+            assert ranges == [(784, 784 + 1228)]
+
+            # unknown length: positioned stream
+            with utils.fsspec_open_range('memory://warcio-test/example.warc.gz', 784,
+                                         block_size=512) as fh:
+                assert fh.read(10) == buff[784:794]
+
+            # length larger than max fetch size, positioned stream
+            monkeypatch.setattr(utils, 'MAX_RANGE_FETCH', 100)
+            with utils.fsspec_open_range('memory://warcio-test/example.warc.gz', 784, 1228) as fh:
+                assert fh.read(1228) == buff[784:784 + 1228]
+
+            assert len(ranges) == 1
+
+        finally:
+            MemoryFileSystem.store.pop('/warcio-test/example.warc.gz', None)
+
+    def test_parse_size(self):
+        assert utils.parse_size('100') == 100
+        assert utils.parse_size('2K') == 2048
+        assert utils.parse_size('1.5M') == 1536 * 1024
+        assert utils.parse_size('1GB') == 1024 ** 3
+
+        with pytest.raises(ValueError):
+            utils.parse_size('abc')
+
     def test_open_or_default(self):
         default_fh = BytesIO(b'NOTWARC/1.0\r\n')
 
@@ -2,11 +2,12 @@
 # -*- coding: utf-8 -*-
 
 from warcio.statusandheaders import StatusAndHeaders
-from warcio.warcwriter import BufferWARCWriter, GzippingWrapper
+from warcio.warcwriter import BufferWARCWriter, GzippingWrapper, WARCWriter, copy_raw_record
 from warcio.recordbuilder import RecordBuilder
 from warcio.recordloader import ArcWarcRecordLoader
 from warcio.archiveiterator import ArchiveIterator
 from warcio.bufferedreaders import DecompressingBufferedReader
+from warcio.exceptions import ArchiveLoadFailed
 
 from . import get_test_file
 
@@ -844,3 +845,120 @@ Content-Length: {0}\r\n\
             assert new_rec.http_headers == record.http_headers
             assert new_rec.raw_stream.read() == payload
 
+
+
+# ============================================================================
+class TestCopyRawRecord(object):
+    def _copy_all(self, fh, out):
+        writer = WARCWriter(out, gzip=True)
+        it = ArchiveIterator(fh)
+        return [writer.copy_record(it) for record in it]
+
+    def test_copy_raw_bytes(self):
+        with open(get_test_file('example.warc.gz'), 'rb') as fh:
+            orig = fh.read()
+            fh.seek(0)
+
+            out = BytesIO()
+            assert self._copy_all(fh, out) == [True] * 6
+
+        assert out.getvalue() == orig
+
+    def test_copy_raw_fd(self, tmpdir, monkeypatch):
+        import os
+        calls = []
+
+        if hasattr(os, 'copy_file_range'):
+            orig_copy = os.copy_file_range
+            def copy_file_range(*args):
+                calls.append(args[3:5])
+                return orig_copy(*args)
+
+            monkeypatch.setattr(os, 'copy_file_range', copy_file_range)
+
+        output = str(tmpdir.join('out.warc.gz'))
+        with open(get_test_file('example.warc.gz'), 'rb') as fh:
+            with open(output, 'wb') as out:
+                it = ArchiveIterator(fh)
+                writer = WARCWriter(out, gzip=True)
+                for record in it:
+                    if record.rec_type in ('response', 'revisit'):
+                        assert writer.copy_record(it)
+
+        with open(output, 'rb') as fh:
+            records = [(record.rec_type, record.rec_headers.get_header('WARC-Record-ID'))
+                       for record in ArchiveIterator(fh)]
+
+        assert records == [('response', '<urn:uuid:a9c51e3e-0221-11e7-bf66-0242ac120005>'),
+                           ('revisit', '<urn:uuid:e6e395ca-0221-11e7-a18d-0242ac120005>')]
+
+        if calls:
+            assert calls[0] == (784, 0)
+            assert calls[-1] == (2621, 1228)
+
+    def test_copy_raw_after_read(self):
+        with open(get_test_file('example.warc.gz'), 'rb') as fh:
+            it = ArchiveIterator(fh)
+            record = next(it)
+            record.raw_stream.read(10)
+
+            out = BytesIO()
+            assert copy_raw_record(it, out)
+
+            fh.seek(0)
+            assert out.getvalue() == fh.read(353)
+
+    def test_not_copied_after_read_to_end(self):
+        with open(get_test_file('example.warc'), 'rb') as fh:
+            it = ArchiveIterator(fh)
+            next(it)
+            it.get_record_length()
+
+            # payload already read, not written as empty
+            writer = WARCWriter(BytesIO(), gzip=True)
+            with pytest.raises(Exception) as e:
+                writer.copy_record(it)
+
+            assert 'already read' in str(e.value)
+            assert writer.out.getvalue() == b''
+
+    def test_can_copy_known(self, monkeypatch):
+        import warcio.warcwriter
+
+        def can_copy_raw(it):
+            raise AssertionError('not checked again')
+
+        monkeypatch.setattr(warcio.warcwriter, 'can_copy_raw', can_copy_raw)
+
+        with open(get_test_file('example.warc.gz'), 'rb') as fh:
+            it = ArchiveIterator(fh)
+            next(it)
+
+            out = BytesIO()
+            assert WARCWriter(out, gzip=True).copy_record(it, True)
+
+            fh.seek(0)
+            assert out.getvalue() == fh.read(353)
+
+    @pytest.mark.parametrize('filename', ['example.warc', 'example.arc.gz'])
+    def test_not_copied(self, filename):
+        with open(get_test_file(filename), 'rb') as fh:
+            out = BytesIO()
+            assert set(self._copy_all(fh, out)) == {False}
+
+        for record in ArchiveIterator(BytesIO(out.getvalue())):
+            assert record.format == 'warc'
+            assert record.rec_headers.get_header('WARC-Block-Digest')
+
+    def test_not_copied_unseekable(self):
+        class Unseekable(object):
+            def __init__(self, fh):
+                self.read = fh.read
+
+        with open(get_test_file('example.warc.gz'), 'rb') as fh:
+            assert self._copy_all(Unseekable(fh), BytesIO()) == [False] * 6
+
+    def test_non_chunked_gzip(self):
+        with open(get_test_file('example-bad-non-chunked.warc.gz'), 'rb') as fh:
+            with pytest.raises(ArchiveLoadFailed):
+                self._copy_all(fh, BytesIO())
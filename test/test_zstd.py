@@ -0,0 +1,247 @@
+from warcio.archiveiterator import ArchiveIterator
+from warcio.bufferedreaders import ZSTD_DICT_MAGIC, read_zstd_dict
+from warcio.warcwriter import BufferWARCWriter, ZstdWrapper
+from warcio.recompressor import Recompressor
+from warcio.extractor import Extractor, BatchExtractor
+from warcio.rangefetcher import RangeFetcher
+from warcio.recordcache import CachedRecordLoader
+from warcio.pipelinestats import PipelineStats
+from warcio.utils import HAS_FSSPEC, fsspec_open
+from warcio.cli import main
+
+from . import get_test_file
+
+from io import BytesIO
+
+import os
+import shutil
+
+import pytest
+
+zstandard = pytest.importorskip('zstandard')
+
+
+# ============================================================================
+def train_dict():
+    samples = []
+    for i in range(500):
+        samples.append(('WARC/1.0\r\nWARC-Type: response\r\n'
+                        'WARC-Target-URI: http://example.com/{0}\r\n'
+                        'Content-Type: application/http; msgtype=response\r\n'
+                        'Content-Length: {1}\r\n\r\n'
+                        'HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n\r\n'
+                        '<!doctype html><html><head><title>{0}</title>'.format(i, i * 7)).encode('utf-8'))
+
+    return zstandard.train_dictionary(2048, samples).as_bytes()
+
+
+def read_records(stream):
+    records = []
+    it = ArchiveIterator(stream)
+    for record in it:
+        payload = record.content_stream().read()
+        records.append((record.rec_type, it.get_record_offset(), it.get_record_length(), payload))
+
+    return records
+
+
+def extract(filename, offset):
+    out = BytesIO()
+    Extractor(filename, offset).extract(True, False, out=out)
+    return out.getvalue()
+
+
+# ============================================================================
+class TestZstd(object):
+    @classmethod
+    def setup_class(cls):
+        with open(get_test_file('example.warc.gz'), 'rb') as fh:
+            cls.expected = [record[3] for record in read_records(fh)]
+
+    def recompress(self, tmpdir, zstd_dict=None, workers=1):
+        output = str(tmpdir.join('example.warc.zst'))
+        Recompressor(get_test_file('example.warc.gz'), output,
+                     compression='zstd', zstd_dict=zstd_dict, workers=workers).recompress()
+
+        return output
+
+    def test_write_read(self):
+        writer = BufferWARCWriter(compression='zstd')
+        with open(get_test_file('example.warc.gz'), 'rb') as fh:
+            for record in ArchiveIterator(fh):
+                writer.write_record(record)
+
+        buff = writer.get_contents()
+        assert buff.startswith(b'\x28\xb5\x2f\xfd')
+
+        records = read_records(BytesIO(buff))
+        assert [record[3] for record in records] == self.expected
+
+        # each record in its own frame
+        offset = 0
+        for _, record_offset, length, _ in records:
+            assert record_offset == offset
+            offset += length
+
+        assert offset == len(buff)
+
+    def test_write_dict(self):
+        zstd_dict = train_dict()
+
+        writer = BufferWARCWriter(compression='zstd', zstd_dict=zstd_dict)
+        with open(get_test_file('example.warc.gz'), 'rb') as fh:
+            for record in ArchiveIterator(fh):
+                writer.write_record(record)
+
+        buff = writer.get_contents()
+        assert buff.startswith(ZSTD_DICT_MAGIC)
+        assert read_zstd_dict(BytesIO(buff)) == zstd_dict
+
+        # dictionary written only once
+        assert buff.count(ZSTD_DICT_MAGIC) == 1
+
+        records = read_records(BytesIO(buff))
+        assert [record[3] for record in records] == self.expected
+
+        # first record starts after dictionary frame
+        assert records[0][1] == len(zstd_dict) + 8
+
+    def test_recompress_offsets(self, tmpdir):
+        output = self.recompress(tmpdir)
+
+        with open(output, 'rb') as fh:
+            records = read_records(fh)
+
+        assert [record[3] for record in records] == self.expected
+
+        for record, orig_offset in zip(records, [0, 353, 784, 2012, 2621, 3207]):
+            assert extract(output, record[1]) == extract(get_test_file('example.warc.gz'), orig_offset)
+
+    def test_recompress_dict_offsets(self, tmpdir):
+        zstd_dict = train_dict()
+        output = self.recompress(tmpdir, zstd_dict)
+
+        with open(output, 'rb') as fh:
+            records = read_records(fh)
+
+        assert [record[3] for record in records] == self.expected
+        assert records[0][1] == len(zstd_dict) + 8
+
+        # dictionary loaded from start of file
+        response = records[2]
+        assert response[0] == 'response'
+        assert extract(output, response[1]).startswith(b'<!doctype html>')
+
+    def test_cached_record_dict(self, tmpdir):
+        output = self.recompress(tmpdir, train_dict())
+        with open(output, 'rb') as fh:
+            offset = read_records(fh)[2][1]
+
+        # payload read from offset, after cached headers
+        loader = CachedRecordLoader(max_payload=10)
+        for i in range(2):
+            with loader.load(output, offset) as record:
+                assert record.content_stream().read() == self.expected[2]
+
+    def test_remote_range_dict(self, tmpdir):
+        if not HAS_FSSPEC:
+            pytest.skip('requires fsspec')
+
+        from fsspec.implementations.memory import MemoryFileSystem
+
+        output = self.recompress(tmpdir, train_dict())
+        with open(output, 'rb') as fh:
+            _, offset, length, _ = read_records(fh)[2]
+            fh.seek(0)
+            remote = 'memory://warcio-test/example.warc.zst'
+            with fsspec_open(remote, 'wb') as out:
+                out.write(fh.read())
+
+        try:
+            # fetched as an in-memory range, dictionary read separately
+            out = BytesIO()
+            Extractor(remote, offset, length=length).extract(True, False, out=out)
+            assert out.getvalue() == self.expected[2]
+
+            for fetcher in (None, RangeFetcher()):
+                batch_dir = str(tmpdir.join('batch'))
+                BatchExtractor([(remote, offset, length)], batch_dir,
+                               fetcher=fetcher).extract(True, False)
+
+                name, = os.listdir(batch_dir)
+                with open(os.path.join(batch_dir, name), 'rb') as fh:
+                    assert fh.read() == self.expected[2]
+
+                shutil.rmtree(batch_dir)
+
+        finally:
+            MemoryFileSystem.store.pop('/warcio-test/example.warc.zst', None)
+
+    def test_unseekable_stats_no_dict(self, tmpdir):
+        output = self.recompress(tmpdir, train_dict())
+
+        class Unseekable(object):
+            def __init__(self, fh):
+                self.fh = fh
+
+            def read(self, *args):
+                return self.fh.read(*args)
+
+        with open(output, 'rb') as fh:
+            it = ArchiveIterator(Unseekable(fh), stats=PipelineStats())
+            assert it.reader.zstd_dict_loader is None
+
+            # dictionary read from the stream itself
+            assert [record.content_stream().read() for record in it] == self.expected
+
+    def test_recompress_parallel(self, tmpdir):
+        zstd_dict = train_dict()
+
+        output = self.recompress(tmpdir, zstd_dict)
+        with open(output, 'rb') as fh:
+            serial = fh.read()
+
+        output = self.recompress(tmpdir, zstd_dict, workers=3)
+        with open(output, 'rb') as fh:
+            assert fh.read() == serial
+
+    def test_missing_dict(self, tmpdir):
+        output = self.recompress(tmpdir, train_dict())
+
+        with open(output, 'rb') as fh:
+            fh.seek(len(read_zstd_dict(fh)) + 8)
+            buff = fh.read()
+
+        # dictionary not at start of input
+        with pytest.raises(Exception) as e:
+            read_records(BytesIO(buff))
+
+        assert 'zstd dictionary' in str(e.value)
+
+    def test_cli_recompress(self, tmpdir, capsys):
+        dict_file = str(tmpdir.join('warc.dict'))
+        with open(dict_file, 'wb') as fh:
+            fh.write(train_dict())
+
+        output = str(tmpdir.join('out.warc.zst'))
+        main(['recompress', get_test_file('example.arc.gz'), output, '--to', 'zstd', '--dict', dict_file])
+
+        with open(output, 'rb') as fh:
+            records = read_records(fh)
+
+        assert [record[0] for record in records] == ['warcinfo', 'response']
+
+        with pytest.raises(SystemExit):
+            main(['recompress', get_test_file('example.arc.gz'), output, '--dict', dict_file])
+
+    def test_invalid_compression(self):
+        with pytest.raises(Exception):
+            BufferWARCWriter(compression='lz4')
+
+    def test_wrapper(self):
+        out = BytesIO()
+        wrapper = ZstdWrapper(out)
+        wrapper.write(b'some data')
+        wrapper.flush()
+
+        assert zstandard.ZstdDecompressor().decompressobj().decompress(out.getvalue()) == b'some data'
@@ -1,3 +1,24 @@
-from warcio.statusandheaders import StatusAndHeaders
-from warcio.archiveiterator import ArchiveIterator
-from warcio.warcwriter import WARCWriter
+# StatusAndHeaders, ArchiveIterator and WARCWriter are imported when
+# first accessed, to keep importing any warcio module (eg. the cli) fast
+
+_LAZY_IMPORTS = {
+    'StatusAndHeaders': 'warcio.statusandheaders',
+    'ArchiveIterator': 'warcio.archiveiterator',
+    'WARCWriter': 'warcio.warcwriter',
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __getattr__(name):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError("module 'warcio' has no attribute '{0}'".format(name))
+
+    import importlib
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
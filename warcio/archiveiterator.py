@@ -1,7 +1,9 @@
-from warcio.bufferedreaders import DecompressingBufferedReader
+from warcio.bufferedreaders import DecompressingBufferedReader, load_zstd_dict
+from warcio.digestverifyingreader import DigestVerifyingReader
 
 from warcio.exceptions import ArchiveLoadFailed
 from warcio.recordloader import ArcWarcRecordLoader
+from warcio.pipelinestats import InstrumentedStream, get_default_stats, timer
 
 from warcio.utils import BUFF_SIZE
 
@@ -28,7 +30,19 @@ class ArchiveIterator(six.Iterator):
     compressed and uncompressed
 
     The indexer will automatically detect format, and decompress
-    if necessary.
+    if necessary, including zstd compressed WARCs (one frame per record,
+    with an optional dictionary frame at the start of the file).
+
+    An optional ``filter`` (a ``warcio.recordfilter.RecordFilter``)
+    skips over records that don't match, without parsing them further.
+
+    An optional ``stats`` (a ``warcio.pipelinestats.PipelineStats``)
+    collects counters and timers of the reading pipeline.
+
+    With ``lazy_http_headers``, the HTTP headers of each record are only
+    parsed when ``record.http_headers`` is first accessed (as by
+    ``content_stream()``), before reading the record's stream, so that
+    records whose HTTP headers are not needed are not parsed.
 
     """
 
@@ -56,7 +70,8 @@ class ArchiveIterator(six.Iterator):
     def __init__(self, fileobj, no_record_parse=False,
                  verify_http=False, arc2warc=False,
                  ensure_http_headers=False, block_size=BUFF_SIZE,
-                 check_digests=False):
+                 check_digests=False, filter=None, stats=None,
+                 lazy_http_headers=False):
 
         self.fh = fileobj
 
@@ -69,6 +84,7 @@ class ArchiveIterator(six.Iterator):
         self.member_info = None
         self.no_record_parse = no_record_parse
         self.ensure_http_headers = ensure_http_headers
+        self.lazy_http_headers = lazy_http_headers
 
         try:
             self.offset = self.fh.tell()
@@ -76,12 +92,24 @@ class ArchiveIterator(six.Iterator):
             self.fh = UnseekableYetTellable(self.fh)
             self.offset = self.fh.tell()
 
+        # checked before wrapping in an InstrumentedStream
+        seekable = not isinstance(self.fh, UnseekableYetTellable)
+
+        self.stats = stats if stats is not None else get_default_stats()
+        if self.stats is not None:
+            self.fh = InstrumentedStream(self.fh, self.stats)
+
         self.reader = DecompressingBufferedReader(self.fh,
                                                   block_size=block_size)
+        self.reader.stats = self.stats
+
+        if seekable:
+            self.reader.zstd_dict_loader = lambda: load_zstd_dict(self.fh)
 
         self.next_line = None
 
         self.check_digests = check_digests
+        self.record_filter = filter
         self.err_count = 0
         self.record = None
 
@@ -93,6 +121,15 @@ class ArchiveIterator(six.Iterator):
     def __next__(self):
         return six.next(self.the_iter)
 
+    def iter_batches(self, batch_size=1000, fields=None, payload=False):
+        """ Iterate over the records in batches of up to ``batch_size``
+        records, each a ``warcio.recordbatch.RecordBatch`` with a column
+        for each of ``fields`` (as for ``warcio index``), and for the
+        decoded payloads, if ``payload`` is set
+        """
+        from warcio.recordbatch import iter_batches
+        return iter_batches(self, batch_size, fields, payload)
+
     def close(self):
         self.record = None
         if self.reader:
@@ -111,7 +148,14 @@ class ArchiveIterator(six.Iterator):
                 if raise_invalid_gzip:
                     self._raise_invalid_gzip_err()
 
-                yield self.record
+                # skip records excluded by filter
+                if not self.record.excluded:
+                    if self.stats is not None:
+                        start, nested = timer(), self.stats.total_time()
+                        yield self.record
+                        self.stats.add_time('user', start, nested)
+                    else:
+                        yield self.record
 
             except EOFError:
                 empty_record = True
@@ -254,21 +298,43 @@ class ArchiveIterator(six.Iterator):
         """ Use loader to parse the record from the reader stream
         Supporting warc and arc records
         """
+        if self.stats is not None:
+            start, nested = timer(), self.stats.total_time()
+
         record = self.loader.parse_record_stream(self.reader,
                                                  next_line,
                                                  self.known_format,
                                                  self.no_record_parse,
                                                  self.ensure_http_headers,
-                                                 self.check_digests)
+                                                 self.check_digests,
+                                                 self.record_filter,
+                                                 self.lazy_http_headers)
 
         self.member_info = None
 
+        # zstd dictionary frame at start of file is not part of the record
+        if self.reader.decomp_type == 'zstd' and self.reader.decompressor.dict_frame_size:
+            self.offset += self.reader.decompressor.dict_frame_size
+            self.reader.decompressor.dict_frame_size = 0
+
         # Track known format for faster parsing of other records
         if not self.mixed_arc_warc:
             self.known_format = record.format
 
+        if self.stats is not None:
+            self.stats.add_time('parse_headers', start, nested)
+            self._update_stats(record)
+
         return record
 
+    def _update_stats(self, record):
+        self.stats.incr('records')
+        if self.reader.decompressor:
+            self.stats.incr('members')
+
+        if isinstance(record.raw_stream, DigestVerifyingReader):
+            record.raw_stream.stats = self.stats
+
 
 # ============================================================================
 class WARCIterator(ArchiveIterator):
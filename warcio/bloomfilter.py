@@ -0,0 +1,153 @@
+from warcio.archiveiterator import ArchiveIterator
+from warcio.dedup import DedupWARCWriter
+from warcio.recordbuilder import RecordBuilder
+from warcio.utils import fsspec_open
+
+import hashlib
+import math
+import mmap
+import struct
+
+
+# ============================================================================
+class BloomFilter(object):
+    """ Compact, serializable Bloom filter over payload digests (or other
+    strings), used to skip digest store lookups for payloads that are
+    definitely new.
+
+    A saved filter is loaded with mmap, copy-on-write, so that many
+    processes loading the same file share a single copy in memory, until
+    new digests are added.
+    """
+    MAGIC = b'WARCIOBF'
+
+    # magic, num bits, num hashes, count
+    HEADER = struct.Struct('<8sQIQ')
+
+    def __init__(self, capacity=1000000, error_rate=0.001,
+                 num_bits=None, num_hashes=None, count=0, bits=None, offset=0):
+        if not num_bits or not num_hashes:
+            if capacity <= 0:
+                raise ValueError('Invalid bloom filter capacity: {0}'.format(capacity))
+
+            if not 0 < error_rate < 1:
+                raise ValueError('Invalid bloom filter error rate: {0}'.format(error_rate))
+
+        if not num_bits:
+            num_bits = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+            num_bits = max(8, num_bits)
+
+        if not num_hashes:
+            num_hashes = max(1, int(round(num_bits / float(capacity) * math.log(2))))
+
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.count = count
+
+        # bit array, either a bytearray or an mmap, starting at offset
+        self.bits = bits if bits is not None else bytearray((num_bits + 7) // 8)
+        self.offset = offset
+
+    def _positions(self, key):
+        if not isinstance(key, bytes):
+            key = key.encode('utf-8')
+
+        # double hashing: h1 + i * h2
+        h1, h2 = struct.unpack('<QQ', hashlib.md5(key).digest())
+        for i in range(self.num_hashes):
+            pos = (h1 + i * h2) % self.num_bits
+            yield self.offset + (pos >> 3), 1 << (pos & 7)
+
+    def add(self, key):
+        """ Add key, return True if it was (probably) already present
+        """
+        present = True
+        for index, mask in self._positions(key):
+            if not self.bits[index] & mask:
+                self.bits[index] |= mask
+                present = False
+
+        if not present:
+            self.count += 1
+
+        return present
+
+    def __contains__(self, key):
+        return all(self.bits[index] & mask for index, mask in self._positions(key))
+
+    def __len__(self):
+        return self.count
+
+    def save(self, filename):
+        with fsspec_open(filename, 'wb') as out:
+            out.write(self.HEADER.pack(self.MAGIC, self.num_bits, self.num_hashes, self.count))
+            out.write(self.bits[self.offset:])
+
+    @classmethod
+    def load(cls, filename, use_mmap=True):
+        """ Load a saved filter, memory-mapped if ``use_mmap``
+        and filename is a local file, otherwise read into memory
+        """
+        data = None
+        if use_mmap:
+            try:
+                with open(filename, 'rb') as fh:
+                    data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_COPY)
+            except (IOError, OSError, ValueError):
+                pass
+
+        if data is None:
+            with fsspec_open(filename, 'rb') as fh:
+                data = bytearray(fh.read())
+
+        magic, num_bits, num_hashes, count = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC:
+            raise Exception('Not a warcio bloom filter: ' + filename)
+
+        return cls(num_bits=num_bits, num_hashes=num_hashes, count=count,
+                   bits=data, offset=cls.HEADER.size)
+
+    def close(self):
+        if isinstance(self.bits, mmap.mmap):
+            self.bits.close()
+
+        self.bits = None
+
+
+# ============================================================================
+class BloomFilterBuilder(object):
+    """ Build a BloomFilter over the payload digests of the response
+    records of one or more WARC/ARC files, computing any missing digests,
+    for use with DedupWARCWriter
+    """
+
+    def __init__(self, inputs, output, capacity=None, error_rate=None):
+        self.inputs = inputs
+        self.output = output
+        self.bloom = BloomFilter(capacity=capacity if capacity is not None else 1000000,
+                                 error_rate=error_rate if error_rate is not None else 0.001)
+
+        self.builder = RecordBuilder()
+
+    def process_all(self):
+        for filename in self.inputs:
+            with fsspec_open(filename, 'rb') as fh:
+                self.process_one(fh)
+
+        self.bloom.save(self.output)
+        return len(self.bloom)
+
+    def process_one(self, stream):
+        for record in ArchiveIterator(stream,
+                                      no_record_parse=False,
+                                      arc2warc=True,
+                                      verify_http=False):
+
+            if record.rec_type not in DedupWARCWriter.DEDUP_TYPES:
+                continue
+
+            self.builder.ensure_digest(record, block=False, payload=True)
+
+            digest = record.rec_headers.get_header('WARC-Payload-Digest')
+            if digest:
+                self.bloom.add(digest)
@@ -1,8 +1,12 @@
+from importlib.util import find_spec
 from io import BytesIO
+import struct
 import zlib
 import sys
 
 from warcio.utils import BUFF_SIZE
+from warcio.limitreader import LimitReader
+from warcio.pipelinestats import timer
 
 
 #=================================================================
@@ -23,17 +27,211 @@ def deflate_decompressor_alt():
 
 #=================================================================
 def try_brotli_init():
+    # brotli, or brotlicffi (or brotlipy), imported when first used
+    if find_spec('brotli') or find_spec('brotlicffi'):
+        BufferedReader.DECOMPRESSORS['br'] = BrotliDecompressor
+
+
+class BrotliDecompressor(object):
+    """
+    Brotli decompressor, using the brotli bindings, if available,
+    otherwise brotlicffi or brotlipy
+    """
+    def __init__(self):
+        try:
+            import brotli
+        except ImportError:  #pragma: no cover
+            import brotlicffi as brotli
+
+        decomp = brotli.Decompressor()
+
+        # brotlipy only provides decompress()
+        self.process = getattr(decomp, 'process', None) or decomp.decompress
+        self.unused_data = None
+
+    def decompress(self, data):
+        return self.process(data)
+
+    def flush(self):
+        return b''
+
+
+#=================================================================
+# zstd frame, and skippable frame containing the dictionary used
+# by the frames of a .warc.zst file (little-endian magic numbers)
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+ZSTD_DICT_MAGIC = b'\x5d\x2a\x4d\x18'
+
+
+def try_zstd_init():
+    # zstandard is only imported when first used
+    if find_spec('zstandard'):
+        BufferedReader.DECOMPRESSORS['zstd'] = ZstdDecompressor
+        BufferedReader.DECOMPRESSORS['zstd_frames'] = ZstdFramesDecompressor
+
+
+def read_zstd_dict(stream):
+    """
+    Read the zstd dictionary frame at the current position of stream,
+    returning the dictionary, decompressed if it was compressed,
+    or None if there is no dictionary frame
+    """
+    size = _parse_zstd_dict_header(stream.read(8))
+    if size is None:
+        return None
+
+    return _decompress_zstd_dict(stream.read(size))
+
+
+def load_zstd_dict(fh):
+    """
+    Read the zstd dictionary frame at the start of seekable file fh,
+    when reading from an offset, restoring the current position.
+
+    In-memory ranges of a file (see RangeBytesIO) can't seek to the start,
+    so the dictionary is read with separate range reads instead
+    """
+    fetch_range = getattr(fh, 'fetch_range', None)
+    if fetch_range:
+        size = _parse_zstd_dict_header(fetch_range(0, 8))
+        if size is None:
+            return None
+
+        return _decompress_zstd_dict(fetch_range(8, 8 + size))
+
     try:
-        import brotli
+        pos = fh.tell()
+        fh.seek(0)
+    except Exception:
+        return None
 
-        def brotli_decompressor():
-            decomp = brotli.Decompressor()
-            decomp.unused_data = None
-            return decomp
+    try:
+        return read_zstd_dict(fh)
+    finally:
+        fh.seek(pos)
+
+
+def _parse_zstd_dict_header(header):
+    if len(header) < 8 or header[:4] != ZSTD_DICT_MAGIC:
+        return None
+
+    return struct.unpack('<I', header[4:])[0]
 
-        BufferedReader.DECOMPRESSORS['br'] = brotli_decompressor
-    except ImportError:  #pragma: no cover
-        pass
+
+def _decompress_zstd_dict(data):
+    if data[:4] == ZSTD_MAGIC:
+        import zstandard
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+    return data
+
+
+#=================================================================
+class ZstdDecompressor(object):
+    """
+    Decompressor for a single zstd frame, with the same interface
+    as zlib decompressors: data after the end of the frame is left
+    in unused_data.
+
+    A dictionary frame at the start of the input is read, and the
+    dictionary used for this and subsequent frames of the same reader.
+    If a frame requires a dictionary which was not read (eg. when
+    reading from an offset), it is loaded with the reader's
+    zstd_dict_loader, if any.
+    """
+    # max size of a frame header
+    MAX_HEADER_SIZE = 18
+
+    def __init__(self, reader=None):
+        self.reader = reader
+        self.decompobj = None
+        self.pending = b''
+        self.unused_data = b''
+
+        # size of the dictionary frame read before this frame, if any
+        self.dict_frame_size = 0
+
+    def decompress(self, data):
+        if not self.decompobj:
+            data = self._init_frame(self.pending + data)
+            if data is None:
+                return b''
+
+        data = self.decompobj.decompress(data)
+        self.unused_data = self.decompobj.unused_data
+        return data
+
+    def _init_frame(self, data):
+        import zstandard
+
+        if data[:4] == ZSTD_DICT_MAGIC:
+            size = 8 + struct.unpack('<I', data[4:8])[0] if len(data) >= 8 else None
+            if not size or len(data) < size:
+                self.pending = data
+                return None
+
+            self._set_dict(_decompress_zstd_dict(data[8:size]))
+            self.dict_frame_size = size
+            data = data[size:]
+
+        try:
+            params = zstandard.get_frame_parameters(data)
+        except zstandard.ZstdError:
+            if len(data) < self.MAX_HEADER_SIZE and ZSTD_MAGIC.startswith(data[:4]):
+                self.pending = data
+                return None
+
+            raise
+
+        self.pending = b''
+
+        dict_data = None
+        if params.dict_id:
+            dict_data = self._get_dict()
+            if not dict_data or dict_data.dict_id() not in (params.dict_id, 0):
+                raise Exception('zstd dictionary {0} not found'.format(params.dict_id))
+
+        self.decompobj = zstandard.ZstdDecompressor(dict_data=dict_data).decompressobj()
+        return data
+
+    def _get_dict(self):
+        if not self.reader:
+            return None
+
+        if not self.reader.zstd_dict and self.reader.zstd_dict_loader:
+            self._set_dict(self.reader.zstd_dict_loader())
+
+        return self.reader.zstd_dict
+
+    def _set_dict(self, data):
+        if data and self.reader:
+            import zstandard
+            self.reader.zstd_dict = zstandard.ZstdCompressionDict(data)
+
+    def flush(self):
+        return b''
+
+
+#=================================================================
+class ZstdFramesDecompressor(ZstdDecompressor):
+    """
+    Decompressor for all the frames of its input, one after the other,
+    eg. for the zstd http content-encoding, which may consist of several
+    frames, rather than stopping at the end of the first frame
+    """
+    def decompress(self, data):
+        buff = b''
+        while True:
+            # end of frame, start next one
+            if self.decompobj and self.decompobj.eof:
+                self.decompobj = None
+
+            buff += super(ZstdFramesDecompressor, self).decompress(data)
+
+            data = self.unused_data
+            self.unused_data = b''
+            if not data:
+                return buff
 
 
 #=================================================================
@@ -61,6 +259,14 @@ class BufferedReader(object):
                      'deflate_alt': deflate_decompressor_alt
                     }
 
+    # optional PipelineStats, to time decompression
+    stats = None
+
+    # zstd dictionary shared by all frames, and optional callable
+    # returning it, if not at the start of the input
+    zstd_dict = None
+    zstd_dict_loader = None
+
     def __init__(self, stream, block_size=BUFF_SIZE,
                  decomp_type=None,
                  starting_data=None,
@@ -86,7 +292,11 @@ class BufferedReader(object):
         if decomp_type:
             try:
                 self.decomp_type = decomp_type
-                self.decompressor = self.DECOMPRESSORS[decomp_type.lower()]()
+                decompressor = self.DECOMPRESSORS[decomp_type.lower()]
+                if decompressor in (ZstdDecompressor, ZstdFramesDecompressor):
+                    self.decompressor = decompressor(self)
+                else:
+                    self.decompressor = decompressor()
             except KeyError:
                 raise Exception('Decompression type not supported: ' +
                                 decomp_type)
@@ -125,7 +335,17 @@ class BufferedReader(object):
             self.buff = None
             return
 
-        data = self._decompress(data)
+        if self.stats is not None and self.decompressor:
+            start = timer()
+            data = self._decompress(data)
+
+            # not if not actually compressed
+            if self.decompressor:
+                self.stats.add_time('inflate', start)
+                self.stats.incr('bytes_inflated', len(data))
+        else:
+            data = self._decompress(data)
+
         self.buff_size = len(data)
         self.num_read += self.buff_size
         self.num_block_read += self.buff_size
@@ -141,6 +361,11 @@ class BufferedReader(object):
                     if self.decomp_type == 'deflate':
                         self._init_decomp('deflate_alt')
                         data = self._decompress(data)
+                    elif self.decomp_type == 'gzip' and data[:4] in (ZSTD_MAGIC, ZSTD_DICT_MAGIC):
+                        self._init_decomp('zstd')
+                        data = self._decompress(data)
+                    elif self.decomp_type == 'zstd':
+                        raise
                     else:
                         self.decompressor = None
                 # otherwise (partly decompressed), something is wrong
@@ -282,15 +507,36 @@ class ChunkedDataReader(BufferedReader):
 
     If at any point the chunked header is not available, the stream is
     assumed to not be chunked and no more dechunking occurs.
+
+    If the stream is ``bounded``, ie. ends with the chunked data, as a
+    LimitReader over a record does (the default for a LimitReader), it is
+    read a block at a time, and all the complete chunks of each block are
+    de-chunked at once.
+
+    Otherwise, each chunk length header is read as a line, and the rest of
+    the chunk with a single read, so that nothing past the end of the
+    chunked data is read from the stream, eg. a keep-alive connection.
     """
-    def __init__(self, stream, raise_exceptions=False, **kwargs):
+    # max length of a chunk length header line
+    MAX_HEADER_SIZE = 64
+
+    def __init__(self, stream, raise_exceptions=False, bounded=None, **kwargs):
         super(ChunkedDataReader, self).__init__(stream, **kwargs)
+        self.bounded = bounded if bounded is not None else isinstance(stream, LimitReader)
         self.all_chunks_read = False
         self.not_chunked = False
 
         # if False, we'll use best-guess fallback for parse errors
         self.raise_chunked_data_exceptions = raise_exceptions
 
+        # raw data read from the stream, not yet de-chunked, from raw_pos
+        self.raw = b''
+        self.raw_pos = 0
+        self.raw_eof = False
+
+        # bytes needed to complete the current chunk, None if reading its header
+        self.raw_needed = None
+
     def _fillbuff(self, block_size=None):
         if self.not_chunked:
             return super(ChunkedDataReader, self)._fillbuff(block_size)
@@ -302,80 +548,176 @@ class ChunkedDataReader(BufferedReader):
                not self.all_chunks_read and
                not self.not_chunked):
 
-            try:
-                length_header = self.stream.readline(64)
-                self._try_decode(length_header)
-            except ChunkedDataException as e:
-                if self.raise_chunked_data_exceptions:
-                    raise
+            self._read_chunks()
+
+        # parse as block as non-chunked
+        if self.not_chunked:
+            return super(ChunkedDataReader, self)._fillbuff(block_size)
 
+    def _read_chunks(self):
+        """ De-chunk the complete chunks in the raw data, reading
+        more from the stream if there are none
+        """
+        chunks = []
+
+        try:
+            while not self.all_chunks_read:
+                self._parse_chunks(chunks)
+                if chunks or self.all_chunks_read:
+                    break
+
+                self._read_raw()
+
+        except ChunkedDataException as e:
+            # errors are handled once the preceding chunks are read
+            if chunks:
+                self.raw_pos = e.header_pos
+
+            elif self.raise_chunked_data_exceptions:
+                raise
+
+            else:
                 # Can't parse the data as chunked.
                 # It's possible that non-chunked data is served
                 # with a Transfer-Encoding: chunked.
                 # Treat this as non-chunk encoded from here on.
-                self._process_read(length_header + e.data)
+                self._process_read(e.header + e.data + self.raw[e.end_pos:])
                 self.not_chunked = True
+                self.raw = b''
+                return
 
-                # parse as block as non-chunked
-                return super(ChunkedDataReader, self)._fillbuff(block_size)
+        self._process_read(b''.join(chunks))
 
-    def _try_decode(self, length_header):
-        # decode length header
-        try:
-            # ensure line ends with \r\n
-            assert(length_header[-2:] == b'\r\n')
-            chunk_size = length_header[:-2].split(b';')[0]
-            chunk_size = int(chunk_size, 16)
-            # sanity check chunk size
-            assert(chunk_size <= 2**31)
-        except (ValueError, AssertionError):
-            raise ChunkedDataException(b"Couldn't decode length header " +
-                                       length_header)
-
-        if not chunk_size:
-            # chunk_size 0 indicates end of file. read final bytes to compute digest.
-            final_data = self.stream.read(2)
+    def _parse_chunks(self, chunks):
+        """ Add all complete chunks in the raw data to chunks,
+        as memoryviews, stopping at the first incomplete chunk
+        """
+        raw = self.raw
+        view = memoryview(raw)
+        raw_len = len(raw)
+        raw_eof = self.raw_eof
+        max_header = self.MAX_HEADER_SIZE
+
+        pos = self.raw_pos
+
+        while True:
+            self.raw_pos = pos
+
+            end = raw.find(b'\n', pos, pos + max_header)
+            if end < 0:
+                if raw_len - pos < max_header and not raw_eof:
+                    self.raw_needed = None
+                    return
+
+                end = min(pos + max_header, raw_len) - 1
+
+            start = end + 1
+
+            # decode length header
             try:
-                assert(final_data == b'\r\n')
-            except AssertionError:
-                raise ChunkedDataException(b"Incorrect \r\n after length header of 0")
-            self.all_chunks_read = True
-            self._process_read(b'')
+                # ensure line ends with \r\n
+                assert(end > pos and raw[end - 1:end + 1] == b'\r\n')
+                chunk_size = raw[pos:end - 1]
+                if b';' in chunk_size:
+                    chunk_size = chunk_size.split(b';')[0]
+                chunk_size = int(chunk_size, 16)
+                # sanity check chunk size
+                assert(chunk_size <= 2**31)
+            except (ValueError, AssertionError):
+                header = raw[pos:start]
+                raise self._chunked_error(b"Couldn't decode length header " + header,
+                                          header, pos, start)
+
+            if not chunk_size:
+                if raw_len - start < 2 and not raw_eof:
+                    self.raw_needed = start + 2 - raw_len
+                    return
+
+                # chunk_size 0 indicates end of file. read final bytes to compute digest.
+                if raw[start:start + 2] != b'\r\n':
+                    raise self._chunked_error(b"Incorrect \r\n after length header of 0",
+                                              raw[pos:start], pos, start + 2)
+
+                self.raw_pos = start + 2
+                self.all_chunks_read = True
+                return
+
+            # negative size: empty chunk, as before
+            end = start + max(chunk_size, 0)
+            if raw_len < end + 2:
+                if not raw_eof:
+                    self.raw_needed = end + 2 - raw_len
+                    return
+
+                # if we unexpectedly run out of data,
+                # either raise an exception or just stop reading,
+                # assuming file was cut off
+                if raw_len < end:
+                    if self.raise_chunked_data_exceptions:
+                        msg = 'Ran out of data before end of chunk'
+                        raise self._chunked_error(msg, raw[pos:start], pos, raw_len, raw[start:])
+
+                    chunks.append(view[start:])
+                    self.raw_pos = raw_len
+                    self.all_chunks_read = True
+                    return
+
+            # if we successfully read a block without running out,
+            # it should end in \r\n
+            if raw[end:end + 2] != b'\r\n':
+                raise self._chunked_error(b"Chunk terminator not found.",
+                                          raw[pos:start], pos, end + 2, raw[start:end])
+
+            chunks.append(view[start:end])
+            pos = end + 2
+
+    def _chunked_error(self, msg, header, header_pos, end_pos, data=b''):
+        e = ChunkedDataException(msg, data)
+        e.header = header
+        e.header_pos = header_pos
+        e.end_pos = end_pos
+        return e
+
+    def _read_raw(self):
+        """ Read more raw data: a block, or at least the rest of the current
+        chunk, if the stream is bounded, otherwise only the rest of the
+        current chunk length header line, or of the current chunk
+        """
+        if self.raw_eof:
             return
 
-        data_len = 0
-        data = b''
+        raw = self.raw[self.raw_pos:]
 
-        # read chunk
-        while data_len < chunk_size:
-            new_data = self.stream.read(chunk_size - data_len)
+        if not self.bounded:
+            if self.raw_needed is None:
+                buff = self.stream.readline(self.MAX_HEADER_SIZE - len(raw))
+            else:
+                buff = self.stream.read(self.raw_needed)
 
-            # if we unexpectedly run out of data,
-            # either raise an exception or just stop reading,
-            # assuming file was cut off
-            if not new_data:
-                if self.raise_chunked_data_exceptions:
-                    msg = 'Ran out of data before end of chunk'
-                    raise ChunkedDataException(msg, data)
-                else:
-                    chunk_size = data_len
-                    self.all_chunks_read = True
+            if not buff:
+                self.raw_eof = True
 
-            data += new_data
-            data_len = len(data)
+            self.raw = raw + buff
+            self.raw_pos = 0
+            return
 
-        # if we successfully read a block without running out,
-        # it should end in \r\n
-        if not self.all_chunks_read:
-            clrf = self.stream.read(2)
-            if clrf != b'\r\n':
-                raise ChunkedDataException(b"Chunk terminator not found.",
-                                           data)
+        size = max(self.block_size, self.raw_needed or 0)
 
-        # hand to base class for further processing
-        self._process_read(data)
+        buffs = [raw]
+        while size > 0:
+            buff = self.stream.read(size)
+            if not buff:
+                self.raw_eof = True
+                break
+
+            buffs.append(buff)
+            size -= len(buff)
+
+        self.raw = b''.join(buffs)
+        self.raw_pos = 0
 
 
 #=================================================================
 try_brotli_init()
+try_zstd_init()
 
@@ -13,19 +13,22 @@ def _read_entire_stream(stream):
 
 
 class Checker(object):
-    def __init__(self, cmd):
+    def __init__(self, cmd, out=None):
         self.inputs = cmd.inputs
         self.verbose = cmd.verbose
         self.exit_value = 0
 
+        # output stream, default is stdout
+        self.out = out
+
     def process_all(self):
         for filename in self.inputs:
             try:
                 self.process_one(filename)
             except ArchiveLoadFailed as e:
-                print(filename)
-                print('  saw exception ArchiveLoadFailed: '+str(e).rstrip())
-                print('  skipping rest of file')
+                print(filename, file=self.out)
+                print('  saw exception ArchiveLoadFailed: '+str(e).rstrip(), file=self.out)
+                print('  skipping rest of file', file=self.out)
                 self.exit_value = 1
         return self.exit_value
 
@@ -62,10 +65,10 @@ class Checker(object):
 
                 if d_msg or output:
                     if not printed_filename:
-                        print(filename)
+                        print(filename, file=self.out)
                         printed_filename = True
-                    print(' ', 'offset', rec_offset, 'WARC-Record-ID', rec_id, rec_type)
+                    print(' ', 'offset', rec_offset, 'WARC-Record-ID', rec_id, rec_type, file=self.out)
                     if d_msg:
-                        print('   ', d_msg)
+                        print('   ', d_msg, file=self.out)
                     for o in output:
-                        print('   ', o)
+                        print('   ', o, file=self.out)
@@ -1,18 +1,12 @@
-from argparse import ArgumentParser, RawTextHelpFormatter
+from argparse import ArgumentParser, RawTextHelpFormatter, Action, SUPPRESS
 
-from warcio.indexer import Indexer
-from warcio.checker import Checker
-from warcio.extractor import Extractor
-from warcio.recompressor import Recompressor
+import sys
 
 
-try:
-    from importlib.metadata import version
-except ImportError:
-    import pkg_resources
-    def version(package):
-        return pkg_resources.get_distribution(package).version
-import sys
+# Modules used by each command are imported by its handler, when it is run,
+# to keep startup fast: see test_cli_import_time()
+
+INDEX_FIELDS = 'offset,length,warc-type,warc-target-uri'
 
 
 # ============================================================================
@@ -20,7 +14,7 @@ def main(args=None):
     parser = ArgumentParser(description='warcio utils',
                             formatter_class=RawTextHelpFormatter)
 
-    parser.add_argument('-V', '--version', action='version', version=get_version())
+    parser.add_argument('-V', '--version', action=VersionAction)
 
     subparsers = parser.add_subparsers(dest='cmd')
     subparsers.required = True
@@ -33,6 +27,19 @@ def main(args=None):
                  '(arbitrary http header), and "{warc-header}" (arbitrary warc '
                  'record header)')
     index.add_argument('-o', '--output', help='output file; default is stdout')
+    index.add_argument('--format', choices=('json', 'parquet', 'arrow'), default='json',
+            help='output format: json lines (default), or a columnar parquet or arrow file '
+                 '(requires pyarrow)')
+    index.add_argument('--checkpoint',
+            help='record progress in this file, to be able to resume with --resume')
+    index.add_argument('--resume', action='store_true',
+            help='resume from the --checkpoint file, appending to the output')
+    index.add_argument('--follow', action='store_true',
+            help='keep indexing new records appended to the inputs, like "tail -f"')
+    index.add_argument('--interval', type=float, default=1.0,
+            help='with --follow, seconds between checks for new data (default 1)')
+    index.add_argument('--timeout', type=float,
+            help='with --follow, stop after no new records for this many seconds')
     index.set_defaults(func=indexer)
 
     recompress = subparsers.add_parser('recompress', help='Recompress an existing WARC or ARC',
@@ -42,11 +49,40 @@ def main(args=None):
     recompress.add_argument('filename')
     recompress.add_argument('output')
     recompress.add_argument('-v', '--verbose', action='store_true')
+    recompress.add_argument('-w', '--workers', type=int, default=1,
+                            help='number of threads used to compress records')
+    recompress.add_argument('--index',
+                            help='also write an index of the recompressed file to this file')
+    recompress.add_argument('--index-fields',
+                            help='fields to include in the --index output, as for "index -f" '
+                                 '(default: ' + INDEX_FIELDS + ')')
+    recompress.add_argument('--to', choices=['gzip', 'zstd'], default='gzip',
+                            help='compress each record to a gzip member (default) or a zstd frame')
+    recompress.add_argument('--dict',
+                            help='with --to zstd, zstd dictionary file to compress with, '
+                                 'stored at the start of the output')
     recompress.set_defaults(func=recompressor)
 
     extract = subparsers.add_parser('extract', help='Extract WARC/ARC Record')
-    extract.add_argument('filename')
-    extract.add_argument('offset')
+    extract.add_argument('filename', nargs='?')
+    extract.add_argument('offset', nargs='?')
+    extract.add_argument('--batch',
+                         help='extract all records listed in this file ("-" for stdin) instead, one per line, '
+                              'as "filename offset [length]" or as json with filename, offset and length keys')
+    extract.add_argument('-o', '--output',
+                         help='with --batch, output directory, or .tar, .tar.gz or .zip file')
+    extract.add_argument('--workers', type=int, default=1,
+                         help='with --batch, number of remote ranges to fetch concurrently')
+    extract.add_argument('--max-per-host', type=int,
+                         help='with --batch, max concurrent requests per host or bucket')
+    extract.add_argument('--length', type=int,
+                         help='record length, if known (eg. from index): '
+                              'fetches the whole record from remote files with a single range request')
+    extract.add_argument('--block-size', type=int,
+                         help='block size for reading remote files of unknown length')
+    extract.add_argument('--cache-type', default='readahead',
+                         help='fsspec cache type for reading remote files of unknown length '
+                              '(default: readahead)')
     group = extract.add_mutually_exclusive_group()
     group.add_argument('--payload', action='store_true', help='output only record payload (after content and transfer decoding, if applicable)')
     group.add_argument('--headers', action='store_true', help='output only record headers (and http headers, if applicable)')
@@ -58,41 +94,488 @@ def main(args=None):
     check.add_argument('-v', '--verbose', action='store_true')
     check.set_defaults(func=checker)
 
+    filter_ = subparsers.add_parser('filter', help='Filter WARC/ARC records into a new WARC',
+                                    description='Write records matching all of the specified conditions ' +
+                                                'to a new compressed WARC')
+    filter_.add_argument('inputs', nargs='+')
+    filter_.add_argument('-o', '--output', help='output file; default is stdout')
+    filter_.add_argument('-t', '--type', help='comma-separated record types, eg. "response,revisit"')
+    filter_.add_argument('--uri-prefix', action='append', help='target uri prefix (may be repeated)')
+    filter_.add_argument('--uri-regex', help='regex to search for in target uri')
+    filter_.add_argument('--from', dest='from_date', help='earliest record date, as ISO date or timestamp')
+    filter_.add_argument('--to', dest='to_date', help='latest record date, as ISO date or timestamp')
+    filter_.add_argument('--mime', help='comma-separated mime types, "text/" to match any text type')
+    filter_.add_argument('--status', help='comma-separated HTTP status codes')
+    filter_.set_defaults(func=filterer)
+
+    split = subparsers.add_parser('split', help='Split WARC/ARC files into WARCs of a target size',
+                                  description='Split one or more WARC/ARC files into compressed WARCs of '
+                                              'about the given size, keeping related records together, '
+                                              'and copying compressed WARC records without recompression')
+    split.add_argument('inputs', nargs='+')
+    split.add_argument('-s', '--size', required=True,
+                       help='target size of each output, eg. 100M or 1G')
+    split.add_argument('-o', '--output-prefix',
+                       help='outputs are named <prefix>-00000.warc.gz, etc.; '
+                            'default is the name of the first input')
+    add_copy_args(split)
+    split.set_defaults(func=splitter)
+
+    merge = subparsers.add_parser('merge', help='Merge WARC/ARC files into a single WARC',
+                                  description='Concatenate the records of one or more WARC/ARC files '
+                                              'into a single compressed WARC, copying compressed WARC '
+                                              'records without recompression')
+    merge.add_argument('inputs', nargs='+')
+    merge.add_argument('-o', '--output', required=True)
+    add_copy_args(merge)
+    merge.set_defaults(func=merger)
+
+    bloom = subparsers.add_parser('bloom', help='Build a bloom filter of payload digests for deduplication',
+                                  description='Build a bloom filter of the payload digests of the responses '
+                                              'in one or more WARC/ARC files, which can be loaded '
+                                              'by DedupWARCWriter to skip lookups of new payloads')
+    bloom.add_argument('inputs', nargs='+')
+    bloom.add_argument('-o', '--output', required=True, help='bloom filter file to write')
+    bloom.add_argument('--capacity', type=int, default=1000000,
+                       help='expected number of digests (default 1000000)')
+    bloom.add_argument('--error-rate', type=float, default=0.001,
+                       help='false positive rate at capacity (default 0.001)')
+    bloom.set_defaults(func=bloom_builder)
+
+    stats = subparsers.add_parser('stats', help='Collection and per-file statistics',
+                                  description='Gather per-file and collection statistics in one read of '
+                                              'each file: record counts by type, bytes by mime and status, '
+                                              'date range, digest failures, truncated records and '
+                                              'compression ratio, written as JSON')
+    stats.add_argument('inputs', nargs='+')
+    stats.add_argument('-o', '--output', help='output file; default is stdout')
+    stats.add_argument('-j', '--jobs', type=int, default=1,
+                       help='number of files to process in parallel')
+    stats.set_defaults(func=stats_collector)
+
+    text = subparsers.add_parser('text', help='Extract the text of HTML responses as JSONL',
+                                 description='Extract the text of the HTML and plain text responses of '
+                                             'WARC/ARC files, decoding their content-encoding and charset, '
+                                             'on a pool of worker processes, written as one JSON line of '
+                                             'uri, date, digest and text per record')
+    text.add_argument('inputs', nargs='+')
+    text.add_argument('-o', '--output', help='output file; default is stdout')
+    text.add_argument('-j', '--jobs', type=int, default=1,
+                      help='number of worker processes extracting text')
+    text.add_argument('--mime', help='comma separated mime types to extract '
+                                     '(default text/html,application/xhtml+xml,text/plain)')
+    text.add_argument('--max-size', default='5M',
+                      help='max bytes of each payload to extract text from (default 5M)')
+    text.set_defaults(func=text_extractor)
+
+    train_dict = subparsers.add_parser('train-dict', help='Train a zstd dictionary for compressing WARC records',
+                                       description='Train a zstd dictionary from a sample of the records of '
+                                                   'existing WARC/ARC files, for "recompress --to zstd --dict", '
+                                                   'and report the compression ratio and speed on held out records')
+    train_dict.add_argument('inputs', nargs='+')
+    train_dict.add_argument('-o', '--output', required=True, help='dictionary file to write')
+    train_dict.add_argument('-s', '--size', default='110K',
+                            help='max dictionary size (default 110K)')
+    train_dict.add_argument('--samples', type=int, default=2000,
+                            help='max records sampled of each mime type (default 2000)')
+    train_dict.add_argument('--max-sample-size', default='16K',
+                            help='max bytes of payload included from each record (default 16K)')
+    train_dict.add_argument('--holdout', type=float, default=0.1,
+                            help='fraction of samples held out to measure the dictionary (default 0.1)')
+    train_dict.add_argument('--level', type=int, default=3,
+                            help='zstd compression level (default 3)')
+    train_dict.set_defaults(func=dict_trainer)
+
+    serve = subparsers.add_parser('serve', help='Run a server answering extract, index, check and lookup requests',
+                                  description='Run a long-running server, on localhost or a unix socket, '
+                                              'answering requests from "warcio client" concurrently, '
+                                              'to avoid the startup cost of a new process for each request')
+    serve.add_argument('--host', default='127.0.0.1', help='host to listen on (default 127.0.0.1)')
+    serve.add_argument('-p', '--port', type=int, default=8090, help='port to listen on (default 8090)')
+    serve.add_argument('--socket', help='listen on this unix socket instead')
+    serve.add_argument('-w', '--workers', type=int, default=8,
+                       help='number of requests handled concurrently (default 8)')
+    serve.add_argument('--root', help='directory of the files that may be read, requested by their '
+                                      'relative path (default: current directory)')
+    serve.add_argument('--allow-remote', action='store_true',
+                       help='also allow reading remote urls (s3://, http://, ...)')
+    serve.add_argument('--timeout', type=float, default=30,
+                       help='seconds after which idle connections are closed (default 30)')
+    serve.add_argument('--revalidate', type=float, default=1,
+                       help='seconds between checks of whether an open file has changed (default 1)')
+    serve.add_argument('--max-open', type=int, default=128,
+                       help='max files kept open between requests (default 128)')
+    serve.add_argument('--max-indexes', type=int, default=256,
+                       help='max files whose url index is kept for lookup requests (default 256)')
+    serve.add_argument('--cache-size', default='64M',
+                       help='max size of parsed records and small payloads cached, eg. 256M (default 64M), '
+                            '0 to disable')
+    serve.add_argument('-q', '--quiet', action='store_true', help="don't log requests")
+    serve.set_defaults(func=server)
+
+    client = subparsers.add_parser('client', help='Send a request to a "warcio serve" server',
+                                   description='Send an extract, index, check or lookup request '
+                                               'to a "warcio serve" server, with the same arguments as '
+                                               'the corresponding commands')
+    group = client.add_mutually_exclusive_group()
+    group.add_argument('--server', default='http://127.0.0.1:8090',
+                       help='server url (default http://127.0.0.1:8090)')
+    group.add_argument('--socket', help='server unix socket')
+    client_cmds = client.add_subparsers(dest='client_cmd')
+    client_cmds.required = True
+
+    client_extract = client_cmds.add_parser('extract', help='Extract WARC/ARC Record')
+    client_extract.add_argument('filename')
+    client_extract.add_argument('offset')
+    client_extract.add_argument('--length', type=int, help='record length, if known')
+    group = client_extract.add_mutually_exclusive_group()
+    group.add_argument('--payload', action='store_true', help='output only record payload')
+    group.add_argument('--headers', action='store_true', help='output only record headers')
+
+    client_index = client_cmds.add_parser('index', help='WARC/ARC Indexer')
+    client_index.add_argument('inputs', nargs='+')
+    client_index.add_argument('-f', '--fields', default='offset,warc-type,warc-target-uri',
+                              help='fields to include in json output, as for "index -f"')
+
+    client_check = client_cmds.add_parser('check', help='WARC digest checker')
+    client_check.add_argument('inputs', nargs='+')
+    client_check.add_argument('-v', '--verbose', action='store_true')
+
+    client_lookup = client_cmds.add_parser('lookup', help='Look up the records of a url in a WARC/ARC file')
+    client_lookup.add_argument('filename')
+    client_lookup.add_argument('url')
+
+    client.set_defaults(func=client_request)
+
+    for subparser in subparsers.choices.values():
+        subparser.add_argument('--stats', dest='pipeline_stats', action='store_true',
+                               help='print counters and time spent in each stage of reading and writing '
+                                    'records to stderr')
+
     cmd = parser.parse_args(args=args)
-    cmd.func(cmd)
+
+    if not cmd.pipeline_stats:
+        cmd.func(cmd)
+        return
+
+    from warcio.pipelinestats import collect_stats
+
+    with collect_stats() as stats:
+        try:
+            cmd.func(cmd)
+        finally:
+            stats.print_report(sys.stderr)
+
+
+# ============================================================================
+def add_copy_args(parser):
+    parser.add_argument('--warcinfo', action='store_true',
+                        help='drop any warcinfo records and write a new warcinfo record to each output')
+    parser.add_argument('--index', action='store_true',
+                        help='also write an index of each output to <output>.jsonl')
+    parser.add_argument('--index-fields',
+                        help='fields to include in the --index output, as for "index -f" '
+                             '(default: ' + INDEX_FIELDS + ')')
 
 
 # ============================================================================
 def get_version():
-    return '%(prog)s ' + version('warcio')
+    return '%(prog)s ' + get_package_version()
+
+
+def get_package_version():
+    try:
+        from importlib.metadata import version
+    except ImportError:  #pragma: no cover
+        import pkg_resources
+        def version(package):
+            return pkg_resources.get_distribution(package).version
+
+    return version('warcio')
+
+
+class VersionAction(Action):
+    """ Like the 'version' action, but only looks up the version when used
+    """
+    def __init__(self, option_strings, dest=SUPPRESS, default=SUPPRESS,
+                 help="show program's version number and exit"):
+        super(VersionAction, self).__init__(option_strings=option_strings,
+                                            dest=dest, default=default,
+                                            nargs=0, help=help)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        sys.stdout.write(get_version() % dict(prog=parser.prog) + '\n')
+        parser.exit()
 
 
 # ============================================================================
 def indexer(cmd):
     inputs = cmd.inputs or ('-',)  # default to stdin
-    _indexer = Indexer(cmd.fields, inputs, cmd.output)
+    incremental = cmd.checkpoint or cmd.follow
+    if cmd.resume and not cmd.checkpoint:
+        sys.exit('error: --resume requires --checkpoint')
+
+    if incremental and cmd.format != 'json':
+        sys.exit('error: --checkpoint and --follow are only supported for json output')
+
+    if incremental:
+        from warcio.incrementalindexer import IncrementalIndexer
+        _indexer = IncrementalIndexer(cmd.fields, inputs, cmd.output,
+                                      checkpoint=cmd.checkpoint, resume=cmd.resume,
+                                      follow=cmd.follow, interval=cmd.interval,
+                                      timeout=cmd.timeout)
+    elif cmd.format == 'json':
+        from warcio.indexer import Indexer
+        _indexer = Indexer(cmd.fields, inputs, cmd.output)
+    else:
+        from warcio.columnarindexer import ColumnarIndexer
+        _indexer = ColumnarIndexer(cmd.fields, inputs, cmd.output, format=cmd.format)
     _indexer.process_all()
 
 
 # ============================================================================
 def checker(cmd):
+    from warcio.checker import Checker
+
     _checker = Checker(cmd)
     sys.exit(_checker.process_all())
 
 
 # ============================================================================
 def extractor(cmd):
-    _extractor = Extractor(cmd.filename, cmd.offset)
+    from warcio.extractor import Extractor, BatchExtractor
+
+    if cmd.batch:
+        if not cmd.output or cmd.filename:
+            sys.exit('error: --batch requires --output, and no filename or offset')
+
+        from warcio.rangefetcher import RangeFetcher
+        from warcio.utils import fsspec_open
+
+        with fsspec_open(cmd.batch, 'rt', sys.stdin) as fh:
+            entries = BatchExtractor.load_entries(fh)
+
+        fetcher = None
+        if cmd.workers > 1:
+            fetcher = RangeFetcher(max_workers=cmd.workers, max_per_host=cmd.max_per_host,
+                                   block_size=cmd.block_size, cache_type=cmd.cache_type)
+
+        _extractor = BatchExtractor(entries, cmd.output,
+                                    block_size=cmd.block_size, cache_type=cmd.cache_type,
+                                    fetcher=fetcher)
+
+    elif cmd.filename is None or cmd.offset is None:
+        sys.exit('error: filename and offset are required')
+
+    else:
+        _extractor = Extractor(cmd.filename, cmd.offset, cmd.length,
+                               block_size=cmd.block_size, cache_type=cmd.cache_type)
+
     _extractor.extract(cmd.payload, cmd.headers)
 
 
 # ============================================================================
 def recompressor(cmd):
-    _recompressor = Recompressor(cmd.filename, cmd.output, cmd.verbose)
+    from warcio.recompressor import Recompressor
+
+    zstd_dict = None
+    if cmd.dict:
+        if cmd.to != 'zstd':
+            sys.exit('error: --dict requires --to zstd')
+
+        from warcio.utils import fsspec_open
+        with fsspec_open(cmd.dict, 'rb') as fh:
+            zstd_dict = fh.read()
+
+    _recompressor = Recompressor(cmd.filename, cmd.output, cmd.verbose,
+                                 workers=cmd.workers, index=cmd.index,
+                                 index_fields=cmd.index_fields,
+                                 compression=cmd.to, zstd_dict=zstd_dict)
     _recompressor.recompress()
 
 
+# ============================================================================
+def filterer(cmd):
+    from warcio.recordfilter import RecordFilter, WARCFilter
+
+    def split(value):
+        return value.split(',') if value else None
+
+    record_filter = RecordFilter(rec_types=split(cmd.type),
+                                 uri_prefix=cmd.uri_prefix,
+                                 uri_regex=cmd.uri_regex,
+                                 from_date=cmd.from_date,
+                                 to_date=cmd.to_date,
+                                 mime=split(cmd.mime),
+                                 status=split(cmd.status))
+
+    _filter = WARCFilter(cmd.inputs, cmd.output, record_filter)
+    _filter.process_all()
+
+
+# ============================================================================
+def get_copy_kwargs(cmd):
+    from collections import OrderedDict
+
+    warcinfo = None
+    if cmd.warcinfo:
+        warcinfo = OrderedDict([('software', 'warcio/' + get_package_version()),
+                                ('format', 'WARC File Format 1.0')])
+
+    return dict(warcinfo=warcinfo, index=cmd.index, index_fields=cmd.index_fields)
+
+
+def splitter(cmd):
+    from warcio.splitmerge import WARCSplitter
+    from warcio.utils import parse_size
+    import os
+    import re
+
+    try:
+        size = parse_size(cmd.size)
+    except ValueError as e:
+        sys.exit('error: ' + str(e))
+
+    prefix = cmd.output_prefix
+    if not prefix:
+        prefix = re.sub(r'(\.w?arc)?(\.gz)?$', '', os.path.basename(cmd.inputs[0]))
+
+    _splitter = WARCSplitter(cmd.inputs, prefix, size, **get_copy_kwargs(cmd))
+    for output in _splitter.process_all():
+        print(output)
+
+
+def merger(cmd):
+    from warcio.splitmerge import WARCMerger
+
+    _merger = WARCMerger(cmd.inputs, cmd.output, **get_copy_kwargs(cmd))
+    count = _merger.process_all()
+    print('{0} records merged to file: {1}'.format(count, cmd.output))
+
+
+# ============================================================================
+def bloom_builder(cmd):
+    from warcio.bloomfilter import BloomFilterBuilder
+
+    try:
+        _builder = BloomFilterBuilder(cmd.inputs, cmd.output, capacity=cmd.capacity,
+                                      error_rate=cmd.error_rate)
+    except ValueError as e:
+        sys.exit('error: ' + str(e))
+
+    count = _builder.process_all()
+    print('{0} digests added to bloom filter: {1}'.format(count, cmd.output))
+
+
+# ============================================================================
+def stats_collector(cmd):
+    from warcio.collectionstats import CollectionStats
+
+    _stats = CollectionStats(cmd.inputs, cmd.output, jobs=cmd.jobs)
+    _stats.process_all()
+
+
+# ============================================================================
+def text_extractor(cmd):
+    from warcio.textextractor import TextExtractor
+    from warcio.utils import parse_size
+
+    try:
+        max_size = parse_size(cmd.max_size)
+    except ValueError as e:
+        sys.exit('error: ' + str(e))
+
+    mime = cmd.mime.split(',') if cmd.mime else None
+
+    _extractor = TextExtractor(cmd.inputs, cmd.output, jobs=cmd.jobs,
+                               mime=mime, max_size=max_size)
+    _extractor.process_all()
+
+
+# ============================================================================
+def dict_trainer(cmd):
+    from warcio.dicttrainer import DictTrainer
+    from warcio.utils import parse_size
+
+    try:
+        dict_size = parse_size(cmd.size)
+        max_sample_size = parse_size(cmd.max_sample_size)
+    except ValueError as e:
+        sys.exit('error: ' + str(e))
+
+    _trainer = DictTrainer(cmd.inputs, cmd.output, dict_size=dict_size,
+                           samples_per_mime=cmd.samples,
+                           max_sample_size=max_sample_size,
+                           holdout=cmd.holdout, level=cmd.level)
+    try:
+        _trainer.train()
+    except Exception as e:
+        sys.exit('error: ' + str(e))
+
+
+# ============================================================================
+def server(cmd):
+    from warcio.server import WARCServer
+    from warcio.utils import parse_size
+
+    try:
+        cache_size = parse_size(cmd.cache_size)
+    except ValueError as e:
+        sys.exit('error: ' + str(e))
+
+    _server = WARCServer(cmd.host, cmd.port, unix_socket=cmd.socket,
+                         workers=cmd.workers, root=cmd.root, quiet=cmd.quiet,
+                         max_open=cmd.max_open, cache_size=cache_size,
+                         allow_remote=cmd.allow_remote, timeout=cmd.timeout,
+                         revalidate=cmd.revalidate, max_indexes=cmd.max_indexes)
+
+    sys.stderr.write('Serving on {0}\n'.format(cmd.socket or
+                                               'http://{0}:{1}'.format(*_server.address)))
+    try:
+        _server.serve_forever()
+    except KeyboardInterrupt:  #pragma: no cover
+        pass
+
+
+def client_request(cmd):
+    from warcio.server import WARCClient
+    import json
+
+    _client = WARCClient(cmd.server, unix_socket=cmd.socket)
+
+    try:
+        if cmd.client_cmd == 'extract':
+            result = _client.extract(cmd.filename, cmd.offset, cmd.length,
+                                     payload=cmd.payload, headers=cmd.headers)
+
+        elif cmd.client_cmd == 'index':
+            result = _client.index(cmd.inputs, cmd.fields)
+
+        elif cmd.client_cmd == 'check':
+            exit_value, result = _client.check(cmd.inputs, cmd.verbose)
+
+        else:
+            result = ''.join(json.dumps(entry) + '\n'
+                             for entry in _client.lookup(cmd.filename, cmd.url))
+
+    except Exception as e:
+        sys.exit('error: ' + str(e))
+
+    finally:
+        _client.close()
+
+    if isinstance(result, bytes):
+        try:
+            sys.stdout.buffer.write(result)
+        except AttributeError:  #pragma: no cover
+            sys.stdout.write(result)
+    else:
+        sys.stdout.write(result)
+
+    if cmd.client_cmd == 'check':
+        sys.exit(exit_value)
+
+
 # ============================================================================
 if __name__ == "__main__":  #pragma: no cover
     main()
-
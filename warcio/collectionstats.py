@@ -0,0 +1,186 @@
+from warcio.archiveiterator import ArchiveIterator
+from warcio.exceptions import ArchiveLoadFailed
+from warcio.utils import fsspec_open
+
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import json
+import sys
+
+
+# ============================================================================
+class FileStats(object):
+    """ Statistics of the records of one WARC/ARC file, or aggregated
+    over a collection of files, gathered in a single read
+    """
+    def __init__(self):
+        self.records = 0
+        self.types = Counter()
+        self.mime_records = Counter()
+        self.mime_bytes = Counter()
+        self.status_records = Counter()
+        self.status_bytes = Counter()
+        self.first_date = None
+        self.last_date = None
+        self.digests_passed = 0
+        self.digests_failed = 0
+        self.truncated = 0
+        self.incomplete = 0
+        self.compressed_bytes = 0
+        self.uncompressed_bytes = 0
+        self.errors = []
+
+    def process_one(self, stream):
+        it = ArchiveIterator(stream,
+                             no_record_parse=False,
+                             arc2warc=True,
+                             verify_http=False,
+                             check_digests=True)
+
+        try:
+            for record in it:
+                self.add_record(record, it)
+
+        except ArchiveLoadFailed as e:
+            self.errors.append(str(e).strip())
+
+    def add_record(self, record, it):
+        # read record, checking digests
+        length = it.get_record_length()
+
+        # not a multi-member gzip, offsets are not meaningful
+        if length < 0:
+            length = 0
+
+        self.records += 1
+        self.types[record.rec_type] += 1
+
+        self.compressed_bytes += length
+        self.uncompressed_bytes += record.rec_headers.total_len + (record.length or 0)
+
+        date = record.rec_headers.get_header('WARC-Date')
+        if date:
+            if not self.first_date or date < self.first_date:
+                self.first_date = date
+            if not self.last_date or date > self.last_date:
+                self.last_date = date
+
+        if record.rec_type in ('response', 'resource'):
+            payload_length = record.payload_length
+            if payload_length is None or payload_length < 0:
+                payload_length = record.length or 0
+
+            if record.http_headers:
+                mime = record.http_headers.get_header('Content-Type')
+                status = record.http_headers.get_statuscode()
+            else:
+                mime = record.content_type
+                status = None
+
+            mime = (mime or 'unknown').split(';')[0].strip().lower()
+            self.mime_records[mime] += 1
+            self.mime_bytes[mime] += payload_length
+
+            if status:
+                self.status_records[status] += 1
+                self.status_bytes[status] += payload_length
+
+        if record.digest_checker.passed is True:
+            self.digests_passed += 1
+        elif record.digest_checker.passed is False:
+            self.digests_failed += 1
+
+        if record.rec_headers.get_header('WARC-Truncated'):
+            self.truncated += 1
+
+        # input ended before the end of the record
+        if getattr(record.raw_stream, 'limit', 0) > 0:
+            self.incomplete += 1
+
+    def merge(self, other):
+        self.records += other.records
+        for name in ('types', 'mime_records', 'mime_bytes', 'status_records', 'status_bytes'):
+            getattr(self, name).update(getattr(other, name))
+
+        if other.first_date and (not self.first_date or other.first_date < self.first_date):
+            self.first_date = other.first_date
+
+        if other.last_date and (not self.last_date or other.last_date > self.last_date):
+            self.last_date = other.last_date
+
+        for name in ('digests_passed', 'digests_failed', 'truncated', 'incomplete',
+                     'compressed_bytes', 'uncompressed_bytes'):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+        self.errors.extend(other.errors)
+
+    def to_dict(self):
+        def by_count(records, size):
+            return OrderedDict((key, OrderedDict([('records', count), ('bytes', size[key])]))
+                               for key, count in records.most_common())
+
+        ratio = None
+        if self.compressed_bytes:
+            ratio = round(float(self.uncompressed_bytes) / self.compressed_bytes, 3)
+
+        return OrderedDict([
+            ('records', self.records),
+            ('types', OrderedDict(self.types.most_common())),
+            ('mime', by_count(self.mime_records, self.mime_bytes)),
+            ('status', by_count(self.status_records, self.status_bytes)),
+            ('first_date', self.first_date),
+            ('last_date', self.last_date),
+            ('digests_passed', self.digests_passed),
+            ('digests_failed', self.digests_failed),
+            ('truncated', self.truncated),
+            ('incomplete', self.incomplete),
+            ('compressed_bytes', self.compressed_bytes),
+            ('uncompressed_bytes', self.uncompressed_bytes),
+            ('compression_ratio', ratio),
+            ('errors', self.errors),
+        ])
+
+
+# ============================================================================
+def get_file_stats(filename):
+    stats = FileStats()
+    with fsspec_open(filename, 'rb') as fh:
+        stats.process_one(fh)
+
+    return stats
+
+
+# ============================================================================
+class CollectionStats(object):
+    """ Gather statistics of each of the inputs, and of the whole collection,
+    in one read of each file, processing up to ``jobs`` files in parallel,
+    and write them as JSON
+    """
+    def __init__(self, inputs, output=None, jobs=1):
+        self.inputs = inputs
+        self.output = output
+        self.jobs = jobs
+
+    def process_all(self):
+        if self.jobs > 1 and len(self.inputs) > 1:
+            with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+                all_stats = list(executor.map(get_file_stats, self.inputs))
+        else:
+            all_stats = [get_file_stats(filename) for filename in self.inputs]
+
+        collection = FileStats()
+        for stats in all_stats:
+            collection.merge(stats)
+
+        result = OrderedDict([
+            ('collection', collection.to_dict()),
+            ('files', OrderedDict((filename, stats.to_dict())
+                                  for filename, stats in zip(self.inputs, all_stats))),
+        ])
+
+        with fsspec_open(self.output, 'wt', sys.stdout) as out:
+            json.dump(result, out, indent=2)
+            out.write('\n')
+
+        return result
@@ -0,0 +1,133 @@
+import sys
+
+from warcio.indexer import Indexer
+from warcio.timeutils import iso_date_to_datetime
+from warcio.utils import fsspec_open
+
+from importlib.util import find_spec
+
+# pyarrow is only imported when used, as it is slow to import
+HAS_PYARROW = find_spec('pyarrow') is not None
+
+
+# ============================================================================
+class ColumnarIndexer(Indexer):
+    """ Indexer which writes the index as typed columns to a Parquet file
+    or an Arrow IPC stream, instead of JSON lines.
+
+    Index rows are buffered and written out as record batches of
+    ``batch_size`` rows, so memory use is bounded regardless of input size.
+
+    Offsets and lengths are written as int64, ``warc-date`` as a UTC
+    timestamp, and low-cardinality fields (record type, mime, status)
+    are dictionary-encoded. All other fields are written as strings.
+    """
+
+    FORMATS = ('parquet', 'arrow')
+
+    INT_FIELDS = ('offset', 'length')
+
+    DATE_FIELDS = ('warc-date',)
+
+    DICT_FIELDS = ('warc-type', 'content-type', 'http:content-type', 'http:status')
+
+    BATCH_SIZE = 65536
+
+    def __init__(self, fields, inputs, output, verify_http=False,
+                 format='parquet', batch_size=None):
+        if not HAS_PYARROW:
+            raise Exception('pyarrow is required for {0} output, '
+                            'install with: pip install warcio[arrow]'.format(format))
+
+        if format not in self.FORMATS:
+            raise Exception('Index format not supported: ' + format)
+
+        super(ColumnarIndexer, self).__init__(fields, inputs, output,
+                                              verify_http=verify_http)
+
+        self.format = format
+        self.batch_size = batch_size or self.BATCH_SIZE
+
+        import pyarrow as pa
+
+        self.column_names = [self.field_names.get(field, field) for field in self.fields]
+        self.schema = pa.schema([(name, self._get_column_type(name))
+                                 for name in self.column_names])
+
+        self.writer = None
+        self._reset_columns()
+
+    def _get_column_type(self, name):
+        import pyarrow as pa
+
+        if name in self.INT_FIELDS:
+            return pa.int64()
+        elif name in self.DATE_FIELDS:
+            return pa.timestamp('us', tz='UTC')
+        elif name in self.DICT_FIELDS:
+            return pa.dictionary(pa.int32(), pa.string())
+        else:
+            return pa.string()
+
+    def _convert_value(self, name, value):
+        if value is None:
+            return None
+
+        try:
+            if name in self.INT_FIELDS:
+                return int(value)
+            elif name in self.DATE_FIELDS:
+                return iso_date_to_datetime(value, tz_aware=True)
+        except (ValueError, TypeError):
+            return None
+
+        return value
+
+    def _reset_columns(self):
+        self.columns = [[] for name in self.column_names]
+        self.num_rows = 0
+
+    def _open_output(self):
+        try:
+            stdout = sys.stdout.buffer
+        except AttributeError:  #pragma: no cover
+            stdout = sys.stdout
+
+        return fsspec_open(self.output, 'wb', stdout)
+
+    def _write_line(self, out, index, record, filename):
+        for name, column in zip(self.column_names, self.columns):
+            column.append(self._convert_value(name, index.get(name)))
+
+        self.num_rows += 1
+        if self.num_rows >= self.batch_size:
+            self._write_batch(out)
+
+    def _write_footer(self, out):
+        # always write at least one batch, so that the schema is written
+        if self.num_rows or not self.writer:
+            self._write_batch(out)
+
+        self.writer.close()
+        self.writer = None
+
+    def _write_batch(self, out):
+        if not self.writer:
+            self.writer = self._create_writer(out)
+
+        import pyarrow as pa
+
+        arrays = [pa.array(column, type=field.type)
+                  for column, field in zip(self.columns, self.schema)]
+
+        self.writer.write_batch(pa.record_batch(arrays, schema=self.schema))
+        self._reset_columns()
+
+    def _create_writer(self, out):
+        if self.format == 'parquet':
+            import pyarrow.parquet as pq
+            return pq.ParquetWriter(out, self.schema)
+        else:
+            # stream format, as each batch may have its own dictionaries
+            import pyarrow as pa
+            return pa.ipc.new_stream(out, self.schema)
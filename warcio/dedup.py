@@ -0,0 +1,257 @@
+from warcio.warcwriter import WARCWriter
+from warcio.timeutils import timestamp_to_iso_date
+
+from collections import OrderedDict
+
+import json
+import sqlite3
+import threading
+
+
+# ============================================================================
+class DigestStore(object):
+    """ Base class for a store of payload digests already written,
+    mapping each digest to the (uri, date, record id) of the original record
+    """
+    def lookup(self, digest):  #pragma: no cover
+        """ Return (uri, date, record_id) for digest, or None if not found
+        """
+        raise NotImplementedError()
+
+    def add(self, digest, uri, date, record_id=None):  #pragma: no cover
+        raise NotImplementedError()
+
+    def close(self):
+        pass
+
+
+# ============================================================================
+class LRUDigestStore(DigestStore):
+    """ In-memory digest store, keeping at most ``max_size``
+    of the most recently used digests
+    """
+    MAX_SIZE = 100000
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size or self.MAX_SIZE
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    def lookup(self, digest):
+        with self.lock:
+            value = self.cache.get(digest)
+            if value is not None:
+                self.cache.move_to_end(digest)
+
+            return value
+
+    def add(self, digest, uri, date, record_id=None):
+        with self.lock:
+            self.cache[digest] = (uri, date, record_id)
+            self.cache.move_to_end(digest)
+
+            while len(self.cache) > self.max_size:
+                self.cache.popitem(last=False)
+
+    def __len__(self):
+        return len(self.cache)
+
+
+# ============================================================================
+class SQLiteDigestStore(DigestStore):
+    """ On-disk digest store, in a SQLite database, which can be shared
+    by multiple crawls. New digests are committed every ``commit_every``
+    additions, and on close()
+    """
+    COMMIT_EVERY = 1000
+
+    def __init__(self, filename, commit_every=None):
+        self.conn = sqlite3.connect(filename, check_same_thread=False)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS digests '
+                          '(digest TEXT PRIMARY KEY, uri TEXT, date TEXT, record_id TEXT)')
+
+        self.commit_every = commit_every or self.COMMIT_EVERY
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def lookup(self, digest):
+        with self.lock:
+            cursor = self.conn.execute('SELECT uri, date, record_id FROM digests WHERE digest = ?',
+                                       (digest,))
+            row = cursor.fetchone()
+
+        return tuple(row) if row else None
+
+    def add(self, digest, uri, date, record_id=None):
+        with self.lock:
+            self.conn.execute('INSERT OR IGNORE INTO digests VALUES (?, ?, ?, ?)',
+                              (digest, uri, date, record_id))
+
+            self.pending += 1
+            if self.pending >= self.commit_every:
+                self.conn.commit()
+                self.pending = 0
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
+
+
+# ============================================================================
+class CDXJDigestStore(LRUDigestStore):
+    """ Digest store loaded from one or more existing CDXJ indexes
+    (``urlkey timestamp {json}`` lines, with ``digest`` and ``url`` fields),
+    eg. of a previous crawl. The indexes are read-only: digests added
+    are only kept in memory
+    """
+    def __init__(self, filenames, max_size=None):
+        super(CDXJDigestStore, self).__init__(max_size)
+        self.index = {}
+
+        if isinstance(filenames, str):
+            filenames = [filenames]
+
+        for filename in filenames:
+            with open(filename, 'rt') as fh:
+                self.load(fh)
+
+    def load(self, stream):
+        for line in stream:
+            try:
+                urlkey, timestamp, data = line.rstrip().split(' ', 2)
+                data = json.loads(data)
+            except ValueError:
+                continue
+
+            digest = data.get('digest')
+            if not digest or data.get('mime') == 'warc/revisit':
+                continue
+
+            # pywb cdxj digests don't include the algorithm
+            if ':' not in digest:
+                digest = 'sha1:' + digest
+
+            self.index.setdefault(digest, (data.get('url'), timestamp_to_iso_date(timestamp), None))
+
+    def lookup(self, digest):
+        return self.index.get(digest) or super(CDXJDigestStore, self).lookup(digest)
+
+
+# ============================================================================
+class DedupWARCWriter(WARCWriter):
+    """ WARCWriter which checks the payload digest of each response record
+    against a DigestStore, writing a revisit record instead if
+    the payload has already been written.
+
+    The revisit record keeps the WARC-Record-ID, WARC-Date and other
+    headers of the original response, and refers to the first record
+    with the same payload.
+
+    The DigestStore is passed as the ``digest_store`` keyword argument,
+    defaulting to an LRUDigestStore. Extra positional arguments are passed
+    to WARCWriter, eg. gzip.
+
+    If a BloomFilter of the digests in the store is provided, as the
+    ``bloom_filter`` keyword argument, the store is only queried for
+    digests which may be in the filter. New digests are added to both.
+
+    The number of dedup hits and misses, and the payload bytes saved
+    by writing revisits, are tracked in ``hits``, ``misses`` and ``bytes_saved``,
+    and the number of store lookups skipped thanks to the filter in ``filter_skips``
+    (also included in ``get_stats()`` if a filter is used)
+    """
+    DEDUP_TYPES = ('response',)
+
+    SKIP_HEADERS = ('warc-type', 'content-type', 'content-length',
+                    'warc-block-digest', 'warc-payload-digest', 'warc-truncated')
+
+    def __init__(self, filebuf, *args, digest_store=None, bloom_filter=None, **kwargs):
+        super(DedupWARCWriter, self).__init__(filebuf, *args, **kwargs)
+        self.digest_store = digest_store if digest_store is not None else LRUDigestStore()
+        self.bloom_filter = bloom_filter
+
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.filter_skips = 0
+
+    def copy_record(self, it, can_copy=None):
+        # always check responses, never copied as-is
+        if it.record.rec_type in self.DEDUP_TYPES:
+            self.write_record(it.record)
+            return False
+
+        return super(DedupWARCWriter, self).copy_record(it, can_copy)
+
+    def _write_warc_record(self, out, record):
+        if record.rec_type in self.DEDUP_TYPES:
+            record = self._dedup_record(record)
+
+        super(DedupWARCWriter, self)._write_warc_record(out, record)
+
+    def _dedup_record(self, record):
+        # compute payload digest once, if not already set
+        self.ensure_digest(record, block=False, payload=True)
+
+        digest = record.rec_headers.get_header('WARC-Payload-Digest')
+        uri = record.rec_headers.get_header('WARC-Target-URI')
+        date = record.rec_headers.get_header('WARC-Date')
+        record_id = record.rec_headers.get_header('WARC-Record-ID')
+
+        if not digest or not uri:
+            return record
+
+        if self.bloom_filter is not None and digest not in self.bloom_filter:
+            # definitely new, don't query the store
+            self.filter_skips += 1
+            match = None
+        else:
+            match = self.digest_store.lookup(digest)
+
+        if not match:
+            self.misses += 1
+            self.digest_store.add(digest, uri, date, record_id)
+            if self.bloom_filter is not None:
+                self.bloom_filter.add(digest)
+
+            return record
+
+        self.hits += 1
+        if record.payload_length and record.payload_length > 0:
+            self.bytes_saved += record.payload_length
+
+        return self._create_dedup_revisit(record, digest, match)
+
+    def _create_dedup_revisit(self, record, digest, match):
+        refers_to_uri, refers_to_date, refers_to_id = match
+
+        warc_headers_dict = OrderedDict((name, value) for name, value in record.rec_headers.headers
+                                        if name.lower() not in self.SKIP_HEADERS)
+
+        if refers_to_id:
+            warc_headers_dict['WARC-Refers-To'] = refers_to_id
+
+        revisit = self.create_revisit_record(record.rec_headers.get_header('WARC-Target-URI'),
+                                             digest, refers_to_uri, refers_to_date,
+                                             http_headers=record.http_headers,
+                                             warc_headers_dict=warc_headers_dict)
+
+        # release payload buffered to compute the digest
+        if hasattr(record, '_orig_stream'):
+            record.raw_stream.close()
+            record.raw_stream = record._orig_stream
+
+        return revisit
+
+    def get_stats(self):
+        total = self.hits + self.misses
+        stats = {'hits': self.hits,
+                 'misses': self.misses,
+                 'hit_rate': float(self.hits) / total if total else 0.0,
+                 'bytes_saved': self.bytes_saved}
+
+        if self.bloom_filter is not None:
+            stats['filter_skips'] = self.filter_skips
+
+        return stats
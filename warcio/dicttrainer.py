@@ -0,0 +1,199 @@
+from warcio.archiveiterator import ArchiveIterator
+from warcio.exceptions import ArchiveLoadFailed
+from warcio.warcwriter import ZstdWrapper
+from warcio.pipelinestats import timer
+from warcio.utils import fsspec_open
+
+from collections import OrderedDict
+
+import random
+import sys
+import zlib
+
+
+# ============================================================================
+class DictTrainer(object):
+    """ Train a zstd dictionary, for compressing WARC records with
+    ``WARCWriter(compression='zstd', zstd_dict=...)`` or
+    ``warcio recompress --to zstd --dict``, from a sample of the records
+    of existing WARC/ARC files.
+
+    Each sample is a record as it is compressed to its own frame:
+    the WARC headers, HTTP headers and up to ``max_sample_size`` bytes
+    of the payload. Up to ``samples_per_mime`` records of each mime type
+    are sampled, so that the dictionary is not dominated by the most
+    common type, and payloads of already compressed types (images,
+    audio, video, archives) are left out.
+
+    A ``holdout`` fraction of the samples is not used for training, but
+    to report the compression ratio and speed with the dictionary,
+    compared to zstd without it, and to gzip.
+    """
+
+    DEFAULT_SIZE = 112640
+
+    COMPRESSED_TYPES = ('image/', 'audio/', 'video/', 'font/woff',
+                        'application/zip', 'application/gzip', 'application/x-gzip',
+                        'application/pdf', 'application/octet-stream')
+
+    def __init__(self, inputs, output, dict_size=DEFAULT_SIZE,
+                 samples_per_mime=2000, max_sample_size=16384,
+                 holdout=0.1, level=ZstdWrapper.DEFAULT_LEVEL, seed=0):
+        self.inputs = inputs
+        self.output = output
+        self.dict_size = dict_size
+        self.samples_per_mime = samples_per_mime
+        self.max_sample_size = max_sample_size
+        self.holdout = holdout
+        self.level = level
+        self.random = random.Random(seed)
+
+        # mime -> [number of records seen, samples]
+        self.buckets = OrderedDict()
+
+    def train(self, out=None):
+        import zstandard
+
+        for filename in self.inputs:
+            with fsspec_open(filename, 'rb') as fh:
+                try:
+                    for record in ArchiveIterator(fh, no_record_parse=False):
+                        self.add_record(record)
+
+                # sample the records read before the error
+                except ArchiveLoadFailed as e:
+                    sys.stderr.write('{0}: {1}\n'.format(filename, str(e).strip()))
+
+        samples = [sample for _, bucket in self.buckets.values() for sample in bucket]
+        self.random.shuffle(samples)
+
+        num_holdout = int(len(samples) * self.holdout)
+        holdout = samples[:num_holdout]
+        training = samples[num_holdout:]
+
+        if not training:
+            raise Exception('No records to train a dictionary from')
+
+        try:
+            zstd_dict = zstandard.train_dictionary(self.dict_size, training, level=self.level)
+        except zstandard.ZstdError as e:
+            raise Exception('Dictionary training failed, too few or too small samples? ' + str(e))
+
+        data = zstd_dict.as_bytes()
+        with fsspec_open(self.output, 'wb') as fh:
+            fh.write(data)
+
+        report = OrderedDict([
+            ('samples', len(training)),
+            ('holdout_samples', len(holdout)),
+            ('mime', OrderedDict((mime, bucket[0]) for mime, bucket in self.buckets.items())),
+            ('dict_size', len(data)),
+        ])
+
+        if holdout:
+            report['gzip'] = self.measure_gzip(holdout)
+            report['zstd'] = self.measure_zstd(holdout)
+            report['zstd_dict'] = self.measure_zstd(holdout, zstd_dict)
+
+        self.print_report(report, out)
+        return report
+
+    def add_record(self, record):
+        if record.http_headers:
+            mime = record.http_headers.get_header('Content-Type')
+        else:
+            mime = record.content_type
+
+        mime = (mime or 'unknown').split(';')[0].strip().lower()
+
+        seen, bucket = self.buckets.setdefault(mime, [0, []])
+        self.buckets[mime][0] = seen + 1
+
+        # reservoir sample of each mime type
+        if len(bucket) >= self.samples_per_mime:
+            i = self.random.randint(0, seen)
+            if i >= self.samples_per_mime:
+                return
+        else:
+            i = None
+
+        sample = record.rec_headers.to_bytes(encoding='utf-8')
+        if record.http_headers:
+            sample += record.http_headers.to_bytes()
+
+        if not mime.startswith(self.COMPRESSED_TYPES):
+            sample += record.raw_stream.read(self.max_sample_size)
+
+        if i is None:
+            bucket.append(sample)
+        else:
+            bucket[i] = sample
+
+    def measure_gzip(self, samples):
+        start = timer()
+        compressed = [self._gzip(sample) for sample in samples]
+        comp_time = timer() - start
+
+        start = timer()
+        for buff in compressed:
+            zlib.decompress(buff, zlib.MAX_WBITS + 16)
+
+        return self._result(samples, compressed, comp_time, timer() - start)
+
+    def measure_zstd(self, samples, zstd_dict=None):
+        import zstandard
+
+        compressor = zstandard.ZstdCompressor(level=self.level, dict_data=zstd_dict)
+        decompressor = zstandard.ZstdDecompressor(dict_data=zstd_dict)
+
+        start = timer()
+        compressed = [compressor.compress(sample) for sample in samples]
+        comp_time = timer() - start
+
+        start = timer()
+        for buff in compressed:
+            decompressor.decompress(buff)
+
+        return self._result(samples, compressed, comp_time, timer() - start)
+
+    @staticmethod
+    def _gzip(sample):
+        # same as GzippingWrapper
+        compressor = zlib.compressobj(9, zlib.DEFLATED, zlib.MAX_WBITS + 16)
+        return compressor.compress(sample) + compressor.flush()
+
+    @staticmethod
+    def _result(samples, compressed, comp_time, decomp_time):
+        size = sum(len(sample) for sample in samples)
+        compressed_size = sum(len(buff) for buff in compressed)
+
+        def mb_per_sec(elapsed):
+            return round(size / elapsed / 1000000.0, 1) if elapsed else None
+
+        return OrderedDict([
+            ('bytes', size),
+            ('compressed_bytes', compressed_size),
+            ('ratio', round(float(size) / compressed_size, 3) if compressed_size else None),
+            ('compress_mb_per_sec', mb_per_sec(comp_time)),
+            ('decompress_mb_per_sec', mb_per_sec(decomp_time)),
+        ])
+
+    def print_report(self, report, out=None):
+        out = out or sys.stdout
+
+        out.write('Dictionary of {0} bytes written to: {1}\n'.format(report['dict_size'], self.output))
+        out.write('Trained on {0} records ({1} mime types), {2} held out\n'.format(
+                  report['samples'], len(report['mime']), report['holdout_samples']))
+
+        if 'zstd_dict' not in report:
+            return
+
+        out.write('\nEach held out record compressed separately:\n')
+        out.write('  {0:<18} {1:>8} {2:>16} {3:>18}\n'.format('', 'ratio', 'compress MB/s', 'decompress MB/s'))
+
+        for name, title in (('gzip', 'gzip -9'),
+                            ('zstd', 'zstd -{0}'.format(self.level)),
+                            ('zstd_dict', 'zstd -{0} + dict'.format(self.level))):
+            result = report[name]
+            out.write('  {0:<18} {1:>8} {2:>16} {3:>18}\n'.format(
+                      title, result['ratio'], result['compress_mb_per_sec'], result['decompress_mb_per_sec']))
@@ -2,6 +2,7 @@ import base64
 import sys
 
 from warcio.limitreader import LimitReader
+from warcio.pipelinestats import timer
 from warcio.utils import to_native_str, Digester
 from warcio.exceptions import ArchiveLoadFailed
 
@@ -40,6 +41,9 @@ class DigestVerifyingReader(LimitReader):
     A reader which verifies the digest of the wrapped reader
     """
 
+    # optional PipelineStats, to time digest computation
+    stats = None
+
     def __init__(self, stream, limit, digest_checker, record_type=None,
                  payload_digest=None, block_digest=None, segment_number=None):
 
@@ -88,11 +92,17 @@ class DigestVerifyingReader(LimitReader):
     def _update(self, buff):
         super(DigestVerifyingReader, self)._update(buff)
 
+        if self.stats is not None:
+            start = timer()
+
         if self.payload_digester:
             self.payload_digester.update(buff)
         if self.block_digester:
             self.block_digester.update(buff)
 
+        if self.stats is not None:
+            self.stats.add_time('digest', start)
+
         if self.limit == 0:
             check = _compare_digest_rfc_3548(self.block_digester, self.block_digest)
             if check is False:
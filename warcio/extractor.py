@@ -1,42 +1,289 @@
 from warcio.archiveiterator import ArchiveIterator
 
-from warcio.utils import BUFF_SIZE, fsspec_open
+from warcio.utils import BUFF_SIZE, fsspec_open, fsspec_open_range, is_remote_path
+
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+import hashlib
+import json
+import os
 import sys
+import tempfile
+import time
 
 
 # ============================================================================
 class Extractor(object):
+    """ Extract the record at offset of filename. If a WARCFilePool
+    ``pool`` is provided, the file is opened through the pool
+    """
     READ_SIZE = BUFF_SIZE * 4
 
-    def __init__(self, filename, offset):
+    def __init__(self, filename, offset, length=None,
+                 block_size=None, cache_type='readahead', pool=None):
         self.filename = filename
         self.offset = offset
+        self.length = length
+        self.block_size = block_size
+        self.cache_type = cache_type
+        self.pool = pool
 
-    def extract(self, payload_only, headers_only):
-        with fsspec_open(self.filename, 'rb') as fh:
-            fh.seek(int(self.offset))
+    def _open(self):
+        length = int(self.length) if self.length is not None else None
+        if self.pool:
+            return self.pool.open(self.filename, int(self.offset), length)
+
+        return fsspec_open_range(self.filename, int(self.offset), length,
+                                 block_size=self.block_size,
+                                 cache_type=self.cache_type)
+
+    def extract(self, payload_only, headers_only, out=None):
+        """ Write the record to ``out``, default is stdout
+        """
+        with self._open() as fh:
             it = iter(ArchiveIterator(fh))
             record = next(it)
 
-            try:
-                stdout_raw = sys.stdout.buffer
-            except AttributeError:  #pragma: no cover
-                stdout_raw = sys.stdout
-
-            if payload_only:
-                stream = record.content_stream()
-                buf = stream.read(self.READ_SIZE)
-                while buf:
-                    stdout_raw.write(buf)
-                    buf = stream.read(self.READ_SIZE)
+            if out is None:
+                try:
+                    out = sys.stdout.buffer
+                except AttributeError:  #pragma: no cover
+                    out = sys.stdout
+
+            self.write_record(record, out, payload_only, headers_only)
+
+    def write_record(self, record, out, payload_only, headers_only):
+        if payload_only:
+            self._copy_stream(record.content_stream(), out)
+        else:
+            out.write(record.rec_headers.to_bytes())
+            if record.http_headers:
+                out.write(record.http_headers.to_bytes())
+            if not headers_only:
+                self._copy_stream(record.raw_stream, out)
+
+    def _copy_stream(self, stream, out):
+        buf = stream.read(self.READ_SIZE)
+        while buf:
+            out.write(buf)
+            buf = stream.read(self.READ_SIZE)
+
+
+# ============================================================================
+class BatchExtractor(Extractor):
+    """ Extract many records, given as a list of (filename, offset[, length])
+    entries, to a directory, or to a .tar, .tar.gz or .zip file, with one
+    output file per record named ``<filename>-<offset>.<ext>``
+
+    Entries are grouped by file and sorted by offset, so that each
+    file is opened only once. For remote files, entries with known
+    lengths that are adjacent (or separated by at most ``max_gap`` bytes)
+    are coalesced and fetched with a single range request.
+
+    If a RangeFetcher is provided, the remote ranges with known lengths
+    are fetched concurrently.
+    """
+
+    MAX_GAP = 64 * 1024
+
+    def __init__(self, entries, output, max_gap=None,
+                 block_size=None, cache_type='readahead',
+                 fetcher=None):
+        super(BatchExtractor, self).__init__(None, None,
+                                             block_size=block_size,
+                                             cache_type=cache_type)
+        self.entries = list(entries)
+        self.output = output
+        self.max_gap = max_gap if max_gap is not None else self.MAX_GAP
+        self.fetcher = fetcher
+
+    def extract(self, payload_only, headers_only):
+        if payload_only:
+            ext = '.payload'
+        elif headers_only:
+            ext = '.headers'
+        else:
+            ext = '.warc'
+
+        prefixes = self.get_name_prefixes()
+
+        count = 0
+        with BatchOutput(self.output) as output:
+            for filename, offset, length, fh in self.iter_positioned():
+                record = next(iter(ArchiveIterator(fh)))
+
+                name = '{0}-{1}{2}'.format(prefixes[filename], offset, ext)
+                with output.open_member(name) as out:
+                    self.write_record(record, out, payload_only, headers_only)
+
+                count += 1
+
+        return count
+
+    def iter_positioned(self):
+        """ Yield (filename, offset, length, stream) for each entry,
+        with stream positioned at the record offset
+        """
+        ranges = [(filename, start, length, group)
+                  for filename, entries in self.group_by_file().items()
+                  for start, length, group in self.coalesce(filename, entries)]
+
+        for filename, group, fh in self._iter_opened(ranges):
+            for offset, rec_length in group:
+                fh.seek(offset)
+                yield filename, offset, rec_length, fh
+
+    def _iter_opened(self, ranges):
+        def is_fetched(filename, length):
+            return self.fetcher and length is not None and is_remote_path(filename)
+
+        if self.fetcher:
+            fetched = self.fetcher.fetch_all((filename, start, length)
+                                             for filename, start, length, group in ranges
+                                             if is_fetched(filename, length))
+
+        for filename, start, length, group in ranges:
+            if is_fetched(filename, length):
+                yield filename, group, next(fetched)
+                continue
+
+            with fsspec_open_range(filename, start, length,
+                                   block_size=self.block_size,
+                                   cache_type=self.cache_type) as fh:
+                yield filename, group, fh
+
+    def get_name_prefixes(self):
+        """ Prefix of the output names of the records of each file: its
+        basename, followed by a hash of its full path if several files
+        have the same basename
+        """
+        filenames = OrderedDict((entry[0], os.path.basename(entry[0]))
+                                for entry in self.entries)
+
+        counts = Counter(filenames.values())
+
+        for filename, basename in filenames.items():
+            if counts[basename] > 1:
+                path_hash = hashlib.sha1(filename.encode('utf-8')).hexdigest()[:8]
+                filenames[filename] = '{0}-{1}'.format(basename, path_hash)
+
+        return filenames
+
+    def group_by_file(self):
+        """ Group entries by filename, each sorted by offset,
+        without duplicates
+        """
+        by_file = OrderedDict()
+        for entry in self.entries:
+            filename, offset = entry[0], int(entry[1])
+            length = int(entry[2]) if len(entry) > 2 and entry[2] is not None else None
+            by_file.setdefault(filename, {})[offset] = length
+
+        return OrderedDict((filename, sorted(offsets.items()))
+                           for filename, offsets in by_file.items())
+
+    def coalesce(self, filename, entries):
+        """ Split sorted (offset, length) entries for one file into
+        (start, length, entries) ranges to be read with one request.
+
+        Local files, and entries of unknown length, are read from
+        a single positioned stream (with length None)
+        """
+        if not is_remote_path(filename):
+            return [(entries[0][0], None, entries)]
+
+        ranges = []
+        unknown = []
+
+        for offset, length in entries:
+            if length is None:
+                unknown.append((offset, length))
+                continue
+
+            if ranges:
+                start, end, group = ranges[-1]
+                if offset - end <= self.max_gap:
+                    ranges[-1] = (start, max(end, offset + length), group + [(offset, length)])
+                    continue
+
+            ranges.append((offset, offset + length, [(offset, length)]))
+
+        ranges = [(start, end - start, group) for start, end, group in ranges]
+
+        if unknown:
+            ranges.append((unknown[0][0], None, unknown))
+
+        return ranges
+
+    @staticmethod
+    def load_entries(stream):
+        """ Load (filename, offset[, length]) entries, one per line, either
+        as JSON objects (eg. from ``warcio index -f filename,offset,length``)
+        or as whitespace-separated ``filename offset [length]``
+        """
+        entries = []
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+
+            if line.startswith('{'):
+                data = json.loads(line)
+                entries.append((data['filename'], data['offset'], data.get('length')))
             else:
-                stdout_raw.write(record.rec_headers.to_bytes())
-                if record.http_headers:
-                    stdout_raw.write(record.http_headers.to_bytes())
-                if not headers_only:
-                    buf = record.raw_stream.read(self.READ_SIZE)
-                    while buf:
-                        stdout_raw.write(buf)
-                        buf = record.raw_stream.read(self.READ_SIZE)
+                entries.append(tuple(line.split()[:3]))
+
+        return entries
+
+
+# ============================================================================
+class BatchOutput(object):
+    """ Output for extracted records: a directory, or a tar or zip file
+    """
+    def __init__(self, output):
+        self.output = output
+        self.archive = None
+
+    def __enter__(self):
+        import tarfile
+        import zipfile
+
+        if self.output.endswith('.zip'):
+            self.archive = zipfile.ZipFile(self.output, 'w', zipfile.ZIP_DEFLATED)
+        elif self.output.endswith(('.tar', '.tar.gz', '.tgz')):
+            mode = 'w' if self.output.endswith('.tar') else 'w:gz'
+            self.archive = tarfile.open(self.output, mode)
+        elif not os.path.isdir(self.output):
+            os.makedirs(self.output)
+
+        return self
+
+    def __exit__(self, *args):
+        if self.archive:
+            self.archive.close()
+            self.archive = None
+
+    @contextmanager
+    def open_member(self, name):
+        import tarfile
+        import zipfile
+
+        if isinstance(self.archive, zipfile.ZipFile):
+            with self.archive.open(name, 'w') as out:
+                yield out
+
+        elif isinstance(self.archive, tarfile.TarFile):
+            # tar needs member size upfront, so buffer first
+            with tempfile.SpooledTemporaryFile(max_size=512*1024) as out:
+                yield out
 
+                info = tarfile.TarInfo(name)
+                info.size = out.tell()
+                info.mtime = time.time()
+                out.seek(0)
+                self.archive.addfile(info, out)
 
+        else:
+            with fsspec_open(os.path.join(self.output, name), 'wb') as out:
+                yield out
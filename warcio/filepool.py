@@ -0,0 +1,203 @@
+from warcio.utils import fsspec_open, fsspec_open_range, get_file_version, is_remote_path
+
+from collections import OrderedDict
+from contextlib import contextmanager, ExitStack
+
+import io
+import threading
+import time
+
+
+# ============================================================================
+class PooledFile(object):
+    def __init__(self, filename, block_size=None, cache_type='readahead', version=None):
+        kwargs = {}
+        if is_remote_path(filename):
+            kwargs['cache_type'] = cache_type
+            if block_size:
+                kwargs['block_size'] = block_size
+
+        # (mtime, size) of local files when opened, to detect changes
+        self.version = version
+
+        self.stack = ExitStack()
+        self.fh = self.stack.enter_context(fsspec_open(filename, 'rb', **kwargs))
+
+        # memory held by the handle's buffer or cache
+        self.size = getattr(self.fh, 'blocksize', None) or io.DEFAULT_BUFFER_SIZE
+
+    def close(self):
+        self.stack.close()
+
+
+# ============================================================================
+class WARCFilePool(object):
+    """ Pool of open file handles, for repeated random access to the same
+    files, eg. extracting records by offset, without reopening each file
+    (and, for remote files, re-fetching its metadata) for each record.
+
+    ``open(filename, offset)`` hands out a handle positioned at offset,
+    for use by one thread at a time, which is returned to the pool
+    when done. Handles not in use are closed, least recently used first,
+    when more than ``max_open`` handles, or handles holding more than
+    ``max_bytes`` of buffers, are kept open.
+
+    Pooled handles to local files are only reused if the file's
+    modification time and size have not changed since it was opened,
+    which is checked at most once every ``revalidate`` seconds per file,
+    so that hot files are not stat()ed for each request.
+
+    The pool is thread-safe: a file read concurrently by several threads
+    is opened once for each thread.
+    """
+    def __init__(self, max_open=128, max_bytes=256 * 1024 * 1024,
+                 block_size=None, cache_type='readahead', revalidate=1.0):
+        self.max_open = max_open
+        self.max_bytes = max_bytes
+        self.block_size = block_size
+        self.cache_type = cache_type
+        self.revalidate = revalidate
+
+        # filename -> (time checked, file version), least recently checked first
+        self.versions = OrderedDict()
+
+        # filename -> list of PooledFile not in use, least recently used first
+        self.idle = OrderedDict()
+        self.num_idle = 0
+        self.idle_bytes = 0
+
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @contextmanager
+    def open(self, filename, offset=0, length=None):
+        """ Yield an open handle to filename, positioned at offset.
+
+        If the ``length`` of the range to be read is known, remote files
+        are not pooled, but the range is fetched with a single request
+        (see ``fsspec_open_range``)
+        """
+        if length is not None and is_remote_path(filename):
+            with fsspec_open_range(filename, offset, length,
+                                   block_size=self.block_size,
+                                   cache_type=self.cache_type) as fh:
+                yield fh
+            return
+
+        pooled = self._checkout(filename)
+
+        try:
+            pooled.fh.seek(offset)
+            yield pooled.fh
+        except:
+            # handle may be in an unknown state, don't reuse
+            pooled.close()
+            raise
+
+        self._checkin(filename, pooled)
+
+    def get_file_version(self, filename):
+        """ (mtime, size) of filename, as for ``warcio.utils.get_file_version()``,
+        checked at most once every ``revalidate`` seconds
+        """
+        now = time.monotonic()
+
+        with self.lock:
+            checked = self.versions.get(filename)
+            if checked and now - checked[0] < self.revalidate:
+                return checked[1]
+
+        version = get_file_version(filename)
+
+        with self.lock:
+            self.versions[filename] = (now, version)
+            self.versions.move_to_end(filename)
+
+            while len(self.versions) > self.max_open:
+                self.versions.popitem(last=False)
+
+        return version
+
+    def _checkout(self, filename):
+        version = self.get_file_version(filename)
+
+        with self.lock:
+            handles = self.idle.get(filename)
+            if handles and handles[-1].version == version:
+                pooled = handles.pop()
+                if not handles:
+                    del self.idle[filename]
+
+                self.num_idle -= 1
+                self.idle_bytes -= pooled.size
+                self.hits += 1
+                return pooled
+
+            self.misses += 1
+
+        # file changed, don't reuse open handles
+        if handles:
+            self.invalidate(filename)
+
+        return PooledFile(filename, self.block_size, self.cache_type, version)
+
+    def _checkin(self, filename, pooled):
+        evicted = []
+
+        with self.lock:
+            self.idle.setdefault(filename, []).append(pooled)
+            self.idle.move_to_end(filename)
+
+            self.num_idle += 1
+            self.idle_bytes += pooled.size
+
+            while self.num_idle > self.max_open or self.idle_bytes > self.max_bytes:
+                evicted.append(self._pop_lru())
+
+        for pooled in evicted:
+            pooled.close()
+
+    def _pop_lru(self):
+        filename, handles = next(iter(self.idle.items()))
+        pooled = handles.pop(0)
+        if not handles:
+            del self.idle[filename]
+
+        self.num_idle -= 1
+        self.idle_bytes -= pooled.size
+        self.evictions += 1
+        return pooled
+
+    def invalidate(self, filename):
+        """ Close the pooled handles to filename, eg. if it has changed
+        """
+        with self.lock:
+            handles = self.idle.pop(filename, [])
+            self.num_idle -= len(handles)
+            self.idle_bytes -= sum(pooled.size for pooled in handles)
+
+        for pooled in handles:
+            pooled.close()
+
+    def close(self):
+        with self.lock:
+            handles = [pooled for handles in self.idle.values() for pooled in handles]
+            self.idle.clear()
+            self.num_idle = 0
+            self.idle_bytes = 0
+
+        for pooled in handles:
+            pooled.close()
+
+    def get_stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'hit_rate': float(self.hits) / total if total else 0.0,
+                    'evictions': self.evictions,
+                    'open': self.num_idle,
+                    'open_bytes': self.idle_bytes}
@@ -0,0 +1,194 @@
+from warcio.indexer import Indexer
+from warcio.utils import fsspec_open
+
+import json
+import os
+import sys
+import time
+
+
+# ============================================================================
+class IncrementalIndexer(Indexer):
+    """ Indexer which records its progress in a checkpoint file, so that
+    an interrupted run can be resumed, and which can follow WARCs that
+    are still being written, indexing new records as they are appended.
+
+    The checkpoint records the offset after the last complete record
+    of each input, and the size of the output written so far. On resume,
+    the output is truncated to that size and each input is read
+    from its checkpoint offset.
+
+    Only complete records are indexed: a record still being written
+    (an unfinished gzip member, or fewer bytes than its Content-Length)
+    is indexed on a later pass, when following, or on resume.
+    """
+
+    CHECKPOINT_EVERY = 1000
+
+    def __init__(self, fields, inputs, output, verify_http=False,
+                 checkpoint=None, resume=False, follow=False,
+                 interval=1.0, timeout=None):
+        super(IncrementalIndexer, self).__init__(fields, inputs, output, verify_http=verify_http)
+
+        self.checkpoint = checkpoint
+        self.resume = resume
+        self.follow = follow
+        self.interval = interval
+        self.timeout = timeout
+
+        self.offsets = {}
+        self.output_offset = 0
+
+    def process_all(self):
+        if self.resume:
+            self.load_checkpoint()
+
+        with self._open_output() as out:
+            for filename in self.inputs:
+                if filename == '-':
+                    self._process_stdin(out)
+                else:
+                    self.process_file(filename, out)
+
+            self._write_footer(out)
+
+    def _process_stdin(self, out):
+        try:
+            stdin = sys.stdin.buffer
+        except AttributeError:  # py2
+            stdin = sys.stdin
+
+        self.process_one(stdin, out, '-')
+
+    def _open_output(self):
+        # newlines not translated, so that output_offset counts the bytes written
+        if not self.output_offset or not self.output:
+            return fsspec_open(self.output, 'wt', sys.stdout, newline='')
+
+        # discard any output written after the checkpoint
+        with open(self.output, 'r+b') as fh:
+            fh.truncate(self.output_offset)
+
+        return fsspec_open(self.output, 'at', newline='')
+
+    def process_file(self, filename, out):
+        """ Index filename from its last checkpoint offset, and, if following,
+        keep indexing new records until no new data is appended for ``timeout`` seconds
+        """
+        idle = 0
+
+        while True:
+            offset = self.offsets.get(filename, 0)
+
+            with fsspec_open(filename, 'rb') as fh:
+                fh.seek(0, os.SEEK_END)
+                size = fh.tell()
+
+                fh.seek(offset)
+                new_offset = self.index_from(fh, filename, out, size)
+
+            self.save_checkpoint(out)
+
+            if not self.follow:
+                break
+
+            if new_offset != offset:
+                idle = 0
+
+            elif self.timeout is not None and idle >= self.timeout:
+                break
+
+            # wait for file to grow
+            while True:
+                time.sleep(self.interval)
+                idle += self.interval
+
+                if self._get_size(filename) != size:
+                    break
+
+                if self.timeout is not None and idle >= self.timeout:
+                    return
+
+    def index_from(self, fh, filename, output, size=None):
+        """ Index complete records from the current position of fh,
+        returning the offset after the last complete record.
+
+        When following, an error reading the last record, up to the
+        end of the file (of ``size`` bytes), is taken to be a record still
+        being written, and the record is indexed on a later pass.
+        Other errors are raised
+        """
+        offset = fh.tell()
+        count = 0
+
+        it = self._create_record_iter(fh)
+
+        try:
+            for record in it:
+                it.get_record_length()
+
+                if not self.is_complete(it, record):
+                    break
+
+                self.process_index_entry(it, record, filename, output)
+
+                offset = it.offset
+                self.offsets[filename] = offset
+
+                count += 1
+                if count % self.CHECKPOINT_EVERY == 0:
+                    self.save_checkpoint(output)
+
+        except Exception:
+            # partial record at the end of a growing file
+            if not self.follow or size is None or fh.tell() < size:
+                raise
+
+        self.offsets[filename] = offset
+        return offset
+
+    def is_complete(self, it, record):
+        """ Return True if the record has been read completely, False if
+        the input ended before the end of the record
+        """
+        if it.reader.decompressor:
+            return getattr(it.reader.decompressor, 'eof', True)
+
+        limit = getattr(record.raw_stream, 'limit', None)
+        return limit is not None and limit <= 0
+
+    def _write_line(self, out, index, record, filename):
+        line = json.dumps(index) + '\n'
+        out.write(line)
+        self.output_offset += len(line)
+
+    def _get_size(self, filename):
+        with fsspec_open(filename, 'rb') as fh:
+            fh.seek(0, os.SEEK_END)
+            return fh.tell()
+
+    def load_checkpoint(self):
+        if not self.checkpoint or not os.path.isfile(self.checkpoint):
+            return
+
+        with open(self.checkpoint, 'rt') as fh:
+            state = json.load(fh)
+
+        self.offsets = state.get('offsets', {})
+        self.output_offset = state.get('output_offset', 0)
+
+    def save_checkpoint(self, out):
+        if not self.checkpoint:
+            return
+
+        out.flush()
+
+        state = {'offsets': self.offsets,
+                 'output_offset': self.output_offset}
+
+        # write atomically
+        temp = self.checkpoint + '.tmp'
+        with open(temp, 'wt') as fh:
+            json.dump(state, fh)
+
+        os.replace(temp, self.checkpoint)
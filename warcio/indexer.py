@@ -23,7 +23,7 @@ class Indexer(object):
         self.verify_http = verify_http
 
     def process_all(self):
-        with fsspec_open(self.output, 'wt', sys.stdout) as out:
+        with self._open_output() as out:
             for filename in self.inputs:
                 try:
                     stdin = sys.stdin.buffer
@@ -32,6 +32,11 @@ class Indexer(object):
                 with fsspec_open(filename, 'rb', stdin) as fh:
                     self.process_one(fh, out, filename)
 
+            self._write_footer(out)
+
+    def _open_output(self):
+        return fsspec_open(self.output, 'wt', sys.stdout)
+
     def process_one(self, input_, output, filename):
         it = self._create_record_iter(input_)
 
@@ -86,4 +91,21 @@ class Indexer(object):
     def _write_line(self, out, index, record, filename):
         out.write(json.dumps(index) + '\n')
 
+    def _write_footer(self, out):
+        pass
 
+
+# ============================================================================
+class RecordPosition(object):
+    """ Offset and length of a record written to a new file, which can be
+    passed to Indexer.process_index_entry() in place of the ArchiveIterator
+    """
+    def __init__(self, offset, length):
+        self.offset = offset
+        self.length = length
+
+    def get_record_offset(self):
+        return self.offset
+
+    def get_record_length(self):
+        return self.length
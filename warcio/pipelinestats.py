@@ -0,0 +1,135 @@
+from collections import Counter
+from contextlib import contextmanager
+
+import sys
+import time
+
+try:
+    timer = time.perf_counter
+except AttributeError:  #pragma: no cover
+    timer = time.time
+
+
+# stats object used by ArchiveIterator and WARCWriter instances
+# created without one, set by collect_stats()
+_default_stats = None
+
+
+# ============================================================================
+class PipelineStats(object):
+    """ Counters and timers of the work done when reading or writing WARCs:
+
+    - reading (``ArchiveIterator``): ``records``, ``members`` (gzip),
+      ``bytes_read``, ``bytes_inflated``, and time spent in ``read`` (I/O),
+      ``inflate``, ``parse_headers``, ``digest`` (when checking digests)
+      and ``user`` (the caller, between records)
+
+    - writing (``WARCWriter``): ``records_written``, ``records_copied``,
+      ``spills`` (records buffered to a temp file on disk to compute
+      their digests and length), ``bytes_written``, and time spent in
+      ``digest``, ``compress``, ``write`` (I/O), ``copy`` (of raw records)
+      and ``serialize`` (the rest of writing a record)
+
+    Time in nested stages is only counted once, eg. time spent reading
+    and inflating a record while the caller reads it is not counted
+    as ``user`` time.
+
+    Instrumentation is only enabled when a stats object is passed,
+    with ``stats=``, or set with ``collect_stats()``. To be notified of
+    each update instead, eg. to forward them to a metrics system,
+    override ``incr()`` and ``add_time()``.
+    """
+    def __init__(self):
+        self.counters = Counter()
+        self.timers = Counter()
+
+    def incr(self, name, value=1):
+        self.counters[name] += value
+
+    def add_time(self, name, start, nested=None):
+        """ Add time elapsed since ``start``, a ``timer()`` value.
+        If ``nested`` is set, to the ``total_time()`` at start, any time
+        added since then, by nested stages, is excluded, so that
+        each stage's time is counted only once.
+        """
+        elapsed = timer() - start
+        if nested is not None:
+            elapsed -= self.total_time() - nested
+
+        self.timers[name] += elapsed
+
+    def total_time(self):
+        return sum(self.timers.values())
+
+    def merge(self, other):
+        self.counters.update(other.counters)
+        self.timers.update(other.timers)
+
+    def to_dict(self):
+        return {'counters': dict(self.counters),
+                'timers': dict(self.timers)}
+
+    def print_report(self, out=None):
+        """ Print counters, and time spent in each stage, with its percentage
+        of the total time measured
+        """
+        out = out or sys.stderr
+
+        out.write('Counters:\n')
+        for name, value in sorted(self.counters.items()):
+            out.write('  {0:<20} {1:>14}\n'.format(name, value))
+
+        total = self.total_time()
+
+        out.write('Time (s):\n')
+        for name, value in self.timers.most_common():
+            percent = value * 100.0 / total if total else 0
+            out.write('  {0:<20} {1:>14.4f} {2:>6.1f}%\n'.format(name, value, percent))
+
+
+# ============================================================================
+class InstrumentedStream(object):
+    """ Wraps a file-like object, counting bytes and timing each read and write
+    """
+    def __init__(self, stream, stats):
+        self.stream = stream
+        self.stats = stats
+
+    def read(self, *args):
+        start = timer()
+        buff = self.stream.read(*args)
+        self.stats.add_time('read', start)
+        self.stats.incr('bytes_read', len(buff))
+        return buff
+
+    def write(self, buff):
+        start = timer()
+        res = self.stream.write(buff)
+        self.stats.add_time('write', start)
+        self.stats.incr('bytes_written', len(buff))
+        return res
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+# ============================================================================
+def get_default_stats():
+    return _default_stats
+
+
+@contextmanager
+def collect_stats(stats=None):
+    """ Instrument all ArchiveIterators and WARCWriters created
+    in this block (without a stats object of their own) with ``stats``,
+    or a new PipelineStats, which is returned
+    """
+    global _default_stats
+
+    prev_stats = _default_stats
+    _default_stats = stats if stats is not None else PipelineStats()
+
+    try:
+        yield _default_stats
+    finally:
+        _default_stats = prev_stats
@@ -0,0 +1,89 @@
+from warcio.archiveiterator import ArchiveIterator
+from warcio.utils import fsspec_open_range, get_range_fetcher, RangeBytesIO
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from six.moves.urllib.parse import urlsplit
+
+import threading
+
+
+# ============================================================================
+class RangeFetcher(object):
+    """ Fetch byte ranges of (remote) WARC/ARC files concurrently,
+    using a bounded pool of worker threads, with at most ``max_per_host``
+    concurrent requests to any one host (or S3 bucket).
+
+    Remote files are opened through fsspec, which caches filesystem
+    instances, so that connections are reused across requests.
+
+    Results are returned in request order, with at most ``max_pending``
+    ranges fetched ahead of the consumer, to bound memory use.
+    """
+
+    MAX_WORKERS = 8
+
+    MAX_PER_HOST = 4
+
+    def __init__(self, max_workers=None, max_per_host=None, max_pending=None,
+                 block_size=None, cache_type='readahead'):
+        self.max_workers = max_workers or self.MAX_WORKERS
+        self.max_per_host = max_per_host or self.MAX_PER_HOST
+        self.max_pending = max_pending or self.max_workers * 2
+
+        self.block_size = block_size
+        self.cache_type = cache_type
+
+        self.host_limits = {}
+        self.lock = threading.Lock()
+
+    def fetch(self, filename, offset, length=None):
+        """ Fetch the range [offset, offset + length) of filename and
+        return it as a RangeBytesIO. If length is None, the range of
+        the single record at offset is fetched
+        """
+        with self._get_host_limit(filename):
+            with fsspec_open_range(filename, offset, length,
+                                   block_size=self.block_size,
+                                   cache_type=self.cache_type) as fh:
+                if length is None:
+                    it = ArchiveIterator(fh)
+                    next(it)
+                    length = it.get_record_length()
+                    fh.seek(offset)
+
+                return RangeBytesIO(fh.read(length), offset,
+                                    get_range_fetcher(filename))
+
+    def fetch_all(self, ranges):
+        """ Fetch each (filename, offset, length) range concurrently,
+        yielding the results in the order requested
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = deque()
+            try:
+                for filename, offset, length in ranges:
+                    pending.append(executor.submit(self.fetch, filename, offset, length))
+
+                    if len(pending) >= self.max_pending:
+                        yield pending.popleft().result()
+
+                while pending:
+                    yield pending.popleft().result()
+
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _get_host_limit(self, filename):
+        parts = urlsplit(filename)
+        host = (parts.scheme, parts.netloc)
+
+        with self.lock:
+            limit = self.host_limits.get(host)
+            if not limit:
+                limit = threading.BoundedSemaphore(self.max_per_host)
+                self.host_limits[host] = limit
+
+        return limit
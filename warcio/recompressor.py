@@ -1,22 +1,52 @@
 from warcio.archiveiterator import ArchiveIterator
 from warcio.exceptions import ArchiveLoadFailed
 
-from warcio.warcwriter import WARCWriter
+from warcio.warcwriter import WARCWriter, GzippingWrapper, ZstdWrapper
 from warcio.bufferedreaders import DecompressingBufferedReader
-from warcio.utils import fsspec_open
+from warcio.indexer import Indexer, RecordPosition
+from warcio.utils import fsspec_open, BUFF_SIZE, CountingWriter
+
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 
 import tempfile
-import shutil
+import threading
 import traceback
 import sys
 
 
 # ============================================================================
 class Recompressor(object):
-    def __init__(self, filename, output, verbose=False):
+    """ Recompress a WARC or ARC file, each record to a separate gzip member,
+    or, with ``compression='zstd'``, to a separate zstd frame, optionally
+    using the dictionary ``zstd_dict`` (stored at the start of the output).
+
+    With more than one worker, records are read and serialized in the
+    main thread, then compressed concurrently by a pool of worker threads
+    (zlib releases the GIL) and written out in the original order.
+
+    If an index output is given, an index of the recompressed file, with
+    the specified fields, is written at the same time.
+    """
+
+    INDEX_FIELDS = 'offset,length,warc-type,warc-target-uri'
+
+    READ_SIZE = BUFF_SIZE * 4
+
+    SPOOL_SIZE = 512 * 1024
+
+    def __init__(self, filename, output, verbose=False, workers=1,
+                 index=None, index_fields=None, compression='gzip', zstd_dict=None):
         self.filename = filename
         self.output = output
         self.verbose = verbose
+        self.workers = workers
+        self.index = index
+        self.indexer = Indexer(index_fields or self.INDEX_FIELDS, [], None)
+        self.compression = compression
+        self.zstd_dict = zstd_dict
+        self.local = threading.local()
 
     def recompress(self):
         from warcio.cli import main
@@ -54,31 +84,127 @@ class Recompressor(object):
             sys.exit(1)
 
     def load_and_write(self, stream, output):
-        count = 0
         with fsspec_open(output, 'wb') as out:
-            writer = WARCWriter(filebuf=out, gzip=True)
-
-            for record in ArchiveIterator(stream,
-                                          no_record_parse=False,
-                                          arc2warc=True,
-                                          verify_http=False):
+            with self._open_index() as index_out:
+                it = ArchiveIterator(stream,
+                                     no_record_parse=False,
+                                     arc2warc=True,
+                                     verify_http=False)
 
-                writer.write_record(record)
-                count += 1
+                out = CountingWriter(out)
 
-            return count
+                # dictionary frame is not part of the first record
+                if self.compression == 'zstd' and self.zstd_dict:
+                    ZstdWrapper.write_dict(out, self.zstd_dict)
 
-    def decompress_and_recompress(self, stream, output):
-        with tempfile.TemporaryFile() as tout:
-            decomp = DecompressingBufferedReader(stream, read_all_members=True)
+                if self.workers > 1:
+                    written = self._write_parallel(it, out)
+                else:
+                    written = self._write_serial(it, out)
 
-            # decompress entire file to temp file
-            stream.seek(0)
-            shutil.copyfileobj(decomp, tout)
-
-            # attempt to compress and write temp
-            tout.seek(0)
-            return self.load_and_write(tout, output)
+                count = 0
+                for record, offset, length in written:
+                    if index_out:
+                        position = RecordPosition(offset, length)
+                        self.indexer.process_index_entry(position, record, output, index_out)
 
+                    count += 1
 
+                return count
 
+    def decompress_and_recompress(self, stream, output):
+        # decompress all members, streamed directly to the parser,
+        # ignoring the broken member boundaries
+        stream.seek(0)
+        decomp = DecompressingBufferedReader(stream, read_all_members=True)
+
+        return self.load_and_write(decomp, output)
+
+    def _write_serial(self, it, out):
+        """ Compress and write each record in order, yielding
+        (record, offset, length) for each written record
+        """
+        writer = WARCWriter(filebuf=out, compression=self.compression,
+                            zstd_dict=self.zstd_dict)
+
+        for record in it:
+            offset = out.count
+            writer.write_record(record)
+            yield record, offset, out.count - offset
+
+    def _write_parallel(self, it, out):
+        """ Serialize each record, compress the serialized records
+        concurrently and write them in order, yielding
+        (record, offset, length) for each written record
+        """
+        writer = WARCWriter(filebuf=None, gzip=False)
+        max_pending = self.workers * 2
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+
+            def write_next():
+                record, future = pending.popleft()
+                offset = out.count
+                with future.result() as member:
+                    member.seek(0)
+                    self._copy_stream(member, out)
+
+                return record, offset, out.count - offset
+
+            try:
+                for record in it:
+                    buff = tempfile.SpooledTemporaryFile(max_size=self.SPOOL_SIZE)
+                    writer._write_warc_record(buff, record)
+
+                    pending.append((record, executor.submit(self._compress_member, buff)))
+
+                    if len(pending) >= max_pending:
+                        yield write_next()
+
+                while pending:
+                    yield write_next()
+
+            finally:
+                for record, future in pending:
+                    future.cancel()
+
+    def _compress_member(self, buff):
+        """ Compress a serialized record to a new gzip member or zstd frame,
+        same as the serial WARCWriter
+        """
+        member = tempfile.SpooledTemporaryFile(max_size=self.SPOOL_SIZE)
+
+        if self.compression == 'zstd':
+            wrapper = ZstdWrapper(member, compressor=self._get_zstd_compressor())
+        else:
+            wrapper = GzippingWrapper(member)
+
+        with buff:
+            buff.seek(0)
+            self._copy_stream(buff, wrapper)
+
+        return member
+
+    def _get_zstd_compressor(self):
+        # zstd compressors can't be shared between threads
+        compressor = getattr(self.local, 'zstd_compressor', None)
+        if not compressor:
+            compressor = ZstdWrapper.get_compressor(self.zstd_dict)
+            self.local.zstd_compressor = compressor
+
+        return compressor
+
+    def _copy_stream(self, stream, out):
+        buff = stream.read(self.READ_SIZE)
+        while buff:
+            out.write(buff)
+            buff = stream.read(self.READ_SIZE)
+
+        out.flush()
+
+    def _open_index(self):
+        if not self.index:
+            return nullcontext()
+
+        return fsspec_open(self.index, 'wt')
@@ -0,0 +1,151 @@
+from array import array
+from collections import OrderedDict
+
+
+# ============================================================================
+class RecordBatch(object):
+    """ A batch of records, stored as columns, one per field: a list of
+    values for each header field (None if missing), and ``array('q')``
+    of ints for ``offset`` and ``length``, which can be used directly
+    with NumPy (``numpy.frombuffer(batch['offset'], dtype='int64')``).
+
+    Fields are named as for ``warcio index``: WARC header names,
+    ``http:`` + HTTP header name, ``http:status``, ``offset`` and ``length``,
+    and ``payload`` for the payload bytes, if requested.
+    """
+    INT_FIELDS = ('offset', 'length')
+
+    def __init__(self, fields):
+        self.fields = list(fields)
+        self.columns = OrderedDict((field, array('q') if field in self.INT_FIELDS else [])
+                                   for field in self.fields)
+        self.num_rows = 0
+
+    def __len__(self):
+        return self.num_rows
+
+    def __getitem__(self, field):
+        return self.columns[field]
+
+    def to_pydict(self):
+        return OrderedDict((field, list(column)) for field, column in self.columns.items())
+
+    def to_arrow(self):
+        """ Convert to a ``pyarrow.RecordBatch``, with ``offset`` and
+        ``length`` as int64 (without copying), ``payload`` as binary
+        and all other fields as strings
+        """
+        import pyarrow as pa
+
+        arrays = []
+        for field, column in self.columns.items():
+            if field in self.INT_FIELDS:
+                arrays.append(pa.Array.from_buffers(pa.int64(), len(column),
+                                                    [None, pa.py_buffer(column)]))
+            elif field == 'payload':
+                arrays.append(pa.array(column, type=pa.binary()))
+            else:
+                arrays.append(pa.array(column, type=pa.string()))
+
+        return pa.RecordBatch.from_arrays(arrays, names=self.fields)
+
+
+# ============================================================================
+def iter_batches(it, batch_size=1000, fields=None, payload=False):
+    """ Read the records of ArchiveIterator ``it``, yielding RecordBatches
+    of up to ``batch_size`` records, with the specified fields
+    (default: ``RecordBatchBuilder.DEFAULT_FIELDS``), and with the
+    decoded payload of each record if ``payload`` is set
+    """
+    builder = RecordBatchBuilder(fields, payload)
+
+    # http headers only parsed if needed, also to check payload digests
+    # or by the record filter
+    no_record_parse = it.no_record_parse
+    if (not it.record and not builder.http_fields and not payload and not it.check_digests
+        and not (it.record_filter and it.record_filter.needs_http_headers)):
+        it.no_record_parse = True
+
+    try:
+        batch = builder.new_batch()
+
+        for record in it:
+            builder.add_record(batch, record, it)
+
+            if batch.num_rows >= batch_size:
+                yield batch
+                batch = builder.new_batch()
+
+        if batch.num_rows:
+            yield batch
+
+    finally:
+        it.no_record_parse = no_record_parse
+
+
+# ============================================================================
+class RecordBatchBuilder(object):
+    """ Add the fields of each record to the columns of a RecordBatch,
+    looking up all header fields in a single pass over the headers
+    """
+    DEFAULT_FIELDS = ('offset', 'length', 'warc-type', 'warc-target-uri',
+                      'warc-date', 'warc-record-id', 'content-type')
+
+    def __init__(self, fields=None, payload=False):
+        if isinstance(fields, str):
+            fields = fields.split(',')
+
+        self.fields = list(fields or self.DEFAULT_FIELDS)
+        if payload and 'payload' not in self.fields:
+            self.fields.append('payload')
+
+        self.payload = 'payload' in self.fields
+        self.http_fields = [field for field in self.fields if field.startswith('http:')]
+
+        self.rec_header_names = set(field.lower() for field in self.fields
+                                    if field not in RecordBatch.INT_FIELDS
+                                    and field != 'payload'
+                                    and not field.startswith('http:'))
+
+        self.http_header_names = set(field[5:].lower() for field in self.http_fields
+                                     if field != 'http:status')
+
+        # header names are case-insensitive
+        self.keys = [field.lower() for field in self.fields]
+
+    def new_batch(self):
+        return RecordBatch(self.fields)
+
+    def add_record(self, batch, record, it):
+        values = self._find_headers(record.rec_headers, self.rec_header_names, {})
+
+        if self.http_fields and record.http_headers:
+            http_values = self._find_headers(record.http_headers, self.http_header_names, {})
+            for name, value in http_values.items():
+                values['http:' + name] = value
+
+            if record.rec_type in ('response', 'revisit'):
+                values['http:status'] = record.http_headers.get_statuscode()
+
+        if self.payload:
+            values['payload'] = record.content_stream().read()
+
+        values['offset'] = it.get_record_offset()
+        values['length'] = it.get_record_length()
+
+        for key, column in zip(self.keys, batch.columns.values()):
+            column.append(values.get(key))
+
+        batch.num_rows += 1
+
+    @staticmethod
+    def _find_headers(headers, names, values):
+        if not names:
+            return values
+
+        for name, value in headers.headers:
+            name = name.lower()
+            if name in names and name not in values:
+                values[name] = value
+
+        return values
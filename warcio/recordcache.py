@@ -0,0 +1,321 @@
+from warcio.archiveiterator import ArchiveIterator
+from warcio.bufferedreaders import DecompressingBufferedReader, load_zstd_dict
+from warcio.digestverifyingreader import DigestChecker
+from warcio.limitreader import LimitReader
+from warcio.recordloader import ArcWarcRecord
+from warcio.statusandheaders import StatusAndHeaders
+from warcio.utils import fsspec_open_range, get_file_version
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from io import BytesIO
+
+import json
+import sqlite3
+import threading
+import time
+
+
+# ============================================================================
+class CachedRecord(object):
+    """ Parsed headers of a record, and its payload, if small enough to cache,
+    or otherwise the position of the payload in the decompressed record
+    """
+    def __init__(self, record, payload=None, payload_start=None, payload_length=None):
+        self.format = record.format
+        self.rec_type = record.rec_type
+        self.rec_headers = record.rec_headers
+        self.http_headers = record.http_headers
+        self.content_type = record.content_type
+        self.length = record.length
+        self.payload_length = record.payload_length
+
+        self.payload = payload
+
+        # offset and length of payload in decompressed record
+        self.payload_start = payload_start
+        self.remaining = payload_length
+
+    def get_size(self):
+        size = self.rec_headers.total_len
+        if self.http_headers:
+            size += self.http_headers.total_len
+
+        if self.payload:
+            size += len(self.payload)
+
+        return size
+
+    def to_record(self, stream):
+        # copy headers, shared by all users of the cache
+        return ArcWarcRecord(self.format, self.rec_type,
+                             self._copy_headers(self.rec_headers), stream,
+                             self._copy_headers(self.http_headers),
+                             self.content_type, self.length,
+                             payload_length=self.payload_length,
+                             digest_checker=DigestChecker())
+
+    @staticmethod
+    def _copy_headers(headers):
+        if headers is None:
+            return None
+
+        return StatusAndHeaders(headers.statusline, list(headers.headers),
+                                headers.protocol, headers.total_len)
+
+    def to_json(self):
+        """ Serialize as JSON, except for the payload
+        """
+        def headers_to_list(headers):
+            if headers is None:
+                return None
+
+            return [headers.statusline, headers.headers, headers.protocol, headers.total_len]
+
+        return json.dumps([self.format, self.rec_type,
+                           headers_to_list(self.rec_headers),
+                           headers_to_list(self.http_headers),
+                           self.content_type, self.length, self.payload_length,
+                           self.payload_start, self.remaining])
+
+    @classmethod
+    def from_json(cls, data, payload=None):
+        (format_, rec_type, rec_headers, http_headers, content_type,
+         length, payload_length, payload_start, remaining) = json.loads(data)
+
+        def list_to_headers(value):
+            if value is None:
+                return None
+
+            statusline, headers, protocol, total_len = value
+            return StatusAndHeaders(statusline, [tuple(header) for header in headers],
+                                    protocol, total_len)
+
+        cached = cls.__new__(cls)
+        cached.format = format_
+        cached.rec_type = rec_type
+        cached.rec_headers = list_to_headers(rec_headers)
+        cached.http_headers = list_to_headers(http_headers)
+        cached.content_type = content_type
+        cached.length = length
+        cached.payload_length = payload_length
+        cached.payload = payload
+        cached.payload_start = payload_start
+        cached.remaining = remaining
+        return cached
+
+
+# ============================================================================
+class RecordCache(object):
+    """ Cache of CachedRecords, by (filename, offset, file version).
+    The version, ``(mtime, size)`` of local files, ensures records
+    of files that have changed are not served from the cache. Subclasses
+    implement get() and put(), eg. to share the cache between processes
+    """
+    def get(self, key):
+        return None
+
+    def put(self, key, value, size):
+        pass
+
+
+# ============================================================================
+class LRURecordCache(RecordCache):
+    """ In-process cache, evicting least recently used records to keep
+    the total size of cached headers and payloads under ``max_bytes``
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.cache = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size):
+        if size > self.max_bytes:
+            return
+
+        with self.lock:
+            old = self.cache.pop(key, None)
+            if old:
+                self.size -= old[1]
+
+            self.cache[key] = (value, size)
+            self.size += size
+
+            while self.size > self.max_bytes:
+                _, (_, old_size) = self.cache.popitem(last=False)
+                self.size -= old_size
+
+    def __len__(self):
+        return len(self.cache)
+
+    def get_stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'hit_rate': float(self.hits) / total if total else 0.0,
+                    'records': len(self.cache),
+                    'bytes': self.size}
+
+
+# ============================================================================
+class SQLiteRecordCache(RecordCache):
+    """ Cache stored in an SQLite database, which can be shared by several
+    worker processes: place it on a memory filesystem, eg. /dev/shm,
+    to share it in memory. Least recently used records are evicted
+    to keep the total size under ``max_bytes``
+
+    Records are stored as JSON, with the payload as a blob, so that
+    reading the (shared) database never runs any code from it.
+    """
+    def __init__(self, filename, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+        self.conn = sqlite3.connect(filename, timeout=30, check_same_thread=False)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS cached_records '
+                          '(key TEXT PRIMARY KEY, value TEXT, payload BLOB, size INTEGER, atime REAL)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS cached_records_atime ON cached_records (atime)')
+        self.conn.commit()
+
+    @staticmethod
+    def _key(key):
+        return json.dumps([key[1], key[2], key[0]])
+
+    def get(self, key):
+        key = self._key(key)
+
+        with self.lock:
+            row = self.conn.execute('SELECT value, payload FROM cached_records WHERE key = ?',
+                                    (key,)).fetchone()
+            if not row:
+                return None
+
+            self.conn.execute('UPDATE cached_records SET atime = ? WHERE key = ?', (time.time(), key))
+            self.conn.commit()
+
+        payload = bytes(row[1]) if row[1] is not None else None
+        return CachedRecord.from_json(row[0], payload)
+
+    def put(self, key, value, size):
+        if size > self.max_bytes:
+            return
+
+        payload = sqlite3.Binary(value.payload) if value.payload is not None else None
+
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO cached_records VALUES (?, ?, ?, ?, ?)',
+                              (self._key(key), value.to_json(), payload, size, time.time()))
+
+            total = self.conn.execute('SELECT SUM(size) FROM cached_records').fetchone()[0] or 0
+            for old_key, old_size in self.conn.execute('SELECT key, size FROM cached_records '
+                                                       'ORDER BY atime').fetchall():
+                if total <= self.max_bytes:
+                    break
+
+                self.conn.execute('DELETE FROM cached_records WHERE key = ?', (old_key,))
+                total -= old_size
+
+            self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM cached_records').fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+# ============================================================================
+class CachedRecordLoader(object):
+    """ Load records by (filename, offset), caching their parsed headers,
+    and payloads of up to ``max_payload`` bytes, in a RecordCache
+    (default: an LRURecordCache)
+
+    Records are cached by (filename, offset, file version), so that
+    records of local files that have changed since are not reused.
+
+    Records with cached payloads are loaded without reading the file.
+    For WARC records with larger payloads, the file is read from offset
+    and the payload is streamed, skipping the already parsed headers.
+
+    Files are opened through the WARCFilePool ``pool``, if provided,
+    which also throttles checking the file versions.
+    """
+    def __init__(self, cache=None, pool=None, max_payload=64 * 1024):
+        self.cache = cache if cache is not None else LRURecordCache()
+        self.pool = pool
+        self.max_payload = max_payload
+
+    @contextmanager
+    def load(self, filename, offset, length=None):
+        """ Yield the record at offset of filename
+        """
+        offset = int(offset)
+        if self.pool:
+            version = self.pool.get_file_version(filename)
+        else:
+            version = get_file_version(filename)
+
+        key = (filename, offset, version)
+
+        cached = self.cache.get(key)
+
+        if cached and cached.payload is not None:
+            yield cached.to_record(BytesIO(cached.payload))
+            return
+
+        with self._open(filename, offset, length) as fh:
+            if cached:
+                reader = DecompressingBufferedReader(fh)
+                reader.zstd_dict_loader = lambda: load_zstd_dict(fh)
+                reader.read(cached.payload_start)
+                yield cached.to_record(LimitReader(reader, cached.remaining))
+                return
+
+            record = next(iter(ArchiveIterator(fh, no_record_parse=False)))
+
+            cached = self._cache_record(key, record)
+            if cached:
+                yield cached.to_record(BytesIO(cached.payload))
+            else:
+                yield record
+
+    def _open(self, filename, offset, length):
+        length = int(length) if length else None
+        if self.pool:
+            return self.pool.open(filename, offset, length)
+
+        return fsspec_open_range(filename, offset, length)
+
+    def _cache_record(self, key, record):
+        """ Cache record, returning the CachedRecord if its payload was read
+        """
+        remaining = getattr(record.raw_stream, 'limit', None)
+
+        if remaining is not None and remaining <= self.max_payload:
+            cached = CachedRecord(record, payload=record.raw_stream.read())
+            self.cache.put(key, cached, cached.get_size())
+            return cached
+
+        # position of payload only known for warc records of known length
+        if record.format == 'warc' and remaining is not None:
+            payload_start = record.rec_headers.total_len + record.length - remaining
+            cached = CachedRecord(record, payload_start=payload_start, payload_length=remaining)
+            self.cache.put(key, cached, cached.get_size())
+
+        return None
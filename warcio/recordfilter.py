@@ -0,0 +1,190 @@
+import re
+import sys
+
+import six
+
+from warcio.archiveiterator import ArchiveIterator
+from warcio.timeutils import iso_date_to_timestamp, pad_timestamp, PAD_14_DOWN, PAD_14_UP
+from warcio.utils import fsspec_open
+from warcio.warcwriter import WARCWriter
+
+
+# ============================================================================
+class RecordFilter(object):
+    """ Declarative predicate over WARC (or ARC) records, for use with
+    ``ArchiveIterator(filter=...)``
+
+    All specified conditions must match for a record to be included:
+
+    - ``rec_types``: set of record types (eg. ``{'response', 'revisit'}``)
+    - ``uri_prefix``: target uri prefix, or tuple of prefixes
+    - ``uri_regex``: regex (str or compiled) searched in the target uri
+    - ``from_date``, ``to_date``: inclusive date range, as (possibly
+      partial) ISO dates or 14-digit timestamps, eg. ``2017-03`` or ``201703``
+    - ``mime``: set of mime types, matched against the HTTP Content-Type
+      (or WARC Content-Type, for non-HTTP records), ignoring any parameters.
+      A mime type ending in ``/`` matches any subtype (eg. ``text/``)
+    - ``status``: set of HTTP status codes
+
+    The record type, uri and date conditions are checked as soon as
+    the WARC headers are parsed, so that records which don't match are
+    skipped without parsing HTTP headers or verifying digests.
+    The mime and status conditions require the HTTP headers, and are
+    checked only for records that passed the first set of conditions.
+    """
+
+    # leading digits of a (possibly partial) ISO date, eg. 2017-03
+    ISO_DATE_RX = re.compile(r'^(\d{4})(?:-(\d{2})(?:-(\d{2})(?:[T ](\d{2})(?::(\d{2})(?::(\d{2}))?)?)?)?)?')
+
+    def __init__(self, rec_types=None, uri_prefix=None, uri_regex=None,
+                 from_date=None, to_date=None, mime=None, status=None):
+
+        if isinstance(rec_types, six.string_types):
+            rec_types = [rec_types]
+        self.rec_types = set(rec_types) if rec_types else None
+
+        if isinstance(uri_prefix, list):
+            uri_prefix = tuple(uri_prefix)
+        self.uri_prefix = uri_prefix
+
+        if isinstance(uri_regex, six.string_types):
+            uri_regex = re.compile(uri_regex)
+        self.uri_regex = uri_regex
+
+        self.from_date = self._to_timestamp(from_date, PAD_14_DOWN)
+        self.to_date = self._to_timestamp(to_date, PAD_14_UP)
+
+        if isinstance(mime, six.string_types):
+            mime = [mime]
+        self.mime = set(m.lower() for m in mime) if mime else None
+
+        if isinstance(status, (six.string_types, int)):
+            status = [status]
+        self.status = set(str(s) for s in status) if status else None
+
+        self.needs_http_headers = bool(self.mime or self.status)
+
+    @staticmethod
+    def _to_timestamp(value, pad_str):
+        if not value:
+            return None
+
+        # partial ISO dates padded the same as partial timestamps
+        if '-' in value or 'T' in value:
+            m = RecordFilter.ISO_DATE_RX.match(value)
+            if not m:
+                raise ValueError('Invalid date: ' + value)
+
+            value = ''.join(part for part in m.groups() if part)
+
+        return pad_timestamp(value, pad_str)
+
+    def match_warc_headers(self, rec_type, uri, rec_headers):
+        """ Check the conditions that only need the WARC (or ARC) headers
+        """
+        if self.rec_types and rec_type not in self.rec_types:
+            return False
+
+        if self.uri_prefix or self.uri_regex:
+            if not uri:
+                return False
+
+            if self.uri_prefix and not uri.startswith(self.uri_prefix):
+                return False
+
+            if self.uri_regex and not self.uri_regex.search(uri):
+                return False
+
+        if self.from_date or self.to_date:
+            date = self._get_record_timestamp(rec_headers)
+            if not date:
+                return False
+
+            if self.from_date and date < self.from_date:
+                return False
+
+            if self.to_date and date > self.to_date:
+                return False
+
+        return True
+
+    def match_http_headers(self, rec_headers, http_headers):
+        """ Check the conditions that need the HTTP headers, if any
+        """
+        if self.status:
+            if not http_headers or http_headers.get_statuscode() not in self.status:
+                return False
+
+        if self.mime:
+            if http_headers:
+                content_type = http_headers.get_header('Content-Type')
+            else:
+                content_type = rec_headers.get_header('Content-Type')
+
+            if not content_type:
+                return False
+
+            mime = content_type.split(';', 1)[0].strip().lower()
+            if mime not in self.mime and mime.split('/', 1)[0] + '/' not in self.mime:
+                return False
+
+        return True
+
+    @staticmethod
+    def _get_record_timestamp(rec_headers):
+        date = rec_headers.get_header('WARC-Date')
+        if date:
+            try:
+                return iso_date_to_timestamp(date)
+            except Exception:
+                return None
+
+        # ARC record, not converted to WARC
+        date = rec_headers.get_header('archive-date')
+        if date:
+            return pad_timestamp(date, PAD_14_DOWN)
+
+        return None
+
+
+# ============================================================================
+class WARCFilter(object):
+    """ Write all records matching a RecordFilter from one or more
+    WARC/ARC files into a new compressed WARC
+    """
+
+    def __init__(self, inputs, output, record_filter):
+        self.inputs = inputs
+        self.output = output
+        self.record_filter = record_filter
+
+    def process_all(self):
+        try:
+            stdout = sys.stdout.buffer
+        except AttributeError:  #pragma: no cover
+            stdout = sys.stdout
+
+        count = 0
+        with fsspec_open(self.output, 'wb', stdout) as out:
+            writer = WARCWriter(filebuf=out, gzip=True)
+
+            for filename in self.inputs:
+                with fsspec_open(filename, 'rb') as fh:
+                    count += self.process_one(fh, writer)
+
+        return count
+
+    def process_one(self, stream, writer):
+        count = 0
+        it = ArchiveIterator(stream,
+                             no_record_parse=False,
+                             arc2warc=True,
+                             verify_http=False,
+                             filter=self.record_filter)
+
+        for record in it:
+            # copy compressed WARC records verbatim, if possible
+            writer.copy_record(it)
+            count += 1
+
+        return count
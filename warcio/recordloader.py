@@ -12,8 +12,6 @@ from warcio.timeutils import timestamp_to_iso_date
 
 from six.moves import zip
 
-import logging
-logger = logging.getLogger(__name__)
 
 
 #=================================================================
@@ -23,25 +21,83 @@ class ArcWarcRecord(object):
          self.http_headers, self.content_type, self.length) = args
         self.payload_length = kwargs.get('payload_length', -1)
         self.digest_checker = kwargs.get('digest_checker')
+        self.excluded = kwargs.get('excluded', False)
+        self.http_headers_loader = kwargs.get('http_headers_loader')
+
+    @property
+    def http_headers(self):
+        """ HTTP headers of the record, if any. If loaded lazily,
+        parsed from the stream on first access
+        """
+        if self.http_headers_loader:
+            loader = self.http_headers_loader
+            self.http_headers_loader = None
+            self._http_headers = loader(self)
+
+        return self._http_headers
+
+    @http_headers.setter
+    def http_headers(self, http_headers):
+        self.http_headers_loader = None
+        self._http_headers = http_headers
+
+    ENCODING_ALIASES = {'x-gzip': 'gzip'}
+
+    # decompression type for each supported http content-coding
+    CONTENT_DECOMPRESSORS = {'gzip': 'gzip',
+                             'deflate': 'deflate',
+                             'br': 'br',
+                             'zstd': 'zstd_frames'}
 
     def content_stream(self):
+        """ Stream of the payload, de-chunked and decoded as per
+        the http headers, if any. Each layer of a multi-layer
+        content-encoding (eg. ``gzip, br``) is decoded in turn, streamed,
+        unless any encoding is not supported, in which case the payload
+        is not decoded
+        """
         if not self.http_headers:
             return self.raw_stream
 
-        encoding = self.http_headers.get_header('content-encoding')
+        encodings = [self.CONTENT_DECOMPRESSORS[encoding]
+                     for encoding in self.get_content_encodings()]
 
-        if encoding:
-            encoding = encoding.lower()
-
-            if encoding not in BufferedReader.get_supported_decompressors():
-                encoding = None
+        stream = self.raw_stream
 
         if self.http_headers.get_header('transfer-encoding') == 'chunked':
-            return ChunkedDataReader(self.raw_stream, decomp_type=encoding)
-        elif encoding:
-            return BufferedReader(self.raw_stream, decomp_type=encoding)
-        else:
-            return self.raw_stream
+            encoding = encodings.pop() if encodings else None
+            stream = ChunkedDataReader(stream, decomp_type=encoding)
+
+        # last applied encoding decoded first
+        while encodings:
+            stream = BufferedReader(stream, decomp_type=encodings.pop())
+
+        return stream
+
+    def get_content_encodings(self):
+        """ List of content-encodings, in the order applied, or an empty
+        list if not encoded or any encoding is not supported
+        """
+        header = self.http_headers.get_header('content-encoding')
+        if not header:
+            return []
+
+        supported = BufferedReader.get_supported_decompressors()
+        encodings = []
+
+        for encoding in header.lower().split(','):
+            encoding = encoding.strip()
+            encoding = self.ENCODING_ALIASES.get(encoding, encoding)
+
+            if not encoding or encoding == 'identity':
+                continue
+
+            if self.CONTENT_DECOMPRESSORS.get(encoding) not in supported:
+                return []
+
+            encodings.append(encoding)
+
+        return encodings
 
 
 #=================================================================
@@ -74,13 +130,23 @@ class ArcWarcRecordLoader(object):
                             known_format=None,
                             no_record_parse=False,
                             ensure_http_headers=False,
-                            check_digests=False):
+                            check_digests=False,
+                            record_filter=None,
+                            lazy_http_headers=False):
         """ Parse file-like stream and return an ArcWarcRecord
         encapsulating the record headers, http headers (if any),
         and a stream limited to the remainder of the record.
 
         Pass statusline and known_format to detect_type_loader_headers()
         to facilitate parsing.
+
+        If a record_filter is specified, records not matching the filter
+        are returned with ``excluded`` set, and are not parsed any further
+        than needed to determine that they don't match.
+
+        If lazy_http_headers is set, http headers are only parsed when
+        first accessed, which must be before reading the record's stream,
+        unless needed at once, to check digests or by the record_filter.
         """
         (the_format, rec_headers) = (self.
                                      _detect_type_load_headers(stream,
@@ -123,6 +189,20 @@ class ArcWarcRecordLoader(object):
         if is_err:
             length = 0
 
+        excluded = False
+
+        if record_filter:
+            # skip http headers and digests for records that don't match
+            if not record_filter.match_warc_headers(rec_type, uri, rec_headers):
+                excluded = True
+                no_record_parse = True
+                ensure_http_headers = False
+                check_digests = False
+
+            # parse http headers if needed by filter
+            elif record_filter.needs_http_headers:
+                no_record_parse = False
+
         is_verifying = False
         digest_checker = DigestChecker(check_digests)
 
@@ -136,16 +216,26 @@ class ArcWarcRecordLoader(object):
 
         http_headers = None
         payload_length = -1
+        http_headers_loader = None
+
+        # load http headers on first access
+        if (lazy_http_headers and not no_record_parse and not is_verifying and
+            not (record_filter and record_filter.needs_http_headers)):
+            http_headers_loader = self._get_http_headers_loader(rec_type, uri, stream, length,
+                                                                content_type, ensure_http_headers)
 
         # load http headers if parsing
-        if not no_record_parse:
+        elif not no_record_parse:
             start = stream.tell()
             http_headers = self.load_http_headers(rec_type, uri, stream, length)
             if length and http_headers:
                 payload_length = length - (stream.tell() - start)
 
+        if record_filter and not excluded:
+            excluded = not record_filter.match_http_headers(rec_headers, http_headers)
+
         # generate validate http headers (eg. for replay)
-        if not http_headers and ensure_http_headers:
+        if not http_headers and ensure_http_headers and not http_headers_loader:
             http_headers = self.default_http_headers(length, content_type)
 
         if is_verifying:
@@ -153,7 +243,30 @@ class ArcWarcRecordLoader(object):
 
         return ArcWarcRecord(the_format, rec_type,
                              rec_headers, stream, http_headers,
-                             content_type, length, payload_length=payload_length, digest_checker=digest_checker)
+                             content_type, length, payload_length=payload_length, digest_checker=digest_checker,
+                             excluded=excluded, http_headers_loader=http_headers_loader)
+
+    def _get_http_headers_loader(self, rec_type, uri, stream, length,
+                                 content_type, ensure_http_headers):
+        """ Return a function parsing the http headers of the record
+        from stream, as long as nothing has been read from it yet
+        """
+        start = stream.tell()
+
+        def load(record):
+            if stream.tell() != start:
+                raise Exception('HTTP headers can not be parsed, record stream already read')
+
+            http_headers = self.load_http_headers(rec_type, uri, stream, length)
+            if length and http_headers:
+                record.payload_length = length - (stream.tell() - start)
+
+            if not http_headers and ensure_http_headers:
+                http_headers = self.default_http_headers(length, content_type)
+
+            return http_headers
+
+        return load
 
     def wrap_digest_verifying_stream(self, stream, rec_type, rec_headers, digest_checker, length=None):
         payload_digest = rec_headers.get_header('WARC-Payload-Digest')
@@ -261,7 +374,8 @@ class ArcWarcRecordLoader(object):
             rec_headers.replace_header('WARC-Target-URI', uri)
 
         if uri is not None and " " in uri:
-            logger.warning("Replacing spaces in invalid WARC-Target-URI: {}".format(uri))
+            import logging
+            logging.getLogger(__name__).warning("Replacing spaces in invalid WARC-Target-URI: {}".format(uri))
             uri = uri.replace(" ", "%20")
             rec_headers.replace_header('WARC-Target-URI', uri)
 
@@ -0,0 +1,449 @@
+from warcio.filepool import WARCFilePool
+from warcio.recordcache import CachedRecordLoader, LRURecordCache
+from warcio.utils import is_url
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from argparse import Namespace
+from io import StringIO
+
+import json
+import os
+import socket
+import tempfile
+import threading
+
+from six.moves import http_client
+from six.moves.BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+from six.moves.urllib.parse import urlsplit, parse_qs, urlencode
+
+
+# ============================================================================
+class WARCServer(object):
+    """ Long-running server answering extract, index, check and lookup
+    requests over HTTP, on localhost or a Unix socket, so that the cost
+    of starting python and importing modules is paid only once.
+
+    Requests are handled concurrently by a pool of ``workers`` threads.
+    Up to ``max_open`` files are kept open between extract requests,
+    in a WARCFilePool, and up to ``cache_size`` bytes of parsed record
+    headers and small payloads are cached. The per-file indexes used by lookup requests are
+    cached, and kept until the file changes (for urls, for the lifetime
+    of the server), keeping the indexes of up to ``max_indexes`` of the
+    most recently looked up files. Whether files have changed is checked
+    at most once every ``revalidate`` seconds.
+
+    Filenames are relative paths, resolved under ``root`` (default: the
+    current directory): absolute paths, ``..`` and urls are rejected,
+    unless ``allow_remote`` is set, in which case urls may be read.
+    Idle connections are closed after ``timeout`` seconds, so that
+    clients keeping connections open don't hold on to all the workers.
+    """
+    INDEX_FIELDS = 'offset,warc-type,warc-target-uri'
+
+    LOOKUP_FIELDS = 'offset,length,warc-type,warc-target-uri,warc-date'
+
+    SPOOL_SIZE = 1024 * 1024
+
+    def __init__(self, host='127.0.0.1', port=8090, unix_socket=None,
+                 workers=8, root=None, quiet=False, max_open=128,
+                 cache_size=64 * 1024 * 1024, allow_remote=False, timeout=30,
+                 revalidate=1.0, max_indexes=256):
+        self.root = os.path.realpath(root or os.getcwd())
+        self.allow_remote = allow_remote
+        self.timeout = timeout
+        self.workers = workers
+        self.quiet = quiet
+
+        # open files, kept open between extract requests
+        self.pool = WARCFilePool(max_open=max_open, revalidate=revalidate)
+
+        # parsed headers and small payloads of extracted records
+        self.loader = None
+        if cache_size:
+            self.loader = CachedRecordLoader(LRURecordCache(cache_size), self.pool)
+
+        # url index of each file, least recently used first
+        self.index_cache = OrderedDict()
+        self.max_indexes = max_indexes
+        self.lock = threading.Lock()
+
+        if unix_socket:
+            self.httpd = UnixPoolHTTPServer(unix_socket, WARCRequestHandler, workers)
+        else:
+            self.httpd = PoolHTTPServer((host, port), WARCRequestHandler, workers)
+
+        self.httpd.warc_server = self
+
+    @property
+    def address(self):
+        return self.httpd.server_address
+
+    def serve_forever(self):
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.close()
+
+    def shutdown(self):
+        self.httpd.shutdown()
+
+    def close(self):
+        self.httpd.server_close()
+        self.pool.close()
+
+    def resolve(self, filename):
+        """ Check filename may be read, return it as a local path or url
+        """
+        if is_url(filename):
+            if not self.allow_remote:
+                raise ServerError(403, 'Only local files may be read: ' + filename)
+
+            return filename
+
+        if os.path.isabs(filename) or '..' in filename.replace('\\', '/').split('/'):
+            raise ServerError(403, 'Only relative paths under server root may be read: ' + filename)
+
+        # also check where symlinks lead
+        path = os.path.realpath(os.path.join(self.root, filename))
+        if not path.startswith(os.path.join(self.root, '')):
+            raise ServerError(403, 'File not under server root: ' + filename)
+
+        if not os.path.isfile(path):
+            raise ServerError(404, 'File not found: ' + filename)
+
+        return path
+
+    def extract(self, out, filename, offset, length=None, payload=False, headers=False):
+        from warcio.extractor import Extractor
+
+        extractor = Extractor(self.resolve(filename), offset, length, pool=self.pool)
+
+        if not self.loader:
+            extractor.extract(payload, headers, out=out)
+            return
+
+        with self.loader.load(extractor.filename, offset, length) as record:
+            extractor.write_record(record, out, payload, headers)
+
+    def index(self, out, filenames, fields=None):
+        from warcio.indexer import Indexer
+
+        indexer = Indexer(fields or self.INDEX_FIELDS,
+                          [self.resolve(filename) for filename in filenames],
+                          out)
+        indexer.process_all()
+
+    def check(self, out, filenames, verbose=False):
+        from warcio.checker import Checker
+
+        cmd = Namespace(inputs=[self.resolve(filename) for filename in filenames],
+                        verbose=verbose)
+
+        return Checker(cmd, out=out).process_all()
+
+    def get_status(self):
+        with self.lock:
+            num_urls = sum(len(cached[1]) for cached in self.index_cache.values())
+
+            status = {'file_pool': self.pool.get_stats(),
+                      'cached_indexes': len(self.index_cache),
+                      'cached_index_urls': num_urls}
+
+        if self.loader:
+            status['record_cache'] = self.loader.cache.get_stats()
+
+        return status
+
+    def lookup(self, filename, url):
+        """ Return the index entries of the records of filename for url
+        """
+        path = self.resolve(filename)
+        return self.get_url_index(path).get(url, [])
+
+    def get_url_index(self, path):
+        """ Return the index of the file, by target uri, from the cache if
+        the file has not changed since it was indexed
+        """
+        key = self.pool.get_file_version(path)
+
+        with self.lock:
+            cached = self.index_cache.get(path)
+            if cached and cached[0] == key:
+                self.index_cache.move_to_end(path)
+                return cached[1]
+
+        from warcio.indexer import Indexer
+
+        out = StringIO()
+        Indexer(self.LOOKUP_FIELDS, [path], out).process_all()
+
+        url_index = {}
+        for line in out.getvalue().splitlines():
+            entry = json.loads(line)
+            url = entry.get('warc-target-uri')
+            if url:
+                url_index.setdefault(url, []).append(entry)
+
+        with self.lock:
+            self.index_cache[path] = (key, url_index)
+            self.index_cache.move_to_end(path)
+
+            while len(self.index_cache) > self.max_indexes:
+                self.index_cache.popitem(last=False)
+
+        return url_index
+
+
+# ============================================================================
+class ServerError(Exception):
+    def __init__(self, status, msg):
+        super(ServerError, self).__init__(msg)
+        self.status = status
+
+
+# ============================================================================
+class PoolHTTPServer(HTTPServer):
+    """ HTTP server handling each connection on a thread pool
+    """
+    def __init__(self, address, handler, workers):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        HTTPServer.__init__(self, address, handler)
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        HTTPServer.server_close(self)
+        self.executor.shutdown(wait=False)
+
+
+# ============================================================================
+class UnixPoolHTTPServer(PoolHTTPServer):
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+        self.socket.bind(self.server_address)
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+    def server_close(self):
+        PoolHTTPServer.server_close(self)
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+# ============================================================================
+class WARCRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        # close idle keep-alive connections
+        self.timeout = self.server.warc_server.timeout
+        BaseHTTPRequestHandler.setup(self)
+
+    def do_GET(self):
+        server = self.server.warc_server
+        parts = urlsplit(self.path)
+        params = parse_qs(parts.query)
+
+        def get(name, default=None):
+            return params.get(name, [default])[0]
+
+        def flag(name):
+            return get(name) in ('1', 'true')
+
+        extra_headers = {}
+        out = tempfile.SpooledTemporaryFile(max_size=server.SPOOL_SIZE)
+
+        try:
+            if parts.path == '/extract':
+                filename, offset = self.required(params, 'filename', 'offset')
+                server.extract(out, filename, offset, get('length'),
+                               payload=flag('payload'), headers=flag('headers'))
+                content_type = 'application/octet-stream'
+
+            elif parts.path == '/index':
+                filenames, = self.required(params, 'filename', multiple=True)
+                server.index(TextOutput(out), filenames, get('fields'))
+                content_type = 'application/x-ndjson'
+
+            elif parts.path == '/check':
+                filenames, = self.required(params, 'filename', multiple=True)
+                exit_value = server.check(TextOutput(out), filenames, flag('verbose'))
+                extra_headers['X-Exit-Code'] = str(exit_value)
+                content_type = 'text/plain; charset=utf-8'
+
+            elif parts.path == '/status':
+                out.write(json.dumps(server.get_status()).encode('utf-8'))
+                content_type = 'application/json'
+
+            elif parts.path == '/lookup':
+                filename, url = self.required(params, 'filename', 'url')
+                for entry in server.lookup(filename, url):
+                    out.write((json.dumps(entry) + '\n').encode('utf-8'))
+                content_type = 'application/x-ndjson'
+
+            else:
+                raise ServerError(404, 'Unknown request: ' + parts.path)
+
+        except ServerError as e:
+            out.close()
+            return self.send_error_text(e.status, str(e))
+
+        except Exception as e:
+            out.close()
+            return self.send_error_text(500, '{0}: {1}'.format(type(e).__name__, e))
+
+        with out:
+            length = out.tell()
+            out.seek(0)
+
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(length))
+            for name, value in extra_headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+
+            buff = out.read(65536)
+            while buff:
+                self.wfile.write(buff)
+                buff = out.read(65536)
+
+    def required(self, params, *names, **kwargs):
+        values = []
+        for name in names:
+            if name not in params:
+                raise ServerError(400, 'Missing parameter: ' + name)
+
+            values.append(params[name] if kwargs.get('multiple') else params[name][0])
+
+        return values
+
+    def send_error_text(self, status, msg):
+        body = (msg + '\n').encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # no client address on a unix socket
+        if isinstance(self.client_address, tuple):
+            return self.client_address[0]
+
+        return 'unix'
+
+    def log_message(self, format, *args):
+        if not self.server.warc_server.quiet:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+# ============================================================================
+class TextOutput(object):
+    """ Text stream, writing utf-8 to a binary stream
+    """
+    def __init__(self, out):
+        self.out = out
+
+    def write(self, text):
+        self.out.write(text.encode('utf-8'))
+
+    def flush(self):
+        pass
+
+
+# ============================================================================
+class UnixHTTPConnection(http_client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        http_client.HTTPConnection.__init__(self, 'localhost', timeout=timeout)
+        self.unix_socket = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_socket)
+
+
+# ============================================================================
+class WARCClient(object):
+    """ Client for a WARCServer, at a localhost ``url`` or on a ``unix_socket``.
+    The connection is kept open and reused for subsequent requests.
+
+    Local filenames are relative to the server's root.
+    """
+    def __init__(self, url=None, unix_socket=None, timeout=None):
+        if unix_socket:
+            self.conn = UnixHTTPConnection(unix_socket, timeout=timeout)
+        else:
+            parts = urlsplit(url or 'http://127.0.0.1:8090')
+            self.conn = http_client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+
+    def close(self):
+        self.conn.close()
+
+    def request(self, path, params):
+        """ Return the response headers and body, raising an
+        Exception with the error message if the request failed
+        """
+        params = [(name, value) for name, value in params if value is not None]
+        self.conn.request('GET', path + '?' + urlencode(params))
+
+        res = self.conn.getresponse()
+        body = res.read()
+
+        if res.status != 200:
+            raise Exception('{0} {1}: {2}'.format(res.status, res.reason,
+                                                  body.decode('utf-8').strip()))
+
+        return res, body
+
+    def extract(self, filename, offset, length=None, payload=False, headers=False):
+        res, body = self.request('/extract', [('filename', filename),
+                                              ('offset', offset),
+                                              ('length', length),
+                                              ('payload', '1' if payload else None),
+                                              ('headers', '1' if headers else None)])
+        return body
+
+    def index(self, filenames, fields=None):
+        params = [('filename', filename) for filename in filenames]
+        params.append(('fields', fields))
+
+        res, body = self.request('/index', params)
+        return body.decode('utf-8')
+
+    def check(self, filenames, verbose=False):
+        """ Return the exit value and output of the checker
+        """
+        params = [('filename', filename) for filename in filenames]
+        params.append(('verbose', '1' if verbose else None))
+
+        res, body = self.request('/check', params)
+        return int(res.getheader('X-Exit-Code', 0)), body.decode('utf-8')
+
+    def lookup(self, filename, url):
+        res, body = self.request('/lookup', [('filename', filename),
+                                             ('url', url)])
+
+        return [json.loads(line) for line in body.decode('utf-8').splitlines()]
+
+    def status(self):
+        """ Return the server's file pool and index cache stats
+        """
+        res, body = self.request('/status', [])
+        return json.loads(body.decode('utf-8'))
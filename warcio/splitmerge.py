@@ -0,0 +1,218 @@
+from warcio.archiveiterator import ArchiveIterator
+from warcio.indexer import Indexer, RecordPosition
+from warcio.warcwriter import WARCWriter, can_copy_raw
+from warcio.utils import fsspec_open
+
+from contextlib import ExitStack
+
+import os
+
+
+# ============================================================================
+class WARCCopier(object):
+    """ Base class for copying records from one or more WARC/ARC files
+    into new compressed WARCs, copying the gzip members of record-compressed
+    WARCs verbatim (see WARCWriter.copy_record())
+
+    If ``warcinfo`` is a dict of warcinfo fields, any warcinfo records
+    in the inputs are dropped, and a new warcinfo record with these fields
+    is written at the start of each output.
+
+    If ``index`` is set, an index of each output, with the given
+    ``index_fields``, is written to ``<output>.jsonl``
+    """
+
+    INDEX_FIELDS = 'offset,length,warc-type,warc-target-uri'
+
+    def __init__(self, inputs, warcinfo=None, index=False, index_fields=None):
+        self.inputs = inputs
+        self.warcinfo = warcinfo
+        self.index = index
+        self.indexer = Indexer(index_fields or self.INDEX_FIELDS, [], None)
+
+        self.filename = None
+        self.stack = None
+        self.out = None
+        self.writer = None
+        self.index_out = None
+        self.num_records = 0
+
+    def iter_records(self):
+        """ Iterate over (iterator, record) for all records of all inputs
+        """
+        for filename in self.inputs:
+            with fsspec_open(filename, 'rb') as fh:
+                it = ArchiveIterator(fh,
+                                     no_record_parse=False,
+                                     arc2warc=True,
+                                     verify_http=False)
+
+                for record in it:
+                    if self.warcinfo is not None and record.rec_type == 'warcinfo':
+                        continue
+
+                    yield it, record
+
+    def open_output(self, filename):
+        self.close_output()
+
+        self.filename = filename
+        self.stack = ExitStack()
+        self.out = self.stack.enter_context(fsspec_open(filename, 'wb'))
+        self.writer = WARCWriter(filebuf=self.out, gzip=True)
+        self.num_records = 0
+
+        if self.index:
+            self.index_out = self.stack.enter_context(fsspec_open(filename + '.jsonl', 'wt'))
+
+        if self.warcinfo is not None:
+            record = self.writer.create_warcinfo_record(os.path.basename(filename),
+                                                        self.warcinfo)
+            offset = self.out.tell()
+            self.writer.write_record(record)
+            self._index_record(record, offset)
+
+    def close_output(self):
+        if self.stack:
+            self.stack.close()
+
+        self.stack = None
+        self.out = None
+        self.index_out = None
+
+    def write_record(self, it, record, can_copy=None):
+        offset = self.out.tell()
+        self.writer.copy_record(it, can_copy)
+        self._index_record(record, offset)
+        self.num_records += 1
+
+    def _index_record(self, record, offset):
+        if self.index_out:
+            position = RecordPosition(offset, self.out.tell() - offset)
+            self.indexer.process_index_entry(position, record, self.filename, self.index_out)
+
+
+# ============================================================================
+class WARCSplitter(WARCCopier):
+    """ Split one or more WARC/ARC files into compressed WARCs of about
+    ``max_size`` bytes each, named ``<prefix>-00000.warc.gz``,
+    ``<prefix>-00001.warc.gz``, etc.
+
+    Related records (eg. a response and its request, linked by
+    WARC-Concurrent-To, or adjacent with the same target uri) are kept
+    together in the same output, so an output may exceed ``max_size``
+    by the size of the rest of a group.
+    """
+
+    def __init__(self, inputs, prefix, max_size, **kwargs):
+        super(WARCSplitter, self).__init__(inputs, **kwargs)
+        self.prefix = prefix
+        self.max_size = max_size
+        self.outputs = []
+
+    def process_all(self):
+        group = None
+
+        try:
+            for it, record in self.iter_records():
+                can_copy = can_copy_raw(it)
+
+                if group is None or not group.add(record):
+                    group = RecordGroup(record)
+
+                    if self._is_full(it, can_copy):
+                        self.open_output(self.get_output_name(len(self.outputs)))
+                        self.outputs.append(self.filename)
+
+                self.write_record(it, record, can_copy)
+
+        finally:
+            self.close_output()
+
+        return self.outputs
+
+    def get_output_name(self, num):
+        return '{0}-{1:05d}.warc.gz'.format(self.prefix, num)
+
+    def _is_full(self, it, can_copy):
+        if not self.out:
+            return True
+
+        if not self.num_records:
+            return False
+
+        size = self.out.tell()
+
+        # if the record can be copied as-is, its length is known upfront
+        if can_copy:
+            return size + it.get_record_length() > self.max_size
+
+        return size >= self.max_size
+
+
+# ============================================================================
+class RecordGroup(object):
+    """ Track a group of related records, which should not be split apart
+    """
+    PAIR_TYPES = (('request', 'response'), ('request', 'revisit'),
+                  ('response', 'request'), ('revisit', 'request'))
+
+    def __init__(self, record):
+        self.ids = set()
+        self.links = set()
+        self.last = None
+        self.count = 0
+        self.add(record, True)
+
+    def add(self, record, first=False):
+        rec_id = record.rec_headers.get_header('WARC-Record-ID')
+        links = [value for name, value in record.rec_headers.headers
+                 if name.lower() == 'warc-concurrent-to']
+
+        if not first and not self._is_related(record, rec_id, links):
+            return False
+
+        if rec_id:
+            self.ids.add(rec_id)
+
+        self.links.update(links)
+        self.last = record
+        self.count += 1
+        return True
+
+    def _is_related(self, record, rec_id, links):
+        if rec_id in self.links or self.ids.intersection(links):
+            return True
+
+        # adjacent request and response for the same url, without links
+        if self.count == 1 and not links and not self.links:
+            types = (self.last.rec_type, record.rec_type)
+            uri = record.rec_headers.get_header('WARC-Target-URI')
+            if uri and types in self.PAIR_TYPES:
+                return uri == self.last.rec_headers.get_header('WARC-Target-URI')
+
+        return False
+
+
+# ============================================================================
+class WARCMerger(WARCCopier):
+    """ Concatenate the records of one or more WARC/ARC files into
+    a single compressed WARC
+    """
+    def __init__(self, inputs, output, **kwargs):
+        super(WARCMerger, self).__init__(inputs, **kwargs)
+        self.output = output
+
+    def process_all(self):
+        count = 0
+        self.open_output(self.output)
+
+        try:
+            for it, record in self.iter_records():
+                self.write_record(it, record)
+                count += 1
+
+        finally:
+            self.close_output()
+
+        return count
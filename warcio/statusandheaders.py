@@ -5,7 +5,6 @@ Representation and parsing of HTTP-style status + headers
 from six.moves import range
 from six import iteritems
 from warcio.utils import to_native_str, headers_to_str_headers
-import uuid
 
 from six.moves.urllib.parse import quote
 import re
@@ -322,6 +321,7 @@ class StatusAndHeadersParser(object):
     @staticmethod
     def make_warc_id(id_=None):
         if not id_:
+            import uuid
             id_ = uuid.uuid4()
         return '<urn:uuid:{0}>'.format(id_)
 
@@ -0,0 +1,250 @@
+from warcio.archiveiterator import ArchiveIterator
+from warcio.exceptions import ArchiveLoadFailed
+from warcio.utils import fsspec_open
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+
+import codecs
+import json
+import re
+import sys
+
+
+META_CHARSET_RX = re.compile(br'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_:.-]+)', re.I)
+
+BOMS = ((codecs.BOM_UTF8, 'utf-8'),
+        (codecs.BOM_UTF16_LE, 'utf-16'),
+        (codecs.BOM_UTF16_BE, 'utf-16'))
+
+
+# ============================================================================
+def get_charset(content_type, payload, sniff_size=4096):
+    """ Charset of an HTML payload: from the BOM, the charset of the
+    HTTP Content-Type, or a <meta> tag in the first ``sniff_size``
+    bytes, or None if not found (or not a known text encoding)
+    """
+    for bom, charset in BOMS:
+        if payload.startswith(bom):
+            return charset
+
+    charset = None
+    if content_type:
+        for param in content_type.split(';')[1:]:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'charset':
+                charset = value.strip().strip('"\'')
+
+    if not charset:
+        m = META_CHARSET_RX.search(payload[:sniff_size])
+        if m:
+            charset = m.group(1).decode('ascii')
+
+    if not charset:
+        return None
+
+    try:
+        info = codecs.lookup(charset)
+    except LookupError:
+        return None
+
+    # not a bytes-to-bytes codec, eg. hex or zlib
+    if not getattr(info, '_is_text_encoding', True):
+        return None
+
+    return info.name
+
+
+def decode_payload(payload, charset=None):
+    """ Decode payload with charset, if any, or else as utf-8,
+    falling back to windows-1252
+    """
+    if charset:
+        return payload.decode(charset, 'replace')
+
+    try:
+        return payload.decode('utf-8')
+    except UnicodeDecodeError:
+        return payload.decode('cp1252', 'replace')
+
+
+# ============================================================================
+class HTMLTextParser(HTMLParser):
+    """ Collect the text of an HTML document, skipping scripts, styles
+    and other non-text elements, with a line break at each block element
+    """
+    SKIP_TAGS = frozenset(('script', 'style', 'noscript', 'template', 'svg', 'head'))
+
+    BLOCK_TAGS = frozenset(('p', 'div', 'br', 'li', 'ul', 'ol', 'dl', 'dt', 'dd',
+                            'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'tr', 'table',
+                            'section', 'article', 'header', 'footer', 'nav', 'aside',
+                            'main', 'blockquote', 'pre', 'hr', 'form', 'title',
+                            'figure', 'figcaption', 'address'))
+
+    def __init__(self):
+        HTMLParser.__init__(self, convert_charrefs=True)
+        self.parts = []
+        self.skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self.skip += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            if self.skip:
+                self.skip -= 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_data(self, data):
+        # line breaks only at block elements
+        if not self.skip:
+            self.parts.append(data.replace('\n', ' '))
+
+    def get_text(self):
+        lines = (' '.join(line.split()) for line in ''.join(self.parts).split('\n'))
+        return '\n'.join(line for line in lines if line)
+
+
+def html_to_text(html):
+    """ Text of the (decoded) HTML document ``html``
+    """
+    parser = HTMLTextParser()
+    parser.feed(html)
+    parser.close()
+    return parser.get_text()
+
+
+def extract_texts(items):
+    """ Extract the text of each (uri, date, digest, mime, content_type, payload)
+    item, run in the worker processes. Records that fail to decode or parse
+    are reported and skipped
+    """
+    results = []
+    for uri, date, digest, mime, content_type, payload in items:
+        try:
+            text = decode_payload(payload, get_charset(content_type, payload))
+            if mime != 'text/plain':
+                text = html_to_text(text)
+
+        except Exception as e:
+            sys.stderr.write('{0}: {1}: {2}\n'.format(uri, type(e).__name__, e))
+            continue
+
+        results.append({'uri': uri, 'date': date, 'digest': digest, 'text': text})
+
+    return results
+
+
+# ============================================================================
+class TextExtractor(object):
+    """ Extract the text of the HTML (and plain text) responses of WARC/ARC
+    files, written as JSONL: one ``{"uri", "date", "digest", "text"}``
+    line per record, in the order of the inputs.
+
+    Records are read, and their payloads de-chunked and decoded as per
+    their Content-Encoding, in the main process. Only successful (2xx)
+    responses of the ``mime`` types are extracted, up to ``max_size``
+    bytes of each payload.
+
+    With more than one job, the charset detection and HTML parsing are
+    done by a pool of ``jobs`` worker processes, sent ``batch_size``
+    records at a time, with at most ``jobs * 2`` batches pending, so that
+    memory use is bounded however fast the inputs are read.
+    """
+    MIME_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain')
+
+    def __init__(self, inputs, output=None, jobs=1, mime=None,
+                 max_size=5 * 1024 * 1024, batch_size=32):
+        self.inputs = inputs
+        self.output = output
+        self.jobs = jobs
+        self.mime = tuple(mime or self.MIME_TYPES)
+        self.max_size = max_size
+        self.batch_size = batch_size
+
+    def process_all(self):
+        """ Write the text of all records, returning the number of records
+        """
+        count = 0
+        with fsspec_open(self.output, 'wt', sys.stdout) as out:
+            for result in self.iter_texts():
+                out.write(json.dumps(result) + '\n')
+                count += 1
+
+        return count
+
+    def iter_texts(self):
+        if self.jobs <= 1:
+            for batch in self.iter_batches():
+                for result in extract_texts(batch):
+                    yield result
+            return
+
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            pending = deque()
+            max_pending = self.jobs * 2
+
+            try:
+                for batch in self.iter_batches():
+                    pending.append(executor.submit(extract_texts, batch))
+
+                    if len(pending) >= max_pending:
+                        for result in pending.popleft().result():
+                            yield result
+
+                while pending:
+                    for result in pending.popleft().result():
+                        yield result
+
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def iter_batches(self):
+        batch = []
+        for item in self.iter_items():
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    def iter_items(self):
+        for filename in self.inputs:
+            with fsspec_open(filename, 'rb') as fh:
+                try:
+                    for record in ArchiveIterator(fh, arc2warc=True):
+                        item = self.get_item(record)
+                        if item:
+                            yield item
+
+                # extract the records read before the error
+                except ArchiveLoadFailed as e:
+                    sys.stderr.write('{0}: {1}\n'.format(filename, str(e).strip()))
+
+    def get_item(self, record):
+        if record.rec_type != 'response' or not record.http_headers:
+            return None
+
+        status = record.http_headers.get_statuscode()
+        if not status.startswith('2'):
+            return None
+
+        content_type = record.http_headers.get_header('Content-Type')
+        mime = (content_type or '').split(';')[0].strip().lower()
+        if mime not in self.mime:
+            return None
+
+        payload = record.content_stream().read(self.max_size)
+
+        return (record.rec_headers.get_header('WARC-Target-URI'),
+                record.rec_headers.get_header('WARC-Date'),
+                record.rec_headers.get_header('WARC-Payload-Digest'),
+                mime, content_type, payload)
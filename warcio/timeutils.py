@@ -8,7 +8,6 @@ import time
 import calendar
 
 from datetime import datetime, timezone
-from email.utils import parsedate, formatdate
 
 #=================================================================
 # str <-> datetime conversion
@@ -79,6 +78,8 @@ def http_date_to_datetime(string, tz_aware=False):
     >>> http_date_to_datetime('Thu, 26 Dec 2013 09:50:10 GMT', tz_aware=True)
     datetime.datetime(2013, 12, 26, 9, 50, 10, tzinfo=datetime.timezone.utc)
     """
+    from email.utils import parsedate
+
     tzinfo = None
     if tz_aware:
         tzinfo = timezone.utc
@@ -96,6 +97,8 @@ def datetime_to_http_date(the_datetime):
     >>> datetime_to_http_date(http_date_to_datetime(x)) == x
     True
     """
+    from email.utils import formatdate
+
     timeval = calendar.timegm(the_datetime.utctimetuple())
     return formatdate(timeval=timeval,
                       localtime=False,
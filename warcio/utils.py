@@ -1,23 +1,31 @@
 import six
 import os
+import re
 from contextlib import contextmanager
 import base64
 import hashlib
+from io import BytesIO
 
 try:
     import collections.abc as collections_abc  # only works on python 3.3+
 except ImportError:  #pragma: no cover
     import collections as collections_abc
 
-try:
-    from fsspec import open as _fsspec_open
-    HAS_FSSPEC = True
-except ImportError:
-    HAS_FSSPEC = False
+from importlib.util import find_spec
+
+# fsspec is imported only when opening a url, as it is slow to import
+HAS_FSSPEC = find_spec('fsspec') is not None
 
 
 BUFF_SIZE = 16384
 
+# largest known-length range fetched into memory with a single read
+MAX_RANGE_FETCH = 16 * 1024 * 1024
+
+LOCAL_PROTOCOLS = (None, 'file', 'local')
+
+BUILTIN_OPEN_KWARGS = ('buffering', 'encoding', 'errors', 'newline')
+
 
 # #===========================================================================
 def to_native_str(value, encoding='utf-8'):
@@ -37,16 +45,30 @@ def to_native_str(value, encoding='utf-8'):
 def fsspec_open(filename, mod, default_fh=None, **kwargs):
     """
     Open a file using fsspec if available, otherwise use built-in open.
+
+    Plain local paths are opened with built-in open, as with fsspec,
+    expanding ``~`` and creating missing directories when writing,
+    to avoid importing fsspec.
     """
     if filename == '-' or filename == b'-':
         yield default_fh
     elif filename and isinstance(filename, str):
-        if HAS_FSSPEC:
+        if HAS_FSSPEC and (is_url(filename) or
+                           any(k not in BUILTIN_OPEN_KWARGS for k in kwargs)):
+            from fsspec import open as _fsspec_open
             with _fsspec_open(filename, mode=mod, **kwargs) as f:
                 yield f
         else:
-            builtin_kwargs = {k: v for k, v in kwargs.items() 
-                            if k in ['buffering', 'encoding', 'errors', 'newline']}
+            builtin_kwargs = {k: v for k, v in kwargs.items()
+                              if k in BUILTIN_OPEN_KWARGS}
+
+            if HAS_FSSPEC:
+                filename = os.path.expanduser(filename)
+                if any(m in mod for m in 'wax'):
+                    dirname = os.path.dirname(filename)
+                    if dirname and not os.path.isdir(dirname):
+                        os.makedirs(dirname)
+
             with open(filename, mode=mod, **builtin_kwargs) as f:
                 yield f
 
@@ -56,6 +78,136 @@ def fsspec_open(filename, mod, default_fh=None, **kwargs):
         yield default_fh
 
 
+# #===========================================================================
+def is_url(filename):
+    """
+    Return True if filename is an fsspec url (with a protocol, or chained),
+    rather than a plain path
+    """
+    return '://' in filename or '::' in filename
+
+
+def is_remote_path(filename):
+    """
+    Return True if filename is a remote (non-local) fsspec url
+    """
+    if not HAS_FSSPEC or not isinstance(filename, str) or not is_url(filename):
+        return False
+
+    from fsspec.core import split_protocol
+    return split_protocol(filename)[0] not in LOCAL_PROTOCOLS
+
+
+def parse_size(value):
+    """
+    Parse a size in bytes, with an optional K, M, G or T suffix
+    """
+    m = re.match(r'^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*$', str(value), re.I)
+    if not m:
+        raise ValueError('Invalid size: ' + str(value))
+
+    power = ' KMGT'.index(m.group(2).upper() or ' ')
+    return int(float(m.group(1)) * (1024 ** power))
+
+
+def get_file_version(filename):
+    """
+    Return (mtime, size) of a local file, to detect when it has changed,
+    or None for urls, which are assumed not to change
+    """
+    if is_url(filename):
+        return None
+
+    stat = os.stat(filename)
+    return (stat.st_mtime, stat.st_size)
+
+
+# #===========================================================================
+class RangeBytesIO(BytesIO):
+    """
+    In-memory buffer holding a byte range of a larger file,
+    starting at offset, which is addressed by file offsets.
+
+    If set, fetch_range(start, end) reads another range of the file,
+    eg. the zstd dictionary at the start of a .warc.zst file
+    """
+    def __init__(self, data, offset=0, fetch_range=None):
+        super(RangeBytesIO, self).__init__(data)
+        self.offset = offset
+        self.fetch_range = fetch_range
+
+    def tell(self):
+        return super(RangeBytesIO, self).tell() + self.offset
+
+    def seek(self, pos, whence=0):
+        if whence == 0:
+            pos -= self.offset
+        return super(RangeBytesIO, self).seek(pos, whence) + self.offset
+
+
+def get_range_fetcher(filename):
+    """
+    Return a function reading the range [start, end) of filename,
+    with a single range request for remote files
+    """
+    def fetch_range(start, end):
+        if is_remote_path(filename):
+            from fsspec.core import url_to_fs
+            fs, path = url_to_fs(filename)
+            return fs.cat_file(path, start=start, end=end)
+
+        with fsspec_open(filename, 'rb') as fh:
+            fh.seek(start)
+            return fh.read(end - start)
+
+    return fetch_range
+
+
+# #===========================================================================
+@contextmanager
+def fsspec_open_range(filename, offset=0, length=None,
+                      block_size=None, cache_type='readahead'):
+    """
+    Open a file for reading, positioned at offset.
+
+    For remote files, if the length of the range to be read is known
+    (eg. from an index), the exact range [offset, offset + length) is
+    fetched with a single range request and returned as an in-memory
+    stream (up to MAX_RANGE_FETCH bytes), which tell()s and seek()s
+    using the same offsets as the remote file.
+
+    Otherwise, the remote file is opened with the specified block_size
+    and cache_type (see fsspec caching), defaulting to read-ahead caching
+    suited to sequential reads.
+
+    Local files are opened and seeked to offset as usual.
+    """
+    if is_remote_path(filename):
+        from fsspec.core import url_to_fs
+        fs, path = url_to_fs(filename)
+
+        if length is not None and length <= MAX_RANGE_FETCH:
+            data = fs.cat_file(path, start=offset, end=offset + length)
+            yield RangeBytesIO(data, offset, get_range_fetcher(filename))
+            return
+
+        if not block_size and length:
+            block_size = min(length, MAX_RANGE_FETCH)
+
+        kwargs = {'cache_type': cache_type}
+        if block_size:
+            kwargs['block_size'] = block_size
+
+        with fs.open(path, 'rb', **kwargs) as f:
+            f.seek(offset)
+            yield f
+
+    else:
+        with fsspec_open(filename, 'rb') as f:
+            f.seek(offset)
+            yield f
+
+
 # #===========================================================================
 @contextmanager
 def open_or_default(filename, mod, default_fh):
@@ -106,6 +258,25 @@ class Digester(object):
         return self.type_ + ':' + to_native_str(base64.b32encode(self.digester.digest()))
 
 
+# ============================================================================
+class CountingWriter(object):
+    """ Wrap an output stream, counting the bytes written
+    """
+    def __init__(self, out):
+        self.out = out
+        self.count = 0
+
+    def write(self, buff):
+        self.out.write(buff)
+        self.count += len(buff)
+
+    def tell(self):
+        return self.count
+
+    def flush(self):
+        self.out.flush()
+
+
 #=============================================================================
 sys_open = open
 
@@ -1,9 +1,14 @@
+import os
+import struct
+import tempfile
 import zlib
 
 from socket import gethostname
 
 from warcio.utils import Digester
 from warcio.recordbuilder import RecordBuilder
+from warcio.pipelinestats import InstrumentedStream, get_default_stats, timer
+from warcio.bufferedreaders import ZSTD_DICT_MAGIC
 
 from warcio.statusandheaders import StatusAndHeadersParser
 
@@ -14,9 +19,28 @@ class BaseWARCWriter(RecordBuilder):
     def __init__(self, gzip=True, *args, **kwargs):
         super(BaseWARCWriter, self).__init__(warc_version=kwargs.get('warc_version'),
                                              header_filter=kwargs.get('header_filter'))
-        self.gzip = gzip
+        # 'gzip', 'zstd' or None, each record compressed separately
+        self.compression = kwargs.get('compression')
+        if self.compression is None and gzip:
+            self.compression = 'gzip'
+        elif self.compression not in (None, 'gzip', 'zstd'):
+            raise Exception('Compression type not supported: ' + self.compression)
+
+        self.gzip = self.compression == 'gzip'
+
+        # optional zstd dictionary, written to a dictionary frame
+        # at the start of the output
+        self.zstd_dict = kwargs.get('zstd_dict')
+        self.zstd_level = kwargs.get('zstd_level', ZstdWrapper.DEFAULT_LEVEL)
+        self._zstd_compressor = None
+
         self.hostname = gethostname()
 
+        # optional PipelineStats
+        self.stats = kwargs.get('stats')
+        if self.stats is None:
+            self.stats = get_default_stats()
+
         self.parser = StatusAndHeadersParser([], verify=False)
 
     def write_request_response_pair(self, req, resp, params=None):
@@ -39,12 +63,18 @@ class BaseWARCWriter(RecordBuilder):
         raise NotImplemented()
 
     def _write_warc_record(self, out, record):
-        if self.gzip:
-            out = GzippingWrapper(out)
+        if self.stats is not None:
+            start, nested = timer(), self.stats.total_time()
+            out = InstrumentedStream(out, self.stats)
+
+        out = self._wrap_compressed(out)
 
         if record.http_headers:
             record.http_headers.compute_headers_buffer(self.header_filter)
 
+        if self.stats is not None:
+            digest_start, digest_nested = timer(), self.stats.total_time()
+
         # Content-Length is None/unknown
         # Fix record by: buffering and recomputing all digests and length
         # (since no length, can't trust existing digests)
@@ -63,6 +93,13 @@ class BaseWARCWriter(RecordBuilder):
         else:
             self.ensure_digest(record, block=True, payload=True)
 
+        if self.stats is not None:
+            self.stats.add_time('digest', digest_start, digest_nested)
+
+            # buffered to disk to compute digests or length
+            if getattr(record.raw_stream, '_rolled', False):
+                self.stats.incr('spills')
+
         if record.content_type != None:
             # ensure proper content type
             record.rec_headers.replace_header('Content-Type', record.content_type)
@@ -108,25 +145,123 @@ class BaseWARCWriter(RecordBuilder):
 
         out.flush()
 
+        if self.stats is not None:
+            self.stats.incr('records_written')
+            self.stats.add_time('serialize', start, nested)
+
+
+    def _wrap_compressed(self, out):
+        if self.compression == 'gzip':
+            return GzippingWrapper(out, self.stats)
+
+        if self.compression == 'zstd':
+            if not self._zstd_compressor:
+                self._zstd_compressor = ZstdWrapper.get_compressor(self.zstd_dict, self.zstd_level)
+
+                if self.zstd_dict and _is_at_start(out):
+                    ZstdWrapper.write_dict(out, self.zstd_dict)
+
+            return ZstdWrapper(out, self.stats, self._zstd_compressor)
+
+        return out
+
 
 # ============================================================================
 class GzippingWrapper(object):
-    def __init__(self, out):
+    def __init__(self, out, stats=None):
         self.compressor = zlib.compressobj(9, zlib.DEFLATED, zlib.MAX_WBITS + 16)
         self.out = out
+        self.stats = stats
 
     def write(self, buff):
         #if isinstance(buff, str):
         #    buff = buff.encode('utf-8')
-        buff = self.compressor.compress(buff)
+        if self.stats is not None:
+            start = timer()
+            buff = self.compressor.compress(buff)
+            self.stats.add_time('compress', start)
+        else:
+            buff = self.compressor.compress(buff)
+
         self.out.write(buff)
 
     def flush(self):
-        buff = self.compressor.flush()
+        if self.stats is not None:
+            start = timer()
+            buff = self.compressor.flush()
+            self.stats.add_time('compress', start)
+        else:
+            buff = self.compressor.flush()
+
         self.out.write(buff)
         self.out.flush()
 
 
+# ============================================================================
+class ZstdWrapper(object):
+    """ Compresses the data written, up to flush(), to a single zstd frame,
+    optionally using a dictionary
+    """
+    DEFAULT_LEVEL = 3
+
+    def __init__(self, out, stats=None, compressor=None):
+        if compressor is None:
+            compressor = self.get_compressor()
+
+        self.compressor = compressor.compressobj()
+        self.out = out
+        self.stats = stats
+
+    @staticmethod
+    def get_compressor(dict_data=None, level=DEFAULT_LEVEL):
+        import zstandard
+
+        if dict_data is not None and not isinstance(dict_data, zstandard.ZstdCompressionDict):
+            dict_data = zstandard.ZstdCompressionDict(dict_data)
+
+        return zstandard.ZstdCompressor(level=level, dict_data=dict_data)
+
+    @staticmethod
+    def write_dict(out, dict_data):
+        """ Write the dictionary to a zstd skippable frame, to be read
+        before the frames compressed with it
+        """
+        if not isinstance(dict_data, bytes):
+            dict_data = dict_data.as_bytes()
+
+        out.write(ZSTD_DICT_MAGIC + struct.pack('<I', len(dict_data)))
+        out.write(dict_data)
+
+    def write(self, buff):
+        if self.stats is not None:
+            start = timer()
+            buff = self.compressor.compress(buff)
+            self.stats.add_time('compress', start)
+        else:
+            buff = self.compressor.compress(buff)
+
+        self.out.write(buff)
+
+    def flush(self):
+        if self.stats is not None:
+            start = timer()
+            buff = self.compressor.flush()
+            self.stats.add_time('compress', start)
+        else:
+            buff = self.compressor.flush()
+
+        self.out.write(buff)
+        self.out.flush()
+
+
+def _is_at_start(out):
+    try:
+        return out.tell() == 0
+    except Exception:
+        # not seekable, eg. a pipe
+        return True
+
+
 # ============================================================================
 class WARCWriter(BaseWARCWriter):
     def __init__(self, filebuf, *args, **kwargs):
@@ -136,6 +271,34 @@ class WARCWriter(BaseWARCWriter):
     def write_record(self, record, params=None):
         self._write_warc_record(self.out, record)
 
+    def copy_record(self, it, can_copy=None):
+        """ Write the current record of the ArchiveIterator ``it``,
+        copying the compressed gzip member verbatim if possible,
+        otherwise re-serializing it as with write_record()
+
+        ``can_copy`` is the result of can_copy_raw(it), if already known.
+
+        Return True if the record was copied verbatim. A record that can't
+        be copied verbatim must not have been read to the end already
+        """
+        if self.stats is not None:
+            start, nested = timer(), self.stats.total_time()
+
+        if self.gzip and copy_raw_record(it, self.out, can_copy):
+            if self.stats is not None:
+                self.stats.incr('records_copied')
+                self.stats.add_time('copy', start, nested)
+
+            return True
+
+        # payload already consumed, eg. by get_record_length()
+        if it.member_info:
+            raise Exception('Record already read to the end, can not be re-serialized: ' +
+                            str(it.record.rec_headers.get_header('WARC-Record-ID')))
+
+        self.write_record(it.record)
+        return False
+
     def _do_write_req_resp(self, req, resp, params):
         self._write_warc_record(self.out, resp)
         self._write_warc_record(self.out, req)
@@ -159,3 +322,140 @@ class BufferWARCWriter(WARCWriter):
         return self.out
 
 
+
+
+# ============================================================================
+COPY_SIZE = 16384 * 4
+
+
+def can_copy_raw(it):
+    """ Return True if the current record of the ArchiveIterator ``it``
+    is a WARC record stored as its own gzip member in a seekable input,
+    which can be copied verbatim with copy_raw_record()
+    """
+    reader = it.reader
+    if not reader or not reader.decompressor or reader.decomp_type != 'gzip':
+        return False
+
+    if it.ensure_http_headers or not hasattr(it.fh, 'seek'):
+        return False
+
+    fh = it.fh
+    pos = fh.tell()
+
+    try:
+        # ensure member is a WARC (not ARC) record
+        fh.seek(it.member_info[0] if it.member_info else it.offset)
+        start = zlib.decompressobj(zlib.MAX_WBITS + 16).decompress(fh.read(256), 5)
+    finally:
+        fh.seek(pos)
+
+    return start == b'WARC/'
+
+
+def copy_raw_record(it, out, can_copy=None):
+    """ Copy the gzip member of the current record of the ArchiveIterator
+    ``it`` verbatim to ``out``, without decompressing and recompressing it.
+
+    The record must be a WARC record stored as its own gzip member
+    in a seekable input (see can_copy_raw()). Where possible, the bytes
+    are copied by the OS (``os.copy_file_range()`` or ``os.sendfile()``)
+
+    Return False, leaving the record as is, if the record can not be
+    copied this way. Otherwise, the record is read to the end and copied.
+    ``can_copy`` is the result of can_copy_raw(it), if already known
+    """
+    if can_copy is None:
+        can_copy = can_copy_raw(it)
+
+    if not can_copy:
+        return False
+
+    reader = it.reader
+    fh = it.fh
+
+    offset = it.get_record_offset()
+    length = it.get_record_length()
+
+    # multiple records in one gzip member, can't be copied
+    if not reader.decompressor.eof:
+        it._raise_invalid_gzip_err()
+
+    pos = fh.tell()
+    try:
+        out.flush()
+        copied = _copy_fd_range(fh, out, offset, length)
+        if copied < length:
+            _copy_range(fh, out, offset + copied, length - copied)
+    finally:
+        fh.seek(pos)
+
+    return True
+
+
+def _copy_range(fh, out, offset, length):
+    fh.seek(offset)
+    while length > 0:
+        buff = fh.read(min(length, COPY_SIZE))
+        if not buff:
+            raise EOFError('Unexpected end of record at offset {0}'.format(offset))
+
+        out.write(buff)
+        length -= len(buff)
+
+
+def _fileno(stream):
+    # don't force a spooled temp file to disk
+    if isinstance(stream, tempfile.SpooledTemporaryFile):
+        return None
+
+    try:
+        return stream.fileno()
+    except Exception:
+        return None
+
+
+def _copy_fd_range(fh, out, offset, length):
+    """ Copy up to length bytes at offset of fh to the current
+    position of out using the OS, if both are OS files.
+    Return the number of bytes copied
+    """
+    src_fd = _fileno(fh)
+    dst_fd = _fileno(out)
+    if src_fd is None or dst_fd is None:
+        return 0
+
+    try:
+        dst_offset = out.tell()
+    except Exception:
+        return 0
+
+    copied = 0
+
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while copied < length:
+                res = os.copy_file_range(src_fd, dst_fd, length - copied,
+                                         offset + copied, dst_offset + copied)
+                if not res:
+                    break
+                copied += res
+
+        except OSError:
+            pass
+
+    if copied < length and hasattr(os, 'sendfile'):
+        try:
+            os.lseek(dst_fd, dst_offset + copied, os.SEEK_SET)
+            while copied < length:
+                res = os.sendfile(dst_fd, src_fd, offset + copied, length - copied)
+                if not res:
+                    break
+                copied += res
+
+        except OSError:
+            pass
+
+    # sync buffered position with the copied data
+    out.seek(dst_offset + copied)
+    return copied